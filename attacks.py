@@ -0,0 +1,135 @@
+"""Precomputed attack tables for every piece type and square.
+All tables are built once at import. Squares are numbered row * 8 + col
+(0 is a8, 63 is h1) like in bitboard.py.
+
+Knight, king and pawn attacks are plain per-square bitboards. Sliding pieces use
+one lookup table per square and line (rank, file, diagonal, anti-diagonal) that is
+indexed by the blockers on that line, so a rook or bishop attack set is two
+dictionary lookups instead of a walk along its rays.
+"""
+
+# Directions as (row step, col step), in the order Chessboard scans them
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+ROOK_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+QUEEN_DIRECTIONS = BISHOP_DIRECTIONS + ROOK_DIRECTIONS
+
+
+def _ray(square, direction):
+    """Return the squares from square (exclusive) to the edge of the board."""
+    row, col = divmod(square, 8)
+    squares = []
+    row, col = row + direction[0], col + direction[1]
+    while 0 <= row < 8 and 0 <= col < 8:
+        squares.append(row * 8 + col)
+        row, col = row + direction[0], col + direction[1]
+    return tuple(squares)
+
+
+def _jumps(square, offsets):
+    """Return the squares one jump away for each offset that stays on the board."""
+    row, col = divmod(square, 8)
+    return tuple((row + dr) * 8 + col + dc for dr, dc in offsets
+                 if 0 <= row + dr < 8 and 0 <= col + dc < 8)
+
+
+def _mask(squares):
+    bitboard = 0
+    for square in squares:
+        bitboard |= 1 << square
+    return bitboard
+
+
+# Target squares as tuples, for code that walks the board square by square
+KNIGHT_TARGETS = [_jumps(square, KNIGHT_OFFSETS) for square in range(64)]
+KING_TARGETS = [_jumps(square, KING_OFFSETS) for square in range(64)]
+# RAYS[square][direction] follows the order of QUEEN_DIRECTIONS
+RAYS = [tuple(_ray(square, direction) for direction in QUEEN_DIRECTIONS) for square in range(64)]
+BISHOP_RAYS = [rays[:4] for rays in RAYS]
+ROOK_RAYS = [rays[4:] for rays in RAYS]
+
+# Attack bitboards for the leaping pieces
+KNIGHT_ATTACKS = [_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS = [_mask(targets) for targets in KING_TARGETS]
+# PAWN_ATTACKS[0] for white pawns (moving towards row 0), PAWN_ATTACKS[1] for black
+PAWN_ATTACKS = [[_mask(_jumps(square, [(-1, -1), (-1, 1)])) for square in range(64)],
+                [_mask(_jumps(square, [(1, -1), (1, 1)])) for square in range(64)]]
+
+
+def _between(square):
+    """Return the squares strictly between square and every square on a common line."""
+    between = [()] * 64
+    for ray in RAYS[square]:
+        for i, target in enumerate(ray):
+            between[target] = ray[:i]
+    return between
+
+
+# BETWEEN_SQUARES[a][b]: squares strictly between two squares on a common line,
+# BETWEEN[a][b] the same squares as a bitboard (empty if the squares are not aligned)
+BETWEEN_SQUARES = [_between(square) for square in range(64)]
+BETWEEN = [[_mask(squares) for squares in row] for row in BETWEEN_SQUARES]
+
+
+def _line_table(square, directions):
+    """
+    Build the lookup table for one line through square.
+
+    Returns:
+        tuple: (mask, table) where mask holds the squares whose occupancy matters
+            (the line without its end points) and table maps every subset of mask
+            to the attacked squares along the line.
+    """
+    rays = [_ray(square, direction) for direction in directions]
+    # The last square of a ray is attacked whether it is occupied or not
+    mask = _mask(s for ray in rays for s in ray[:-1])
+    table = {}
+    blockers = 0
+    while True:
+        attacks = 0
+        for ray in rays:
+            for target in ray:
+                attacks |= 1 << target
+                if blockers >> target & 1:
+                    break
+        table[blockers] = attacks
+        # Enumerate all subsets of mask (carry-rippler trick)
+        blockers = (blockers - mask) & mask
+        if not blockers:
+            return mask, table
+
+
+_RANKS = [_line_table(square, [(0, 1), (0, -1)]) for square in range(64)]
+_FILES = [_line_table(square, [(1, 0), (-1, 0)]) for square in range(64)]
+_DIAGONALS = [_line_table(square, [(1, 1), (-1, -1)]) for square in range(64)]
+_ANTI_DIAGONALS = [_line_table(square, [(1, -1), (-1, 1)]) for square in range(64)]
+RANK_MASK = [mask for mask, _ in _RANKS]
+RANK_TABLE = [table for _, table in _RANKS]
+FILE_MASK = [mask for mask, _ in _FILES]
+FILE_TABLE = [table for _, table in _FILES]
+DIAGONAL_MASK = [mask for mask, _ in _DIAGONALS]
+DIAGONAL_TABLE = [table for _, table in _DIAGONALS]
+ANTI_DIAGONAL_MASK = [mask for mask, _ in _ANTI_DIAGONALS]
+ANTI_DIAGONAL_TABLE = [table for _, table in _ANTI_DIAGONALS]
+# Attacks on an empty board
+ROOK_ATTACKS = [RANK_TABLE[square][0] | FILE_TABLE[square][0] for square in range(64)]
+BISHOP_ATTACKS = [DIAGONAL_TABLE[square][0] | ANTI_DIAGONAL_TABLE[square][0] for square in range(64)]
+QUEEN_ATTACKS = [ROOK_ATTACKS[square] | BISHOP_ATTACKS[square] for square in range(64)]
+
+
+def rook_attacks(square, occupied):
+    """Return the squares a rook on square attacks with the given blockers."""
+    return (RANK_TABLE[square][occupied & RANK_MASK[square]] |
+            FILE_TABLE[square][occupied & FILE_MASK[square]])
+
+
+def bishop_attacks(square, occupied):
+    """Return the squares a bishop on square attacks with the given blockers."""
+    return (DIAGONAL_TABLE[square][occupied & DIAGONAL_MASK[square]] |
+            ANTI_DIAGONAL_TABLE[square][occupied & ANTI_DIAGONAL_MASK[square]])
+
+
+def queen_attacks(square, occupied):
+    """Return the squares a queen on square attacks with the given blockers."""
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
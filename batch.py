@@ -0,0 +1,131 @@
+"""Vectorized evaluation of many positions at once.
+Positions are packed into a NumPy array of shape (N, 64) and dtype uint8 holding
+piece_index + 1 per square and 0 for empty squares, the same codes as
+BitboardChessboard.squares. evaluate_batch() scores all of them with table lookups
+and sums, giving the same numbers as Chessboard.evaluate_board() for each board.
+
+NumPy is optional: the rest of the package runs without it, and the functions
+here that return or take arrays raise ImportError when it is missing.
+
+Example:
+    positions = positions_from_fens(line.split(";")[0] for line in open("positions.epd"))
+    scores = evaluate_batch(positions, tapered=True)
+"""
+from chessboard import Chessboard, parse_fen_placement
+from evaluation import ENDGAME_TABLES, MAX_PHASE, MIDDLEGAME_TABLES, PHASE_WEIGHTS
+
+try:
+    import numpy as np
+except ImportError:  # Only this module needs NumPy
+    np = None
+
+# Rows evaluated per step, bounds the temporary arrays to a few megabytes
+CHUNK_SIZE = 65536
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs NumPy, install it with `pip install numpy`")
+
+
+def fen_to_codes(fen):
+    """
+    Convert the piece placement of a FEN string to 64 square codes without building a board.
+
+    Args:
+        fen (str): A FEN or EPD line; only the first field is read.
+
+    Returns:
+        bytes: piece_index + 1 for each square from a8 to h1, 0 for empty squares.
+
+    Raises:
+        ValueError: If the placement does not describe 64 squares.
+    """
+    return parse_fen_placement(fen.split(None, 1)[0])
+
+
+def board_to_codes(board):
+    """
+    Return the 64 square codes of a board, see Chessboard.square_codes.
+    """
+    return board.square_codes()
+
+
+def _pack(rows):
+    _require_numpy()
+    buffer = b"".join(rows)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 64).copy()
+
+
+def positions_from_boards(boards):
+    """
+    Pack boards into an (N, 64) uint8 array.
+
+    Args:
+        boards (iterable): Chessboard instances.
+
+    Returns:
+        numpy.ndarray: The square codes, one row per board.
+    """
+    return _pack(board_to_codes(board) for board in boards)
+
+
+def positions_from_fens(fens):
+    """
+    Pack FEN strings into an (N, 64) uint8 array, without creating boards.
+
+    Args:
+        fens (iterable): FEN or EPD strings.
+
+    Returns:
+        numpy.ndarray: The square codes, one row per FEN.
+    """
+    return _pack(fen_to_codes(fen) for fen in fens)
+
+
+def _code_tables():
+    """Lookup tables indexed by square code: material, middlegame, endgame and phase."""
+    values = Chessboard.index_values
+    material = np.array([0] + values, dtype=np.int32)
+    middlegame = np.array([[0] * 64] + MIDDLEGAME_TABLES, dtype=np.int32)
+    endgame = np.array([[0] * 64] + ENDGAME_TABLES, dtype=np.int32)
+    phase = np.array([0] + PHASE_WEIGHTS, dtype=np.int32)
+    return material, middlegame, endgame, phase
+
+
+def evaluate_batch(positions, positional=False, tapered=False):
+    """
+    Evaluate many positions from white's point of view, see Chessboard.evaluate_board.
+
+    Args:
+        positions (numpy.ndarray): Square codes of shape (N, 64), e.g. from positions_from_fens.
+        positional (bool): Add the piece-square tables and return centipawns.
+        tapered (bool): Blend the middlegame and endgame tables by game phase; implies positional.
+
+    Returns:
+        numpy.ndarray: N int32 scores, in pawns for material only, otherwise in centipawns.
+
+    Raises:
+        ValueError: If positions does not have shape (N, 64).
+    """
+    _require_numpy()
+    positions = np.asarray(positions, dtype=np.uint8)
+    if positions.ndim != 2 or positions.shape[1] != 64:
+        raise ValueError(f"positions must have shape (N, 64), not {positions.shape}")
+    material, middlegame, endgame, phase = _code_tables()
+    squares = np.arange(64)
+    scores = np.empty(len(positions), dtype=np.int32)
+    for start in range(0, len(positions), CHUNK_SIZE):
+        chunk = positions[start:start + CHUNK_SIZE]
+        score = material[chunk].sum(axis=1, dtype=np.int32)
+        if positional or tapered:
+            score *= 100
+            middlegame_score = middlegame[chunk, squares].sum(axis=1, dtype=np.int32)
+            if tapered:
+                endgame_score = endgame[chunk, squares].sum(axis=1, dtype=np.int32)
+                game_phase = np.minimum(phase[chunk].sum(axis=1, dtype=np.int32), MAX_PHASE)
+                score += (middlegame_score * game_phase + endgame_score * (MAX_PHASE - game_phase)) // MAX_PHASE
+            else:
+                score += middlegame_score
+        scores[start:start + len(chunk)] = score
+    return scores
@@ -0,0 +1,180 @@
+"""Micro benchmarks for the chessboard backends.
+Run with `python benchmark.py` to print how many moves per second each backend generates
+and its speedup over the move generation the project started from (BaselineChessboard),
+`python benchmark.py parallel` for the speedup of the parallel search per worker count and
+`python benchmark.py ordering` for the nodes the move ordering saves at a fixed depth.
+"""
+import os
+import sys
+import time
+from chessboard import Chessboard, Color, PieceType
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+from parallel import ParallelSearcher
+from search import Searcher
+
+# Positions for the search benchmarks: the start, Kiwipete and a middlegame
+BENCHMARK_FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8",
+]
+
+
+class BaselineChessboard(Chessboard):
+    """
+    The yardstick for compare_backends: get_possible_moves as the project started out,
+    stepping along every direction and asking is_valid() about each square. is_valid()
+    itself is today's, which is faster than the original, so the speedups measured
+    against this class are on the low side.
+    """
+    directions = {
+        PieceType.NIGHT: [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)],
+        PieceType.BISHOP: [(1, 1), (1, -1), (-1, 1), (-1, -1)],
+        PieceType.ROOK: [(1, 0), (-1, 0), (0, 1), (0, -1)],
+        PieceType.QUEEN: [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)],
+        PieceType.KING: [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)],
+    }
+
+    def get_possible_moves(self, start_row, start_col):
+        possible_moves = []
+        piece = self.get_piece(start_row, start_col)
+        if piece.piece_type == PieceType.EMPTY:
+            return possible_moves
+        if piece.piece_type == PieceType.PAWN:
+            directions = [(-2, 0), (-1, 0), (-1, -1), (-1, 1)] if piece.color == Color.WHITE else \
+                [(2, 0), (1, 0), (1, -1), (1, 1)]
+        else:
+            directions = self.directions[piece.piece_type]
+        for direction in directions:
+            end_row, end_col = start_row + direction[0], start_col + direction[1]
+            while 0 <= end_row < 8 and 0 <= end_col < 8:
+                if self.is_valid(start_row, start_col, end_row, end_col):
+                    possible_moves.append((piece.piece_type.name, start_row, start_col, end_row, end_col))
+                # Stop further movement for non-sliding pieces
+                if piece.piece_type in {PieceType.PAWN, PieceType.NIGHT, PieceType.KING}:
+                    break
+                # Stop if the path is blocked
+                if self.get_piece(end_row, end_col).piece_type != PieceType.EMPTY:
+                    break
+                end_row += direction[0]
+                end_col += direction[1]
+        return possible_moves
+
+
+def moves_per_second(board, seconds=1.0, whole_side=False):
+    """
+    Generate the pseudo-legal moves of the position repeatedly and count them.
+
+    Args:
+        board (Chessboard): The board to benchmark.
+        seconds (float): Minimum time to run.
+        whole_side (bool): Call generate_pseudo_legal_moves() for the side to move instead
+            of get_possible_moves() for every square.
+
+    Returns:
+        float: Moves generated per second.
+    """
+    moves = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    if whole_side:
+        generate = board.generate_pseudo_legal_moves
+        while elapsed < seconds:
+            for _ in range(100):
+                moves += len(generate())
+            elapsed = time.perf_counter() - start
+        return moves / elapsed
+    get_possible_moves = board.get_possible_moves
+    squares = [(row, col) for row in range(8) for col in range(8)]
+    while elapsed < seconds:
+        for row, col in squares:
+            moves += len(get_possible_moves(row, col))
+        elapsed = time.perf_counter() - start
+    return moves / elapsed
+
+
+def compare_backends(seconds=1.0):
+    """
+    Print moves per second for every backend, square by square with get_possible_moves()
+    and for the whole side with generate_pseudo_legal_moves(), and the speedup of each
+    over BaselineChessboard.get_possible_moves().
+
+    Args:
+        seconds (float): Minimum time to run each measurement.
+
+    Returns:
+        dict: Moves per second by (backend class name, 'squares' or 'side').
+    """
+    results = {}
+    for backend in (BaselineChessboard, Chessboard, BitboardChessboard, CompactChessboard):
+        board = backend()
+        # Open the position a little so that sliding pieces have moves
+        for move in [(6, 4, 4, 4), (1, 4, 3, 4), (7, 6, 5, 5), (0, 1, 2, 2), (7, 5, 4, 2)]:
+            board.move_piece(*move)
+        for method in ("squares", "side"):
+            if backend is BaselineChessboard and method == "side":
+                continue
+            rate = results[backend.__name__, method] = moves_per_second(board, seconds, method == "side")
+            print(f"{backend.__name__:20} {method:8} {rate:12,.0f} moves/s "
+                  f"speedup {rate / results['BaselineChessboard', 'squares']:5.1f}x")
+    return results
+
+
+def parallel_scaling(fen="r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", depth=4,
+                     worker_counts=None):
+    """
+    Search one position to a fixed depth with growing worker counts and print the speedup.
+
+    Args:
+        fen (str): The position to search.
+        depth (int): The search depth.
+        worker_counts (list): The worker counts to try, powers of two up to the CPU count if None.
+
+    Returns:
+        dict: Seconds taken for each worker count.
+    """
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [1 << power for power in range(cpus.bit_length()) if 1 << power <= cpus]
+    results = {}
+    for workers in worker_counts:
+        with ParallelSearcher(workers) as searcher:
+            result = searcher.search(BitboardChessboard.from_fen(fen), max_depth=depth)
+        results[workers] = result.seconds
+        print(f"{workers:3} workers {result.seconds:8.2f} s {result.nodes:10} nodes "
+              f"speedup {results[worker_counts[0]] / result.seconds:5.2f}x")
+    return results
+
+
+def ordering_benchmark(fens=None, depth=4):
+    """
+    Search positions to a fixed depth with and without killer, history and MVV-LVA
+    ordering and print the nodes and the effective branching factor, nodes ** (1 / depth).
+
+    Args:
+        fens (list): The positions, BENCHMARK_FENS if None.
+        depth (int): The search depth.
+
+    Returns:
+        dict: Total nodes with ordering (True) and with the table move only (False).
+    """
+    totals = {}
+    for ordering in (False, True):
+        totals[ordering] = 0
+        for fen in fens or BENCHMARK_FENS:
+            result = Searcher(ordering=ordering).search(BitboardChessboard.from_fen(fen), max_depth=depth)
+            totals[ordering] += result.nodes
+            print(f"{'ordered' if ordering else 'table move only':16} {result.nodes:10} nodes "
+                  f"EBF {result.nodes ** (1 / depth):5.2f} {result.seconds:7.2f} s  {fen}")
+    print(f"Node reduction: {1 - totals[True] / totals[False]:.0%}")
+    return totals
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["parallel"]:
+        parallel_scaling()
+    elif sys.argv[1:] == ["ordering"]:
+        ordering_benchmark()
+    else:
+        compare_backends()
@@ -0,0 +1,335 @@
+"""Endgame bitbases for king and pawn, rook or queen against king.
+Each bitbase stores one bit per position: does the stronger side win? The stronger
+side is taken to be white; positions with a black pawn, rook or queen are mirrored
+before the lookup. A position is indexed by white king << 12 | black king << 6 |
+piece square, and a file holds two bit sets of 2**18 bits, white to move first and
+black to move second, 64 KiB in total.
+
+The bits are found by retrograde analysis: starting from the checkmates (and, for
+KPK, the winning promotions into KQK and KRK) wins are propagated backwards through
+un-moves. A position with white to move wins if one move reaches a won position; a
+position with black to move is won once all of its moves are. Everything never
+reached is a draw, since the weaker side cannot win. The analysis of each table is
+split by white king square across a process pool, see build_table().
+
+Example:
+    build_bitbases("bitbases")
+    with Bitbases("bitbases") as bitbases:
+        bitbases.probe(Chessboard.from_fen("4k3/8/4K3/4P3/8/8/8/8 b - - 0 1"))  # LOSS
+"""
+import mmap
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from chessboard import Color
+from attacks import KING_ATTACKS, PAWN_ATTACKS, queen_attacks, rook_attacks
+
+# Results from the side to move's point of view
+WIN, DRAW, LOSS = 1, 0, -1
+# Piece kinds by offset inside a color's six square codes, see piece_index
+PAWN, ROOK, NIGHT, BISHOP, QUEEN = range(5)
+TABLES = {"KPK": PAWN, "KRK": ROOK, "KQK": QUEEN}
+POSITIONS = 1 << 18
+SECTION_BYTES = POSITIONS // 8
+
+
+def _attacks(kind, square, occupied):
+    """Squares attacked by the white piece of the given kind."""
+    if kind == PAWN:
+        return PAWN_ATTACKS[0][square]
+    if kind == ROOK:
+        return rook_attacks(square, occupied)
+    return queen_attacks(square, occupied)
+
+
+def _squares(bitboard):
+    while bitboard:
+        low = bitboard & -bitboard
+        yield low.bit_length() - 1
+        bitboard ^= low
+
+
+def _pack(bits):
+    packed = bytearray(len(bits) // 8)
+    for index in (index for index, bit in enumerate(bits) if bit):
+        packed[index >> 3] |= 1 << (index & 7)
+    return bytes(packed)
+
+
+def _bit(packed, index):
+    return packed[index >> 3] >> (index & 7) & 1
+
+
+def _solve_share(kind, low, high, promotions=None, state=None, wins=()):
+    """
+    Worker entry point: solve the positions with the white king on squares low to high - 1
+    as far as they can be without the other shares.
+
+    On the first call (state None) the positions are set up and the wins that need no
+    analysis are found: checkmates and, for KPK, winning promotions. Then wins are
+    propagated backwards through un-moves until no more are found. Un-moving the white
+    king leaves the share, so each black-to-move win of the share that has origins with the
+    white king elsewhere is exported; the owners of those squares receive it as wins in a
+    later call.
+
+    Args:
+        kind (int): The piece, PAWN, ROOK or QUEEN.
+        low (int): The first white king square of the share.
+        high (int): One beyond the last.
+        promotions (list): For KPK, the packed black-to-move bits of KQK and KRK.
+        state (tuple): The share's arrays returned by the previous call, None on the first.
+        wins (list): Black-to-move wins exported by other shares since the previous call.
+
+    Returns:
+        tuple: (state, exported); state is (valid_white, valid_black, win_white, win_black,
+        remaining) indexed by position - (low << 12), exported the position indexes to pass on.
+    """
+    base = low << 12
+    queue = [(Color.BLACK, index) for index in wins]
+    if state is None:
+        size = (high - low) << 12
+        state = (bytearray(size), bytearray(size), bytearray(size), bytearray(size), bytearray(size))
+        valid_white, valid_black, win_white, win_black, remaining = state  # remaining: black moves not yet known to lose
+        for white_king in range(low, high):
+            for black_king in range(64):
+                if black_king == white_king or KING_ATTACKS[white_king] >> black_king & 1:
+                    continue
+                for square in range(64):
+                    if square in (white_king, black_king) or (kind == PAWN and not 8 <= square < 56):
+                        continue
+                    index = white_king << 12 | black_king << 6 | square
+                    local = index - base
+                    occupied = 1 << white_king | 1 << black_king | 1 << square
+                    check = _attacks(kind, square, occupied) >> black_king & 1
+                    valid_black[local] = 1
+                    if not check:
+                        valid_white[local] = 1
+                        if promotions and square < 16 and not occupied >> (square - 8) & 1:
+                            promoted = white_king << 12 | black_king << 6 | (square - 8)
+                            if any(_bit(table, promoted) for table in promotions):
+                                win_white[local] = 1
+                                queue.append((Color.WHITE, index))
+                    # The black king must not stay on a line the piece attacks through it
+                    guarded = KING_ATTACKS[white_king] | _attacks(kind, square, occupied ^ 1 << black_king)
+                    moves = (KING_ATTACKS[black_king] & ~guarded).bit_count()
+                    remaining[local] = moves
+                    if not moves and check:
+                        win_black[local] = 1
+                        queue.append((Color.BLACK, index))
+    valid_white, valid_black, win_white, win_black, remaining = state
+    share = sum(1 << white_king for white_king in range(low, high))
+    exported = []
+
+    while queue:
+        side, index = queue.pop()
+        white_king, black_king, square = index >> 12, index >> 6 & 63, index & 63
+        occupied = 1 << white_king | 1 << black_king | 1 << square
+        if side == Color.BLACK:
+            # Won with black to move: every white move into it wins
+            kings = KING_ATTACKS[white_king] & ~occupied & ~KING_ATTACKS[black_king]
+            origins = [other << 12 | black_king << 6 | square for other in _squares(kings & share)]
+            if share >> white_king & 1:
+                if kings & ~share:
+                    exported.append(index)
+                if kind == PAWN:
+                    if square < 48 and not occupied >> (square + 8) & 1:
+                        origins.append(white_king << 12 | black_king << 6 | (square + 8))
+                        if square >> 3 == 4 and not occupied >> (square + 16) & 1:
+                            origins.append(white_king << 12 | black_king << 6 | (square + 16))
+                else:
+                    origins.extend(white_king << 12 | black_king << 6 | other
+                                   for other in _squares(_attacks(kind, square, occupied) & ~occupied))
+            for origin in origins:
+                local = origin - base
+                if valid_white[local] and not win_white[local]:
+                    win_white[local] = 1
+                    queue.append((Color.WHITE, origin))
+        else:
+            # Won with white to move: one more black move is known to lose
+            for other in _squares(KING_ATTACKS[black_king] & ~occupied & ~KING_ATTACKS[white_king]):
+                origin = white_king << 12 | other << 6 | square
+                local = origin - base
+                if valid_black[local] and not win_black[local]:
+                    remaining[local] -= 1
+                    if not remaining[local]:
+                        win_black[local] = 1
+                        queue.append((Color.BLACK, origin))
+    return state, exported
+
+
+def build_table(name, promotions=None, pool=None, shares=1):
+    """
+    Solve one bitbase by retrograde analysis, split into shares by white king square.
+    The shares are solved in rounds, in parallel when a pool is given: after each round
+    the wins one share exported are passed to the shares whose positions they decide,
+    until a round exports nothing.
+
+    Args:
+        name (str): 'KPK', 'KRK' or 'KQK'.
+        promotions (list): For KPK, the packed black-to-move bits of KQK and KRK.
+        pool (concurrent.futures.Executor): Runs the shares, None to solve them in this process.
+        shares (int): The number of shares, at most 64.
+
+    Returns:
+        bytes: The file contents: white-to-move bits followed by black-to-move bits.
+    """
+    kind = TABLES[name]
+    bounds = [(64 * share // shares, 64 * (share + 1) // shares) for share in range(shares)]
+    owner = [next(number for number, (low, high) in enumerate(bounds) if low <= square < high) for square in range(64)]
+    run = pool.map if pool is not None else map
+    states, inboxes = [None] * shares, [[] for _ in range(shares)]
+    first = True
+    while first or any(inboxes):
+        results = list(run(_solve_share, [kind] * shares, [low for low, _ in bounds], [high for _, high in bounds],
+                           [promotions] * shares, states, inboxes))
+        states, inboxes, first = [state for state, _ in results], [[] for _ in range(shares)], False
+        for number, (_, exported) in enumerate(results):
+            for index in exported:
+                # To every other share owning a square the white king can have come from
+                targets = {owner[square] for square in _squares(KING_ATTACKS[index >> 12])} - {number}
+                for target in targets:
+                    inboxes[target].append(index)
+    win_white = b"".join(state[2] for state in states)
+    win_black = b"".join(state[3] for state in states)
+    return _pack(win_white) + _pack(win_black)
+
+
+def _table_path(directory, name):
+    return os.path.join(directory, name.lower() + ".bb")
+
+
+def build_bitbases(directory, workers=None):
+    """
+    Build KQK, KRK and KPK into directory, each split across a process pool (see
+    build_table). KPK needs the other two for its promotions and is built last.
+
+    Args:
+        directory (str): Where the .bb files are written.
+        workers (int): Worker processes, the number of CPUs if None.
+
+    Returns:
+        dict: Seconds taken for each table.
+    """
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    seconds, contents = {}, {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name in ("KQK", "KRK", "KPK"):
+            start = time.perf_counter()
+            promotions = [contents[other][SECTION_BYTES:] for other in ("KQK", "KRK")] if name == "KPK" else None
+            contents[name] = build_table(name, promotions, pool, workers)
+            seconds[name] = time.perf_counter() - start
+    for name, data in contents.items():
+        with open(_table_path(directory, name), "wb") as file:
+            file.write(data)
+    return seconds
+
+
+class Bitbases:
+    """
+    Memory-mapped bitbases. Tables missing from the directory are skipped.
+    Attributes:
+        tables (dict): Mapped file contents by table name.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): The directory written by build_bitbases.
+        """
+        self.tables = {}
+        self._files = []
+        for name in TABLES:
+            path = _table_path(directory, name)
+            if os.path.exists(path):
+                file = open(path, "rb")
+                self._files.append(file)
+                self.tables[name] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap and close the files."""
+        for table in self.tables.values():
+            table.close()
+        for file in self._files:
+            file.close()
+        self.tables, self._files = {}, []
+
+    def probe(self, board):
+        """
+        Look up a position with two kings and one other piece.
+
+        Args:
+            board (Chessboard): The position.
+
+        Returns:
+            int: WIN, DRAW or LOSS for the side to move, or None if no table covers the position.
+            Positions with a lone knight or bishop are draws.
+        """
+        codes = board.square_codes()
+        if codes.count(0) != 61:
+            return None
+        kings, piece = {}, None
+        for square, code in enumerate(codes):
+            if code == 6 or code == 12:
+                kings[code] = square
+            elif code:
+                piece = square, code - 1
+        if piece is None or len(kings) != 2:
+            return None
+        square, index = piece
+        kind, strong = index % 6, index // 6
+        if kind in (NIGHT, BISHOP):
+            return DRAW
+        table = self.tables.get(next(name for name, table_kind in TABLES.items() if table_kind == kind))
+        if table is None:
+            return None
+        strong_to_move = board.side_to_move == (Color.WHITE if strong == 0 else Color.BLACK)
+        if strong == 0:
+            position = kings[6] << 12 | kings[12] << 6 | square
+        else:
+            # Mirror the board so that the stronger side is white
+            position = (kings[12] ^ 56) << 12 | (kings[6] ^ 56) << 6 | (square ^ 56)
+        if not _bit(table, position + (0 if strong_to_move else POSITIONS)):
+            return DRAW
+        return WIN if strong_to_move else LOSS
+
+
+def benchmark_lookups(bitbases, count=100000, seed=0):
+    """
+    Measure the lookup latency on random KQK, KRK and KPK positions.
+
+    Returns:
+        float: Microseconds per probe, including square_codes() on the board.
+    """
+    from bitboard import BitboardChessboard
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < 1000:
+        squares = rng.sample(range(8, 56), 3)
+        letter = rng.choice("PRQprq")
+        fen = "".join(letter if square == squares[2] else "K" if square == squares[0] else
+                      "k" if square == squares[1] else "1" for square in range(64))
+        placement = "/".join(fen[row:row + 8] for row in range(0, 64, 8))
+        boards.append(BitboardChessboard.from_fen(f"{placement} {rng.choice('wb')} - - 0 1"))
+    start = time.perf_counter()
+    for index in range(count):
+        bitbases.probe(boards[index % len(boards)])
+    return (time.perf_counter() - start) / count * 1e6
+
+
+if __name__ == "__main__":
+    # python bitbase.py [directory]: build the bitbases and report time, size and lookup latency
+    target = sys.argv[1] if len(sys.argv) > 1 else "bitbases"
+    for table_name, table_seconds in build_bitbases(target).items():
+        print(f"{table_name} built in {table_seconds:.1f} s, "
+              f"{os.path.getsize(_table_path(target, table_name)) // 1024} KiB")
+    with Bitbases(target) as loaded:
+        print(f"{benchmark_lookups(loaded):.2f} us per lookup")
@@ -0,0 +1,391 @@
+"""Bitboard backend for the chessboard.
+The position is kept as twelve 64-bit integers, one per piece type and color,
+plus occupancy masks for each color and for the whole board. Square (row, col)
+maps to bit row * 8 + col, so bit 0 is a8 and bit 63 is h1, matching the
+row/column layout used by Chessboard.
+"""
+import copy
+from chessboard import (CASTLING_MASK, CASTLING_MOVES, MOVE_TUPLES, PROMOTION_TYPES, Chessboard, Color, Piece,
+                        PieceType, piece_index)
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+from evaluation import ENDGAME_TABLES, MIDDLEGAME_TABLES, PHASE_WEIGHTS
+from attacks import BETWEEN, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, bishop_attacks, rook_attacks
+from instrumentation import instrumented
+
+# Masks used to keep shifted bitboards inside 64 bits
+FULL = (1 << 64) - 1
+ROW_1 = 0xFF << 8  # Black pawns start here
+ROW_6 = 0xFF << 48  # White pawns start here
+PROMOTION_ROWS = 0xFF | 0xFF << 56
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+
+# Piece types in bitboard order, white first, then black
+PIECE_TYPES = [piece_type for piece_type in PieceType if piece_type != PieceType.EMPTY]
+# Offsets of each piece type inside a color's six bitboards (piece_index % 6)
+PAWN, ROOK, NIGHT, BISHOP, QUEEN, KING = range(6)
+PROMOTION_VALUES = [piece_type.value for piece_type in PROMOTION_TYPES]
+
+
+class BitboardChessboard(Chessboard):
+    """
+    A Chessboard whose position is stored in bitboards instead of Piece objects.
+    Every query is answered with bit operations; Piece objects are only created
+    when get_piece() or the board property asks for them.
+    Attributes:
+        bitboards (list): Twelve integers, indexed by piece_index(piece_type, color).
+        color_occupancy (list): Occupied squares of white (index 0) and black (index 1).
+        occupied (int): All occupied squares.
+        squares (bytearray): piece_index + 1 for every square, 0 for empty squares.
+    Example:
+        chessboard = BitboardChessboard()
+        moves = chessboard.get_possible_moves(7, 1)  # Knight moves from b1
+    """
+
+    def __init__(self):
+        self.bitboards = [0] * 12
+        self.color_occupancy = [0, 0]
+        self.occupied = 0
+        self.squares = bytearray(64)
+        super().__init__()
+
+    # The grid of Piece objects is built on demand from the bitboards
+    @property
+    def board(self):
+        """A fresh 8x8 grid of Piece objects; assigning a grid loads it."""
+        return [[self.get_piece(row, col) for col in range(8)] for row in range(8)]
+
+    @board.setter
+    def board(self, grid):
+        self._load_grid(grid)
+
+    def _load_square_codes(self, codes):
+        # Set the bits directly; the evaluation totals are recomputed by _reset_state
+        bitboards = [0] * 12
+        for square, code in enumerate(codes):
+            if code:
+                bitboards[code - 1] |= 1 << square
+        self.bitboards = bitboards
+        self.color_occupancy = [bitboards[0] | bitboards[1] | bitboards[2] | bitboards[3] | bitboards[4] | bitboards[5],
+                                bitboards[6] | bitboards[7] | bitboards[8] | bitboards[9] | bitboards[10] | bitboards[11]]
+        self.occupied = self.color_occupancy[0] | self.color_occupancy[1]
+        self.squares = bytearray(codes)
+
+    def square_codes(self):
+        return bytes(self.squares)
+
+    def _clear(self):
+        self.bitboards = [0] * 12
+        self.color_occupancy = [0, 0]
+        self.occupied = 0
+        self.squares = bytearray(64)
+        self.material = self.psq_middlegame = self.psq_endgame = self.phase = 0
+
+    # Every piece enters and leaves the board here, so the evaluation totals follow along
+    def _put(self, square, index):
+        bit = 1 << square
+        self.bitboards[index] |= bit
+        self.color_occupancy[index // 6] |= bit
+        self.occupied |= bit
+        self.squares[square] = index + 1
+        self.material += self.index_values[index]
+        self.psq_middlegame += MIDDLEGAME_TABLES[index][square]
+        self.psq_endgame += ENDGAME_TABLES[index][square]
+        self.phase += PHASE_WEIGHTS[index]
+
+    def _remove(self, square):
+        index = self.squares[square] - 1
+        bit = 1 << square
+        self.bitboards[index] ^= bit
+        self.color_occupancy[index // 6] ^= bit
+        self.occupied ^= bit
+        self.squares[square] = 0
+        self.material -= self.index_values[index]
+        self.psq_middlegame -= MIDDLEGAME_TABLES[index][square]
+        self.psq_endgame -= ENDGAME_TABLES[index][square]
+        self.phase -= PHASE_WEIGHTS[index]
+
+    def initialize_board(self):
+        self._clear()
+        back_rank = [PieceType.ROOK, PieceType.NIGHT, PieceType.BISHOP, PieceType.QUEEN,
+                     PieceType.KING, PieceType.BISHOP, PieceType.NIGHT, PieceType.ROOK]
+        for color in (Color.WHITE, Color.BLACK):
+            fl = 7 if color == Color.WHITE else 0
+            pl = 6 if color == Color.WHITE else 1
+            for col, piece_type in enumerate(back_rank):
+                self._put(fl * 8 + col, piece_index(piece_type, color))
+                self._put(pl * 8 + col, piece_index(PieceType.PAWN, color))
+        self._reset_state()
+
+    def get_piece(self, row, col):
+        code = self.squares[row * 8 + col]
+        if not code:
+            return Piece(PieceType.EMPTY, Color.NONE, row, col)
+        return Piece(PIECE_TYPES[(code - 1) % 6], Color.WHITE if code <= 6 else Color.BLACK, row, col)
+
+    def _targets(self, square):
+        """
+        Return the bitboard of squares the piece on square may move to,
+        following the same rules as Chessboard.is_valid.
+        """
+        index = self.squares[square] - 1
+        if index < 0:
+            return 0
+        color, piece_type = divmod(index, 6)
+        occupied = self.occupied
+        if piece_type == NIGHT:
+            return KNIGHT_ATTACKS[square] & ~self.color_occupancy[color]
+        if piece_type == PAWN:
+            empty = FULL ^ occupied
+            if color == 0:  # White pawns move towards row 0
+                single = (1 << square >> 8) & empty
+                double = ((single & (ROW_6 >> 8)) >> 8) & empty
+            else:
+                single = (1 << square << 8) & empty
+                double = ((single & (ROW_1 << 8)) << 8) & empty
+            captures = self.color_occupancy[1 - color]
+            # Only the opponent's last double push can be captured en passant
+            en_passant = self.en_passant
+            if en_passant is not None and en_passant >> 3 == (2 if color == 0 else 5):
+                captures |= 1 << en_passant
+            return single | double | (PAWN_ATTACKS[color][square] & captures)
+        if piece_type == KING:
+            attacks = KING_ATTACKS[square]
+            if self.castling_rights:
+                attacks |= self._castling_targets(square, color)
+        elif piece_type == ROOK:
+            attacks = rook_attacks(square, occupied)
+        elif piece_type == BISHOP:
+            attacks = bishop_attacks(square, occupied)
+        else:
+            attacks = rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+        return attacks & ~self.color_occupancy[color]
+
+    def _castling_targets(self, square, color):
+        """
+        Return the squares the king on square may castle to, checking rights,
+        rook, empty squares in between and attacked squares.
+        """
+        if not self.castling_rights or square != (60 if color == 0 else 4):
+            return 0
+        targets = 0
+        rooks = self.bitboards[color * 6 + ROOK]
+        for end in (square + 2, square - 2):
+            right, rook_start, _ = CASTLING_MOVES[end]
+            if self.castling_rights & right and rooks >> rook_start & 1 \
+                    and not BETWEEN[square][rook_start] & self.occupied \
+                    and not any(self._attackers(passed, 1 - color, self.occupied)
+                                for passed in (square, (square + end) // 2, end)):
+                targets |= 1 << end
+        return targets
+
+    def _attackers(self, square, by, occupied):
+        """
+        Return the pieces of color index by (0 white, 1 black) that attack square,
+        with sliding attacks computed against the given occupancy.
+        """
+        bitboards = self.bitboards
+        base = by * 6
+        return ((KNIGHT_ATTACKS[square] & bitboards[base + NIGHT]) |
+                (KING_ATTACKS[square] & bitboards[base + KING]) |
+                (PAWN_ATTACKS[1 - by][square] & bitboards[base + PAWN]) |
+                (bishop_attacks(square, occupied) & (bitboards[base + BISHOP] | bitboards[base + QUEEN])) |
+                (rook_attacks(square, occupied) & (bitboards[base + ROOK] | bitboards[base + QUEEN])))
+
+    def _is_attacked(self, square, by_color):
+        return bool(self._attackers(square, by_color.value - 1, self.occupied))
+
+    def _king_square(self, color):
+        king = self.bitboards[(color.value - 1) * 6 + KING]
+        return king.bit_length() - 1 if king else None
+
+    def _bitboards(self):
+        return self.bitboards, self.occupied
+
+    @instrumented()
+    def is_valid(self, start_row, start_col, end_row, end_col):
+        if not (0 <= start_row < 8 and 0 <= start_col < 8 and 0 <= end_row < 8 and 0 <= end_col < 8):
+            return False
+        return bool(self._targets(start_row * 8 + start_col) >> (end_row * 8 + end_col) & 1)
+
+    @instrumented()
+    def get_possible_moves(self, start_row, start_col):
+        """
+        Get all possible moves for a piece at a given position.
+        Moves are listed in square order (a8 to h1) rather than direction order.
+
+        Returns:
+            list: A list of tuples (piece_type.name, start_row, start_col, end_row, end_col)
+        """
+        square = start_row * 8 + start_col
+        code = self.squares[square]
+        if not code:
+            return []
+        moves = MOVE_TUPLES[(code - 1) % 6][square]
+        targets = self._targets(square)
+        possible_moves = []
+        while targets:
+            low = targets & -targets
+            possible_moves.append(moves[low.bit_length() - 1])
+            targets ^= low
+        return possible_moves
+
+    def copy(self):
+        board = copy.copy(self)
+        board.bitboards = self.bitboards[:]
+        board.color_occupancy = self.color_occupancy[:]
+        board.squares = bytearray(self.squares)
+        board.undo_stack = self.undo_stack[:]
+        board._attack_cache = {}
+        return board
+
+    def make_move(self, move):
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        squares = self.squares
+        index = squares[start] - 1
+        color, piece_type = index // 6, index % 6
+        captured = squares[end]
+        key = self.zobrist_key
+        self.undo_stack.append((move, captured, self.castling_rights, self.en_passant,
+                                self.halfmove_clock, self.side_to_move, key))
+        self.halfmove_clock += 1
+        if captured:
+            self._remove(end)
+            key ^= PIECE_KEYS[captured - 1][end]
+            self.halfmove_clock = 0
+        self._remove(start)
+        key ^= PIECE_KEYS[index][start]
+        if piece_type == PAWN:
+            self.halfmove_clock = 0
+            if end == self.en_passant and (start & 7) != (end & 7):
+                self._remove((start & 56) | (end & 7))
+                key ^= PIECE_KEYS[(1 - color) * 6 + PAWN][(start & 56) | (end & 7)]
+            if promotion:
+                index = color * 6 + promotion - 1
+        elif piece_type == KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            self._remove(rook_start)
+            self._put(rook_end, color * 6 + ROOK)
+            key ^= PIECE_KEYS[color * 6 + ROOK][rook_start] ^ PIECE_KEYS[color * 6 + ROOK][rook_end]
+        self._put(end, index)
+        key ^= PIECE_KEYS[index][end] ^ CASTLING_KEYS[self.castling_rights]
+        self.castling_rights &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        key ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        self.en_passant = None
+        if piece_type == PAWN and abs(end - start) == 16:
+            self.en_passant = (start + end) // 2
+            key ^= EN_PASSANT_KEYS[end & 7]
+        if color == 1:
+            self.fullmove_number += 1
+        side_to_move = Color.BLACK if color == 0 else Color.WHITE
+        if side_to_move != self.side_to_move:
+            key ^= BLACK_TO_MOVE_KEY
+        self.side_to_move = side_to_move
+        self.zobrist_key = key
+
+    def unmake_move(self):
+        move, captured, castling_rights, en_passant, halfmove_clock, side_to_move, self.zobrist_key = \
+            self.undo_stack.pop()
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        index = self.squares[end] - 1
+        color = index // 6
+        self._remove(end)
+        if promotion:
+            index = color * 6 + PAWN
+        self._put(start, index)
+        if captured:
+            self._put(end, captured - 1)
+        elif index % 6 == PAWN and end == en_passant and (start & 7) != (end & 7):
+            self._put((start & 56) | (end & 7), (1 - color) * 6 + PAWN)
+        elif index % 6 == KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            self._remove(rook_end)
+            self._put(rook_start, color * 6 + ROOK)
+        if color == 1:
+            self.fullmove_number -= 1
+        self.castling_rights, self.en_passant = castling_rights, en_passant
+        self.halfmove_clock, self.side_to_move = halfmove_clock, side_to_move
+        return move
+
+    def _pseudo_moves(self, noisy=None):
+        # Generated from the bitboards of the whole side: the pawns move as one set per
+        # direction, the other pieces look their targets up, with no call per square
+        us = 0 if self.side_to_move == Color.WHITE else 1
+        bitboards = self.bitboards
+        own, them = self.color_occupancy[us], self.color_occupancy[1 - us]
+        occupied = self.occupied
+        empty = FULL ^ occupied
+        moves = []
+        append = moves.append
+        pawns = bitboards[us * 6 + PAWN]
+        if pawns:
+            captures = them
+            # Only the opponent's last double push can be captured en passant
+            if self.en_passant is not None and self.en_passant >> 3 == (2 if us == 0 else 5):
+                captures |= 1 << self.en_passant
+            if us == 0:  # White pawns move towards row 0
+                single = pawns >> 8 & empty
+                double = (single & ROW_6 >> 8) >> 8 & empty
+                left, right = (pawns & ~FILE_A) >> 9 & captures, (pawns & ~FILE_H) >> 7 & captures
+                steps = (8, 16, 9, 7)
+            else:
+                single = pawns << 8 & empty
+                double = (single & ROW_1 << 8) << 8 & empty
+                left, right = (pawns & ~FILE_A) << 7 & captures, (pawns & ~FILE_H) << 9 & captures
+                steps = (-8, -16, -7, -9)
+            if noisy:
+                single, double = single & PROMOTION_ROWS, 0
+            elif noisy is not None:
+                single, left, right = single & ~PROMOTION_ROWS, 0, 0
+            # Each target set is shifted back by its step to the start squares
+            for targets, step in zip((single, double, left, right), steps):
+                while targets:
+                    low = targets & -targets
+                    end = low.bit_length() - 1
+                    if low & PROMOTION_ROWS:
+                        moves.extend((end + step) | end << 6 | promotion << 12 for promotion in PROMOTION_VALUES)
+                    else:
+                        append((end + step) | end << 6)
+                    targets ^= low
+        allowed = them if noisy else empty if noisy is not None else FULL ^ own
+        for offset in (ROOK, NIGHT, BISHOP, QUEEN, KING):
+            pieces = bitboards[us * 6 + offset]
+            while pieces:
+                low = pieces & -pieces
+                start = low.bit_length() - 1
+                pieces ^= low
+                if offset == NIGHT:
+                    targets = KNIGHT_ATTACKS[start] & allowed
+                elif offset == ROOK:
+                    targets = rook_attacks(start, occupied) & allowed
+                elif offset == BISHOP:
+                    targets = bishop_attacks(start, occupied) & allowed
+                elif offset == QUEEN:
+                    targets = (rook_attacks(start, occupied) | bishop_attacks(start, occupied)) & allowed
+                else:
+                    targets = KING_ATTACKS[start] & allowed
+                    if not noisy and self.castling_rights:
+                        targets |= self._castling_targets(start, us)
+                while targets:
+                    low = targets & -targets
+                    append(start | (low.bit_length() - 1) << 6)
+                    targets ^= low
+        return moves
+
+    def _is_legal(self, move):
+        # Test the king against the occupancy after the move instead of playing it
+        start, end = move & 63, move >> 6 & 63
+        index = self.squares[start] - 1
+        us = index // 6
+        king = self.bitboards[us * 6 + KING]
+        if not king:
+            return True
+        king_square = end if index % 6 == KING else king.bit_length() - 1
+        captured = 1 << end
+        occupied = (self.occupied ^ (1 << start)) | captured
+        if index % 6 == PAWN and end == self.en_passant and (start & 7) != (end & 7):
+            captured = 1 << ((start & 56) | (end & 7))
+            occupied ^= captured
+        return not self._attackers(king_square, 1 - us, occupied) & ~captured
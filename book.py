@@ -0,0 +1,227 @@
+"""Opening book in the Polyglot .bin layout, read through a memory map.
+A book is a file of 16-byte entries sorted by position key: key (8 bytes), move
+(2 bytes), weight (2 bytes) and learn (4 bytes), all big-endian. Lookups binary
+search the mapped file directly, so opening a book costs nothing and every process
+that opens the same file shares it in the page cache.
+
+Moves use the Polyglot encoding: to file | to rank << 3 | from file << 6 |
+from rank << 9 | promotion << 12, ranks counted from white's side, and castling
+written as the king capturing its own rook.
+
+Keys are Polyglot keys (polyglot.polyglot_key), so books made by other tools can be
+read and books built here can be used by them. A book keyed by Chessboard.zobrist_key
+instead is built and read by passing key=internal_key to build_book and OpeningBook.
+
+Example:
+    build_book(["games.pgn"], "book.bin", max_ply=16)
+    with OpeningBook("book.bin") as book:
+        print(book.candidates(Chessboard()))  # [((6, 4, 4, 4), 120), ...]
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+from chessboard import Color, PieceType
+from bitboard import BitboardChessboard
+from pgn import iter_games, move_from_san
+from polyglot import polyglot_key
+
+ENTRY = struct.Struct(">QHHI")
+_KEY = struct.Struct(">Q")
+ENTRY_BYTES = ENTRY.size
+# Polyglot promotion codes by PieceType value and back
+_PROMOTION_CODES = {PieceType.NIGHT.value: 1, PieceType.BISHOP.value: 2, PieceType.ROOK.value: 3,
+                    PieceType.QUEEN.value: 4}
+_PROMOTION_VALUES = {code: value for value, code in _PROMOTION_CODES.items()}
+# King move when castling -> the king-takes-rook form used in books, and back
+_CASTLING_TO_BOOK = {(60, 62): 63, (60, 58): 56, (4, 6): 7, (4, 2): 0}
+_CASTLING_FROM_BOOK = {(start, rook): end for (start, end), rook in _CASTLING_TO_BOOK.items()}
+_KINGS = (PieceType.KING.value, PieceType.KING.value + 6)  # Square codes of the two kings
+
+
+def internal_key(board):
+    """Return board.zobrist_key, the key of books used only by this package; see polyglot_key for the default."""
+    return board.zobrist_key
+
+
+def encode_book_move(board, move):
+    """
+    Convert an encoded move (see encode_move) to the Polyglot move format.
+
+    Args:
+        board (Chessboard): The position the move is played in, to recognize castling.
+        move (int): The encoded move.
+
+    Returns:
+        int: The 16-bit book move.
+    """
+    start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+    if (start, end) in _CASTLING_TO_BOOK and board.square_codes()[start] in _KINGS:
+        end = _CASTLING_TO_BOOK[start, end]
+    return (end & 7 | (7 - (end >> 3)) << 3 | (start & 7) << 6 | (7 - (start >> 3)) << 9 |
+            _PROMOTION_CODES.get(promotion, 0) << 12)
+
+
+def decode_book_move(board, book_move):
+    """
+    Convert a Polyglot move to an encoded move, see encode_book_move.
+    """
+    end = (7 - (book_move >> 3 & 7)) * 8 + (book_move & 7)
+    start = (7 - (book_move >> 9 & 7)) * 8 + (book_move >> 6 & 7)
+    if (start, end) in _CASTLING_FROM_BOOK and board.square_codes()[start] in _KINGS:
+        end = _CASTLING_FROM_BOOK[start, end]
+    return start | end << 6 | _PROMOTION_VALUES.get(book_move >> 12 & 7, 0) << 12
+
+
+class OpeningBook:
+    """
+    A read-only opening book backed by a memory-mapped file.
+    Attributes:
+        path (str): The book file.
+        size (int): The number of entries.
+    """
+
+    def __init__(self, path, key=None):
+        """
+        Args:
+            path (str): The book file.
+            key (callable): Returns the key of a board, polyglot_key if None.
+        """
+        self.path = path
+        self.key = key or polyglot_key
+        self.size = os.path.getsize(path) // ENTRY_BYTES
+        self._file = open(path, "rb")
+        # An empty file cannot be mapped, and there is nothing to find in it
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap and close the file."""
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+    def entries(self, key):
+        """
+        Return the entries stored for a key.
+
+        Args:
+            key (int): The position key.
+
+        Returns:
+            list: (book_move, weight, learn) tuples in file order.
+        """
+        # Binary search for the first entry with this key
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if _KEY.unpack_from(self._map, middle * ENTRY_BYTES)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        for index in range(low, self.size):
+            entry_key, book_move, weight, learn = ENTRY.unpack_from(self._map, index * ENTRY_BYTES)
+            if entry_key != key:
+                break
+            entries.append((book_move, weight, learn))
+        return entries
+
+    def probe(self, board):
+        """
+        Return the legal book moves of a position.
+
+        Args:
+            board (Chessboard): The position.
+
+        Returns:
+            list: (move, weight) tuples with encoded moves, heaviest first.
+        """
+        entries = self.entries(self.key(board))
+        if not entries:
+            return []
+        legal = set(board.generate_legal_moves())
+        moves = [(decode_book_move(board, book_move), weight) for book_move, weight, _ in entries]
+        # Entries of another position with the same key give moves that are not legal here
+        return sorted(((move, weight) for move, weight in moves if move in legal), key=lambda item: -item[1])
+
+    def candidates(self, board):
+        """
+        Return the book moves in the form move_piece() accepts.
+
+        Returns:
+            list: ((start_row, start_col, end_row, end_col), weight) tuples, heaviest first.
+        """
+        return [((move >> 3 & 7, move & 7, move >> 9 & 7, move >> 6 & 7), weight)
+                for move, weight in self.probe(board)]
+
+    def choose(self, board, rng=random):
+        """
+        Pick a book move at random, in proportion to the weights.
+
+        Args:
+            board (Chessboard): The position.
+            rng (random.Random): The random number generator.
+
+        Returns:
+            int: An encoded move, or None if the position is not in the book.
+        """
+        moves = [(move, weight) for move, weight in self.probe(board) if weight]
+        if not moves:
+            return None
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+def build_book(pgn_paths, output, max_ply=20, min_games=1, backend=BitboardChessboard, key=polyglot_key):
+    """
+    Build a book from PGN files. Each move played in the first max_ply plies of a game
+    scores 2 for a win, 1 for a draw and 0 for a loss of the side that played it.
+
+    Args:
+        pgn_paths (list): PGN files to read.
+        output (str): The book file to write.
+        max_ply (int): Plies of each game to include.
+        min_games (int): Leave out moves played in fewer games.
+        backend (type): The Chessboard class used to replay the games.
+        key (callable): Returns the key of a board, see OpeningBook.
+
+    Returns:
+        int: The number of entries written.
+    """
+    scores = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1)}
+    statistics = {}
+    for path in pgn_paths:
+        for game in iter_games(path):
+            white, black = scores.get(game.result, (0, 0))
+            board = game.start_board(backend)
+            for san in game.moves[:max_ply]:
+                try:
+                    move = move_from_san(board, san)
+                except ValueError:
+                    break
+                entry = (key(board), encode_book_move(board, move))
+                count, weight = statistics.get(entry, (0, 0))
+                statistics[entry] = (count + 1, weight + (white if board.side_to_move == Color.WHITE else black))
+                board.make_move(move)
+    entries = [(entry_key, book_move, weight) for (entry_key, book_move), (count, weight) in statistics.items()
+               if count >= min_games]
+    # Weights are 16 bits; scale all of them down if the heaviest does not fit
+    heaviest = max((weight for _, _, weight in entries), default=0)
+    scale = 65535 / heaviest if heaviest > 65535 else 1
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+    with open(output, "wb") as file:
+        for entry_key, book_move, weight in entries:
+            file.write(ENTRY.pack(entry_key, book_move, int(weight * scale), 0))
+    return len(entries)
+
+
+if __name__ == "__main__":
+    # python book.py book.bin games.pgn [more.pgn ...]
+    written = build_book(sys.argv[2:], sys.argv[1])
+    print(f"{written} entries written to {sys.argv[1]}")
@@ -1,9 +1,15 @@
 """This script defines a chessboard and its pieces, along with their movements and rules.
 It provides methods to initialize the board, check for valid moves, and evaluate the board state.
 """
+import copy
 import enum
 from dataclasses import dataclass
-import tkinter as tk
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+from evaluation import ENDGAME_TABLES, MIDDLEGAME_TABLES, PHASE_WEIGHTS, taper
+from attacks import (BETWEEN, BETWEEN_SQUARES, BISHOP_ATTACKS, BISHOP_RAYS, KING_ATTACKS, KING_TARGETS,
+                     KNIGHT_ATTACKS, KNIGHT_TARGETS, PAWN_ATTACKS, QUEEN_ATTACKS, RAYS, ROOK_ATTACKS, ROOK_RAYS,
+                     bishop_attacks, rook_attacks)
+from instrumentation import instrumented
 # from PIL import Image, ImageTk
 
 # Enum for the color of the chess pieces
@@ -32,8 +38,8 @@ class PieceType(enum.Enum):
     QUEEN = 5  # Queen
     KING = 6  # King
 
-# Class representing a chess piece
-@dataclass
+# Class representing a chess piece; __slots__ keeps each instance small
+@dataclass(slots=True)
 class Piece:
     """
     Represents a chess piece on the board.
@@ -48,6 +54,149 @@ class Piece:
     row: int = -1  # Row position on the board
     col: int = -1  # Column position on the board
 
+def piece_index(piece_type, color):
+    """
+    Return the index (0-11) of a piece: white pawn, rook, knight, bishop, queen, king,
+    then the black pieces in the same order. Used by the bitboards and hashing keys.
+    """
+    # _value_ is the plain attribute behind the value property, several times faster to read
+    return (color._value_ - 1) * 6 + piece_type._value_ - 1
+
+
+# Shared placeholder for squares vacated by make_move(), so moves allocate no Piece objects
+EMPTY_PIECE = Piece(PieceType.EMPTY, Color.NONE)
+
+# Castling rights are kept as a bit mask
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+# Rights that survive a move from or to each square (king and rook home squares clear theirs)
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[0] = ALL_CASTLING ^ BLACK_QUEENSIDE  # a8 rook
+CASTLING_MASK[4] = WHITE_KINGSIDE | WHITE_QUEENSIDE  # e8 king
+CASTLING_MASK[7] = ALL_CASTLING ^ BLACK_KINGSIDE  # h8 rook
+CASTLING_MASK[56] = ALL_CASTLING ^ WHITE_QUEENSIDE  # a1 rook
+CASTLING_MASK[60] = BLACK_KINGSIDE | BLACK_QUEENSIDE  # e1 king
+CASTLING_MASK[63] = ALL_CASTLING ^ WHITE_KINGSIDE  # h1 rook
+# King destination square -> (castling right, rook start square, rook end square)
+CASTLING_MOVES = {62: (WHITE_KINGSIDE, 63, 61), 58: (WHITE_QUEENSIDE, 56, 59),
+                  6: (BLACK_KINGSIDE, 7, 5), 2: (BLACK_QUEENSIDE, 0, 3)}
+PROMOTION_TYPES = [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.NIGHT]
+PROMOTION_CODES = frozenset(piece_type.value for piece_type in PROMOTION_TYPES)
+FEN_CASTLING = [("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE)]
+_FEN_CASTLING_RIGHTS = dict(FEN_CASTLING)
+OPPONENT = {Color.WHITE: Color.BLACK, Color.BLACK: Color.WHITE}
+# FEN letters are the first letter of the piece type name (N for NIGHT)
+FEN_PIECES = {piece_type.name[0]: piece_type for piece_type in PieceType if piece_type != PieceType.EMPTY}
+# FEN letter of every square code (piece_index + 1), "." for an empty square
+FEN_LETTERS = "." + "".join(FEN_PIECES) + "".join(FEN_PIECES).lower()
+# Byte translation tables between FEN letters and square codes; 255 marks invalid characters
+_FEN_CODE_TABLE = bytes(FEN_LETTERS.find(chr(char)) if chr(char) in FEN_LETTERS else 255 for char in range(256))
+_FEN_LETTER_TABLE = FEN_LETTERS.encode().ljust(256, b"?")
+_FEN_EXPAND = str.maketrans({str(count): "." * count for count in range(1, 9)})
+# The tuples get_possible_moves returns, built once: MOVE_TUPLES[piece_index % 6][start][end]
+MOVE_TUPLES = [[tuple((piece_type.name, start >> 3, start & 7, end >> 3, end & 7) for end in range(64))
+                for start in range(64)] for piece_type in PieceType if piece_type != PieceType.EMPTY]
+
+
+def parse_fen_placement(placement):
+    """
+    Convert the piece placement field of a FEN string to square codes.
+    The work is done by str.translate and bytes.translate, so it is fast
+    enough for bulk loading.
+
+    Args:
+        placement (str): The first FEN field, e.g. 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'.
+
+    Returns:
+        bytes: piece_index + 1 for each square from a8 to h1, 0 for empty squares.
+
+    Raises:
+        ValueError: If the placement does not describe 8 rows of 8 squares.
+    """
+    expanded = placement.translate(_FEN_EXPAND)
+    if len(expanded) != 71 or "." in placement or expanded[8::9] != "///////":
+        raise ValueError(f"FEN placement does not have 8 rows of 8 squares: {placement!r}")
+    codes = expanded.replace("/", "").encode(errors="replace").translate(_FEN_CODE_TABLE)
+    if 255 in codes:
+        raise ValueError(f"Invalid character in FEN placement: {placement!r}")
+    return codes
+
+
+def format_fen_placement(codes):
+    """
+    Convert 64 square codes to the piece placement field of a FEN string.
+
+    Args:
+        codes (bytes): piece_index + 1 for each square from a8 to h1, 0 for empty squares.
+
+    Returns:
+        str: The FEN piece placement.
+    """
+    text = bytes(codes).translate(_FEN_LETTER_TABLE).decode()
+    text = "/".join(text[start:start + 8] for start in range(0, 64, 8))
+    for count in range(8, 0, -1):
+        text = text.replace("." * count, str(count))
+    return text
+
+
+# Moves are encoded as integers: start square | end square << 6 | promotion << 12,
+# where a square is row * 8 + col and promotion is the value of a PieceType (0 for none)
+def encode_move(start_row, start_col, end_row, end_col, promotion=PieceType.EMPTY):
+    """
+    Encode a move as an integer.
+
+    Args:
+        start_row (int): The starting row index.
+        start_col (int): The starting column index.
+        end_row (int): The ending row index.
+        end_col (int): The ending column index.
+        promotion (PieceType): The piece a pawn promotes to, EMPTY for no promotion.
+
+    Returns:
+        int: The encoded move.
+    """
+    return start_row * 8 + start_col | (end_row * 8 + end_col) << 6 | promotion.value << 12
+
+
+def decode_move(move):
+    """
+    Decode an integer move.
+
+    Returns:
+        tuple: (start_row, start_col, end_row, end_col, promotion)
+    """
+    start, end = move & 63, move >> 6 & 63
+    return start >> 3, start & 7, end >> 3, end & 7, PieceType(move >> 12)
+
+
+def move_to_uci(move):
+    """
+    Return the move in coordinate notation, e.g. 'e2e4' or 'e7e8q'.
+    """
+    start_row, start_col, end_row, end_col, promotion = decode_move(move)
+    text = f"{chr(97 + start_col)}{8 - start_row}{chr(97 + end_col)}{8 - end_row}"
+    return text + promotion.name[0].lower() if promotion != PieceType.EMPTY else text
+
+
+def move_from_uci(text):
+    """
+    Parse a move in coordinate notation such as 'e2e4' or 'e7e8q'.
+
+    Raises:
+        ValueError: If the text is not a move on the board.
+    """
+    text = text.strip().lower()
+    if len(text) not in (4, 5) or not all(c in "abcdefgh" for c in text[0:4:2]) \
+            or not all(c in "12345678" for c in text[1:4:2]):
+        raise ValueError(f"Invalid move: {text!r}")
+    promotion = PieceType.EMPTY
+    if len(text) == 5:
+        promotion = next((p for p in PROMOTION_TYPES if p.name[0].lower() == text[4]), None)
+        if promotion is None:
+            raise ValueError(f"Invalid promotion piece: {text!r}")
+    return encode_move(8 - int(text[1]), ord(text[0]) - 97, 8 - int(text[3]), ord(text[2]) - 97, promotion)
+
+
 # Class representing the chessboard
 class Chessboard:
     """_summary_
@@ -55,13 +204,26 @@ class Chessboard:
     It provides methods to initialize the board, check for valid moves, and evaluate the board state.
     Attributes:
         board (list): A 2D list representing the chessboard, where each element is a Piece object.
+        side_to_move (Color): The color that moves next.
+        castling_rights (int): Bit mask of WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE.
+        en_passant (int): Square (row * 8 + col) a pawn may capture en passant, or None.
+        halfmove_clock (int): Moves since the last capture or pawn move.
+        fullmove_number (int): The number of the current move, starting at 1.
+        undo_stack (list): One record per move played, used by unmake_move().
+        zobrist_key (int): 64-bit hash of the position, updated incrementally by make_move().
+        move_cache (MoveCache): The cache of legal moves attached to the board, invalidated by move_piece(),
+            or None; see movecache.py.
     Methods:
         initialize_board(): Initializes the chessboard with the standard chess setup.
         get_piece(row, col): Returns the piece at the specified row and column.
         __str__(): Returns a string representation of the chessboard for printing.
         is_valid(start_row, start_col, end_row, end_col): Checks if a move is valid.
         get_possible_moves(start_row, start_col): Returns a list of possible moves for a piece.
-        evaluate_board(): Evaluates the board and calculates the total score based on piece values.
+        evaluate_board(positional, tapered): Returns the material balance, optionally with piece-square tables.
+        generate_legal_moves(): Returns all legal moves of the side to move as encoded moves.
+        make_move(move) / unmake_move(): Plays and takes back encoded moves using the undo stack.
+        perft(depth): Counts the leaf nodes of the legal move tree to the given depth.
+        from_fen(fen) / to_fen(): Reads and writes positions in Forsyth-Edwards Notation.
     Args:
         None
     Returns:
@@ -79,35 +241,246 @@ class Chessboard:
     # Klassenattribut für piece_values
     piece_values = {piece_type: score 
                    for piece_type, score in zip(PieceType, [0, 1, 5, 3, 3, 9, 100])}
+    # piece_values by piece_index, negative for black
+    index_values = list(piece_values.values())[1:] + [-score for score in list(piece_values.values())[1:]]
+    # Centipawn values by piece_index % 6 for see()
+    see_values = [score * 100 for score in index_values[:6]]
+    # Precomputed movement tables, see attacks.py
+    pawn_directions = {Color.WHITE: [(-2, 0), (-1, 0), (-1, -1), (-1, 1)],
+                       Color.BLACK: [(2, 0), (1, 0), (1, -1), (1, 1)]}
+    sliding_attacks = {PieceType.BISHOP: BISHOP_ATTACKS, PieceType.ROOK: ROOK_ATTACKS,
+                       PieceType.QUEEN: QUEEN_ATTACKS}
+    sliding_rays = {PieceType.BISHOP: BISHOP_RAYS, PieceType.ROOK: ROOK_RAYS, PieceType.QUEEN: RAYS}
+    # Set on the instance by MoveCache.attach()
+    move_cache = None
 
     def __init__(self):
-        # Initialize an 8x8 board with empty pieces
-        self.board = [[Piece(PieceType.EMPTY, Color.NONE,row,col) for row in range(8)] for col in range(8)]
         self.initialize_board()  # Set up the initial board configuration
 
     # Method to initialize the board with the standard chess setup
     def initialize_board(self):
-        # Reset the board to empty
-        self.board = [[Piece(PieceType.EMPTY, None) for _ in range(8)] for _ in range(8)]
+        # Reset the board to empty; empty squares share one immutable Piece, as after make_move
+        self._grid = [[EMPTY_PIECE] * 8 for _ in range(8)]
        
         # Place white pieces
         for color in {Color.WHITE, Color.BLACK}:
             fl = 7 if color == Color.WHITE else 0 
             pl = 6 if color == Color.WHITE else 1
-            self.board[fl][0] = Piece(PieceType.ROOK, color,row=fl, col=0)
-            self.board[fl][1] = Piece(PieceType.NIGHT, color,row=fl, col=1)
-            self.board[fl][2] = Piece(PieceType.BISHOP, color,row=fl, col=2)
-            self.board[fl][3] = Piece(PieceType.QUEEN, color,row=fl, col=3)
-            self.board[fl][4] = Piece(PieceType.KING, color,row=fl, col=4)
-            self.board[fl][5] = Piece(PieceType.BISHOP, color,row=fl, col=5)
-            self.board[fl][6] = Piece(PieceType.NIGHT, color,row=fl, col=6)
-            self.board[fl][7] = Piece(PieceType.ROOK, color,row=fl, col=7)
+            self._grid[fl][0] = Piece(PieceType.ROOK, color,row=fl, col=0)
+            self._grid[fl][1] = Piece(PieceType.NIGHT, color,row=fl, col=1)
+            self._grid[fl][2] = Piece(PieceType.BISHOP, color,row=fl, col=2)
+            self._grid[fl][3] = Piece(PieceType.QUEEN, color,row=fl, col=3)
+            self._grid[fl][4] = Piece(PieceType.KING, color,row=fl, col=4)
+            self._grid[fl][5] = Piece(PieceType.BISHOP, color,row=fl, col=5)
+            self._grid[fl][6] = Piece(PieceType.NIGHT, color,row=fl, col=6)
+            self._grid[fl][7] = Piece(PieceType.ROOK, color,row=fl, col=7)
             for i in range(8):
-                self.board[pl][i] = Piece(PieceType.PAWN, color,row=pl, col=i)
+                self._grid[pl][i] = Piece(PieceType.PAWN, color,row=pl, col=i)
+        self._kings = [60, 4]
+        self._reset_state()
+
+    # The grid is replaced only through the setter, which reloads the position and drops the caches
+    @property
+    def board(self):
+        """The 8x8 grid of Piece objects; assigning a grid loads it. After editing the grid in place,
+        assign it back so that the Zobrist key, evaluation totals and caches follow the edit."""
+        return self._grid
+
+    @board.setter
+    def board(self, grid):
+        self._load_grid(grid)
+
+    def _reset_state(self, side_to_move=Color.WHITE, castling_rights=ALL_CASTLING, en_passant=None,
+                     halfmove_clock=0, fullmove_number=1):
+        """Set side to move, castling rights, en passant square and move counters, and clear the history."""
+        self.side_to_move = side_to_move
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.undo_stack = []
+        self.zobrist_key = self.compute_zobrist_key()
+        self.material, self.psq_middlegame, self.psq_endgame, self.phase = self.compute_evaluation_totals()
+        self._attack_cache = {}
+
+    def compute_zobrist_key(self):
+        """
+        Compute the Zobrist key of the position from scratch. make_move() keeps
+        zobrist_key up to date incrementally; this is only needed after editing
+        the board directly.
+
+        Returns:
+            int: The 64-bit key.
+        """
+        key = CASTLING_KEYS[self.castling_rights]
+        for square, code in enumerate(self.square_codes()):
+            if code:
+                key ^= PIECE_KEYS[code - 1][square]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        if self.side_to_move == Color.BLACK:
+            key ^= BLACK_TO_MOVE_KEY
+        return key
+
+    def en_passant_possible(self):
+        """
+        Check that a pawn of the side to move stands beside the pawn that just made a double step,
+        so that an en passant capture is possible. Whether the capture would leave the king in
+        check is not considered, as in the Polyglot book format.
+
+        Returns:
+            bool: True if an en passant capture is possible.
+        """
+        if self.en_passant is None:
+            return False
+        # The pawn that moved two squares stands one row beyond the en passant square
+        row = (self.en_passant >> 3) + (1 if self.side_to_move == Color.WHITE else -1)
+        col = self.en_passant & 7
+        for capture_col in (col - 1, col + 1):
+            if 0 <= capture_col < 8:
+                piece = self.get_piece(row, capture_col)
+                if piece.piece_type == PieceType.PAWN and piece.color == self.side_to_move:
+                    return True
+        return False
+
+    def repetition_key(self):
+        """
+        Return the key under which a position counts for repetitions: zobrist_key, without the en
+        passant file when no en passant capture is possible. After a double step that no pawn can
+        capture, the position is the same as the one with the pawns in place and no en passant square.
+
+        Returns:
+            int: The 64-bit key.
+        """
+        if self.en_passant is None or self.en_passant_possible():
+            return self.zobrist_key
+        return self.zobrist_key ^ EN_PASSANT_KEYS[self.en_passant & 7]
+
+    def compute_evaluation_totals(self):
+        """
+        Compute the running evaluation totals from scratch. Like zobrist_key, make_move()
+        keeps them up to date incrementally.
+
+        Returns:
+            tuple: (material, psq_middlegame, psq_endgame, phase); material in pawns and the
+            piece-square sums in centipawns, all from white's point of view.
+        """
+        material = middlegame = endgame = phase = 0
+        for square, code in enumerate(self.square_codes()):
+            if code:
+                material += self.index_values[code - 1]
+                middlegame += MIDDLEGAME_TABLES[code - 1][square]
+                endgame += ENDGAME_TABLES[code - 1][square]
+                phase += PHASE_WEIGHTS[code - 1]
+        return material, middlegame, endgame, phase
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Create a board from a FEN string. Missing fields after the piece placement
+        default to white to move, no castling, no en passant and move 1.
+
+        Args:
+            fen (str): The position in Forsyth-Edwards Notation.
+
+        Returns:
+            Chessboard: A new board of this class holding the position.
+
+        Raises:
+            ValueError: If the FEN string cannot be parsed.
+        """
+        # set_fen sets every attribute, so skip setting up the start position first
+        board = cls.__new__(cls)
+        board.set_fen(fen)
+        return board
+
+    def set_fen(self, fen):
+        """
+        Load a position from a FEN string, see from_fen. EPD lines are accepted too;
+        anything after the fourth field that is not a pair of move counters is ignored.
+        """
+        fields = fen.split(None, 6)
+        if not fields:
+            raise ValueError("Empty FEN string")
+        codes = parse_fen_placement(fields[0])
+        side_to_move, castling_rights, en_passant, halfmove_clock, fullmove_number = Color.WHITE, 0, None, 0, 1
+        if len(fields) > 1:
+            if fields[1] not in ("w", "b"):
+                raise ValueError(f"Invalid side to move {fields[1]!r}: {fen!r}")
+            side_to_move = Color.BLACK if fields[1] == "b" else Color.WHITE
+        if len(fields) > 2 and fields[2] != "-":
+            for char in fields[2]:
+                if char not in _FEN_CASTLING_RIGHTS:
+                    raise ValueError(f"Invalid castling rights {fields[2]!r}: {fen!r}")
+                castling_rights |= _FEN_CASTLING_RIGHTS[char]
+        if len(fields) > 3 and fields[3] != "-":
+            if len(fields[3]) != 2 or fields[3][0] not in "abcdefgh" or fields[3][1] not in "36":
+                raise ValueError(f"Invalid en passant square {fields[3]!r}: {fen!r}")
+            en_passant = (8 - int(fields[3][1])) * 8 + ord(fields[3][0]) - 97
+        if len(fields) > 5 and fields[4].isdigit() and fields[5].isdigit():
+            halfmove_clock, fullmove_number = int(fields[4]), int(fields[5])
+        self._load_square_codes(codes)
+        self._reset_state(side_to_move, castling_rights, en_passant, halfmove_clock, fullmove_number)
+
+    def _load_square_codes(self, codes):
+        """Replace the pieces on the board by the given 64 square codes."""
+        self._grid = [[EMPTY_PIECE if not code else
+                       Piece(FEN_PIECES[FEN_LETTERS[code].upper()], Color.WHITE if code <= 6 else Color.BLACK,
+                             row, col)
+                       for col, code in enumerate(codes[row * 8:row * 8 + 8])] for row in range(8)]
+        # King squares by color.value - 1, kept up to date by make_move() and unmake_move()
+        codes = bytes(codes)
+        self._kings = [None if square < 0 else square
+                       for square in (codes.find(PieceType.KING.value), codes.find(PieceType.KING.value + 6))]
+
+    def _load_grid(self, grid):
+        """
+        Replace the pieces on the board by an 8x8 grid of Piece objects, as the board setters of the
+        other backends do, and recompute the key and evaluation totals for the current game state.
+        """
+        self._load_square_codes(bytes(0 if piece.piece_type == PieceType.EMPTY else
+                                      piece_index(piece.piece_type, piece.color) + 1
+                                      for row in grid for piece in row))
+        self._reset_state(self.side_to_move, self.castling_rights, self.en_passant, self.halfmove_clock,
+                          self.fullmove_number)
+
+    def square_codes(self):
+        """
+        Return the position as 64 square codes.
+
+        Returns:
+            bytes: piece_index + 1 for each square from a8 to h1, 0 for empty squares.
+        """
+        # piece_index + 1 inlined, the search asks for the codes at every node
+        return bytes([(piece.color._value_ - 1) * 6 + piece.piece_type._value_ if piece.piece_type._value_ else 0
+                      for row in self._grid for piece in row])
+
+    def to_fen(self):
+        """
+        Return the position as a FEN string.
+        """
+        castling = "".join(char for char, right in FEN_CASTLING if self.castling_rights & right) or "-"
+        en_passant = "-" if self.en_passant is None else f"{chr(97 + (self.en_passant & 7))}{8 - (self.en_passant >> 3)}"
+        side = "w" if self.side_to_move == Color.WHITE else "b"
+        return f"{format_fen_placement(self.square_codes())} {side} {castling} {en_passant} " \
+               f"{self.halfmove_clock} {self.fullmove_number}"
+
+    def copy(self):
+        """
+        Return an independent copy of the board.
+        """
+        board = copy.copy(self)
+        # Undo records refer to the Piece objects on the board, so copy both together
+        memo = {}
+        board._grid = copy.deepcopy(self._grid, memo)
+        board.undo_stack = copy.deepcopy(self.undo_stack, memo)
+        board._kings = self._kings[:]
+        board._attack_cache = {}
+        return board
 
     # Method to get the piece at a specific position on the board
     def get_piece(self, row, col):
-        return self.board[row][col]
+        return self._grid[row][col]
 
     # Method to represent the board as a string for printing
     def __str__(self):
@@ -120,6 +493,7 @@ class Chessboard:
         return board_str
 
     # Method to check if a move is valid
+    @instrumented()
     def is_valid(self, start_row, start_col, end_row, end_col):
         """
         Check if a move is valid.
@@ -156,88 +530,237 @@ class Chessboard:
                 if (start_col == end_col and start_row - end_row == 1 and end_piece.piece_type == PieceType.EMPTY) or \
                    (start_col == end_col and start_row == 6 and end_row == 4 and end_piece.piece_type == PieceType.EMPTY and \
                     self.get_piece(5, start_col).piece_type == PieceType.EMPTY) or \
-                   (abs(start_col - end_col) == 1 and start_row - end_row == 1 and end_piece.color == Color.BLACK):
+                   (abs(start_col - end_col) == 1 and start_row - end_row == 1 and end_piece.color == Color.BLACK) or \
+                   (abs(start_col - end_col) == 1 and start_row - end_row == 1 and end_row == 2 and \
+                    end_row * 8 + end_col == self.en_passant):
                     return True
             # Black pawn movement
             elif piece.color == Color.BLACK:
                 if (start_col == end_col and end_row - start_row == 1 and end_piece.piece_type == PieceType.EMPTY) or \
                    (start_col == end_col and start_row == 1 and end_row == 3 and end_piece.piece_type == PieceType.EMPTY \
                     and self.get_piece(2, start_col).piece_type == PieceType.EMPTY) or \
-                   (abs(start_col - end_col) == 1 and end_row - start_row == 1 and end_piece.color == Color.WHITE):
+                   (abs(start_col - end_col) == 1 and end_row - start_row == 1 and end_piece.color == Color.WHITE) or \
+                   (abs(start_col - end_col) == 1 and end_row - start_row == 1 and end_row == 5 and \
+                    end_row * 8 + end_col == self.en_passant):
                     return True
             return False
 
+        start, end = start_row * 8 + start_col, end_row * 8 + end_col
+
         # Knight
         if piece.piece_type == PieceType.NIGHT:
-            if (abs(start_row - end_row) == 2 and abs(start_col - end_col) == 1) or \
-               (abs(start_row - end_row) == 1 and abs(start_col - end_col) == 2):
-                if end_piece.color != piece.color:
-                    return True
-            return False
+            return bool(KNIGHT_ATTACKS[start] >> end & 1) and end_piece.color != piece.color
 
-        # Bishop
-        if piece.piece_type == PieceType.BISHOP:
-            if abs(start_row - end_row) == abs(start_col - end_col):  # Diagonal movement
-                step_row = 1 if end_row > start_row else -1
-                step_col = 1 if end_col > start_col else -1
-                # Check if the path is clear
-                for i in range(1, abs(start_row - end_row)):
-                    if self.get_piece(start_row + i * step_row, start_col + i * step_col).piece_type != PieceType.EMPTY:
-                        return False
-                if end_piece.color != piece.color:
-                    return True
-            return False
+        # King: one square in any direction, or two squares sideways when castling
+        if piece.piece_type == PieceType.KING:
+            if KING_ATTACKS[start] >> end & 1:
+                return end_piece.color != piece.color
+            return self._can_castle(start, end, piece.color)
 
-        # Rook
-        if piece.piece_type == PieceType.ROOK:
-            if start_row == end_row or start_col == end_col:  # Horizontal or vertical movement
-                if start_row == end_row:  # Horizontal movement
-                    step = 1 if end_col > start_col else -1
-                    for col in range(start_col + step, end_col, step):
-                        if self.get_piece(start_row, col).piece_type != PieceType.EMPTY:
-                            return False
-                else:  # Vertical movement
-                    step = 1 if end_row > start_row else -1
-                    for row in range(start_row + step, end_row, step):
-                        if self.get_piece(row, start_col).piece_type != PieceType.EMPTY:
-                            return False
-                if end_piece.color != piece.color:
-                    return True
-            return False
+        # Bishop, rook and queen: the end square must lie on one of the piece's lines
+        # and every square in between must be empty
+        if piece.piece_type in Chessboard.sliding_attacks:
+            if not Chessboard.sliding_attacks[piece.piece_type][start] >> end & 1:
+                return False
+            for square in BETWEEN_SQUARES[start][end]:
+                if self._grid[square >> 3][square & 7].piece_type != PieceType.EMPTY:
+                    return False
+            return end_piece.color != piece.color
 
-        # Queen
-        if piece.piece_type == PieceType.QUEEN:
-            if start_row == end_row or start_col == end_col or abs(start_row - end_row) == abs(start_col - end_col):
-                if start_row == end_row:  # Horizontal movement
-                    step = 1 if end_col > start_col else -1
-                    for col in range(start_col + step, end_col, step):
-                        if self.get_piece(start_row, col).piece_type != PieceType.EMPTY:
-                            return False
-                elif start_col == end_col:  # Vertical movement
-                    step = 1 if end_row > start_row else -1
-                    for row in range(start_row + step, end_row, step):
-                        if self.get_piece(row, start_col).piece_type != PieceType.EMPTY:
-                            return False
-                else:  # Diagonal movement
-                    step_row = 1 if end_row > start_row else -1
-                    step_col = 1 if end_col > start_col else -1
-                    for i in range(1, abs(start_row - end_row)):
-                        if self.get_piece(start_row + i * step_row, start_col + i * step_col).piece_type != PieceType.EMPTY:
-                            return False
-                if end_piece.color != piece.color:
-                    return True
-            return False
+        return False  # If no valid move is found, return False
 
-        # King
-        if piece.piece_type == PieceType.KING:
-            if abs(start_row - end_row) <= 1 and abs(start_col - end_col) <= 1:  # One square in any direction
-                if end_piece.color != piece.color:
-                    return True
+    def _can_castle(self, start, end, color):
+        """
+        Check if the king of the given color may castle from start to end: the right is
+        still there, the rook is home, the squares in between are empty and the king
+        neither starts in, passes through nor lands on an attacked square.
+        """
+        if end not in CASTLING_MOVES or start != (60 if color == Color.WHITE else 4) or abs(end - start) != 2:
+            return False
+        right, rook_start, _ = CASTLING_MOVES[end]
+        if not self.castling_rights & right:
+            return False
+        rook = self._grid[rook_start >> 3][rook_start & 7]
+        if rook.piece_type != PieceType.ROOK or rook.color != color:
             return False
+        if any(self._grid[square >> 3][square & 7].piece_type != PieceType.EMPTY
+               for square in BETWEEN_SQUARES[start][rook_start]):
+            return False
+        return not any(self._is_attacked(square, OPPONENT[color]) for square in (start, (start + end) // 2, end))
 
-        return False  # If no valid move is found, return False
+    def _is_attacked(self, square, by_color):
+        """
+        Check if any piece of by_color attacks the square.
+        """
+        board = self._grid
+        for target in KNIGHT_TARGETS[square]:
+            piece = board[target >> 3][target & 7]
+            if piece.piece_type == PieceType.NIGHT and piece.color == by_color:
+                return True
+        for target in KING_TARGETS[square]:
+            piece = board[target >> 3][target & 7]
+            if piece.piece_type == PieceType.KING and piece.color == by_color:
+                return True
+        # White pawns attack upwards (towards row 0), so they sit one row below the square
+        pawn_row = (square >> 3) + (1 if by_color == Color.WHITE else -1)
+        if 0 <= pawn_row < 8:
+            for col in ((square & 7) - 1, (square & 7) + 1):
+                if 0 <= col < 8:
+                    piece = board[pawn_row][col]
+                    if piece.piece_type == PieceType.PAWN and piece.color == by_color:
+                        return True
+        for rays, attackers in ((BISHOP_RAYS[square], (PieceType.BISHOP, PieceType.QUEEN)),
+                                (ROOK_RAYS[square], (PieceType.ROOK, PieceType.QUEEN))):
+            for ray in rays:
+                for target in ray:
+                    piece = board[target >> 3][target & 7]
+                    if piece.piece_type != PieceType.EMPTY:
+                        if piece.color == by_color and piece.piece_type in attackers:
+                            return True
+                        break
+        return False
+
+    def _king_square(self, color):
+        """Return the square of the king of the given color, or None if it is not on the board."""
+        return self._kings[color.value - 1]
+
+    def is_square_attacked(self, square, by_color):
+        """
+        Check if any piece of by_color attacks a square.
+
+        Args:
+            square (int): The square, row * 8 + col.
+            by_color (Color): The attacking side.
+
+        Returns:
+            bool: True if the square is attacked.
+        """
+        return bool(self._attack_map(by_color) >> square & 1)
+
+    def _attack_map(self, by_color):
+        """
+        Return the squares attacked by the pieces of by_color as a bitboard, cached under
+        the Zobrist key like _attack_info(), so it is built once per position.
+        """
+        cached = self._attack_cache.get(("attacks", by_color))
+        if cached is not None and cached[0] == self.zobrist_key:
+            return cached[1]
+        bitboards, occupied = self._bitboards()
+        them = by_color.value - 1
+        base = them * 6
+        attacked = 0
+        for offset in range(6):
+            pieces = bitboards[base + offset]
+            while pieces:
+                bit = pieces & -pieces
+                pieces ^= bit
+                square = bit.bit_length() - 1
+                if offset == 0:
+                    attacked |= PAWN_ATTACKS[them][square]
+                elif offset == 2:
+                    attacked |= KNIGHT_ATTACKS[square]
+                elif offset == 5:
+                    attacked |= KING_ATTACKS[square]
+                else:
+                    # Bishop 3, rook 1, queen 4
+                    if offset != 1:
+                        attacked |= bishop_attacks(square, occupied)
+                    if offset != 3:
+                        attacked |= rook_attacks(square, occupied)
+        self._attack_cache[("attacks", by_color)] = (self.zobrist_key, attacked)
+        return attacked
+
+    def in_check(self, color=None):
+        """
+        Check if the king of a side is attacked.
+
+        Args:
+            color (Color): The side, the side to move if None.
+
+        Returns:
+            bool: True if the king is in check; False if there is no king.
+        """
+        return bool(self._attack_info(color)[0])
+
+    def checkers(self, color=None):
+        """
+        Return the pieces giving check to the king of a side.
+
+        Args:
+            color (Color): The side whose king is attacked, the side to move if None.
+
+        Returns:
+            int: A bitboard of the checking pieces (bit row * 8 + col).
+        """
+        return self._attack_info(color)[0]
+
+    def pinned(self, color=None):
+        """
+        Return the pieces of a side that are pinned to their own king by a sliding piece.
+
+        Args:
+            color (Color): The side, the side to move if None.
+
+        Returns:
+            int: A bitboard of the pinned pieces (bit row * 8 + col).
+        """
+        return self._attack_info(color)[1]
+
+    def _bitboards(self):
+        """
+        Return the twelve piece bitboards, indexed by piece_index, and the occupied squares.
+        They are built from the square codes once per position and cached under the Zobrist key;
+        callers must not change them.
+        """
+        cached = self._attack_cache.get("bitboards")
+        if cached is not None and cached[0] == self.zobrist_key:
+            return cached[1]
+        bitboards = [0] * 12
+        occupied = 0
+        for square, code in enumerate(self.square_codes()):
+            if code:
+                bitboards[code - 1] |= 1 << square
+                occupied |= 1 << square
+        self._attack_cache["bitboards"] = (self.zobrist_key, (bitboards, occupied))
+        return bitboards, occupied
+
+    def _attack_info(self, color=None):
+        """
+        Return (checkers, pinned) for a side. The result is cached under the Zobrist key,
+        so it is computed once per position and every move, which changes the key,
+        invalidates it.
+        """
+        color = color or self.side_to_move
+        cached = self._attack_cache.get(color)
+        if cached is not None and cached[0] == self.zobrist_key:
+            return cached[1]
+        bitboards, occupied = self._bitboards()
+        us = color.value - 1
+        king = bitboards[us * 6 + 5]
+        checkers = pinned = 0
+        if king:
+            king = king.bit_length() - 1
+            base = (1 - us) * 6
+            diagonal = bitboards[base + 3] | bitboards[base + 4]
+            straight = bitboards[base + 1] | bitboards[base + 4]
+            checkers = ((KNIGHT_ATTACKS[king] & bitboards[base + 2]) | (PAWN_ATTACKS[us][king] & bitboards[base]) |
+                        (bishop_attacks(king, occupied) & diagonal) | (rook_attacks(king, occupied) & straight))
+            own = 0
+            for bitboard in bitboards[us * 6:us * 6 + 6]:
+                own |= bitboard
+            # A piece is pinned if it is the only piece between the king and an enemy slider on its line
+            snipers = (BISHOP_ATTACKS[king] & diagonal) | (ROOK_ATTACKS[king] & straight)
+            while snipers:
+                sniper = snipers & -snipers
+                snipers ^= sniper
+                between = BETWEEN[king][sniper.bit_length() - 1] & occupied
+                if between & own and not between & (between - 1):
+                    pinned |= between
+        self._attack_cache[color] = (self.zobrist_key, (checkers, pinned))
+        return checkers, pinned
 
     
+    @instrumented()
     def get_possible_moves(self, start_row, start_col):
         """
         Get all possible moves for a piece at a given position.
@@ -258,134 +781,65 @@ class Chessboard:
             return possible_moves
 
 
-        # Define possible directions based on piece type
-        directions = []
+        name = piece.piece_type.name
+        start = start_row * 8 + start_col
         match piece.piece_type:
             case PieceType.PAWN:
-                directions = [(-2, 0), (-1, 0), (-1, -1), (-1, 1)] if piece.color == Color.WHITE else [(2, 0), (1, 0), (1, -1), (1, 1)]
-            case PieceType.NIGHT:
-                directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-            case PieceType.BISHOP:
-                # Nur die vier diagonalen Grundrichtungen
-                directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-            case PieceType.ROOK:
-                # Nur die vier orthogonalen Grundrichtungen
-                directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-            case PieceType.QUEEN:
-                # Alle acht Grundrichtungen
-                directions = [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
-            case PieceType.KING:
-                directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-        for direction in directions:
-            end_row, end_col = start_row + direction[0], start_col + direction[1]
-            while 0 <= end_row < 8 and 0 <= end_col < 8:
-                if self.is_valid(start_row, start_col, end_row, end_col):
-                    possible_moves.append((piece.piece_type.name, start_row, start_col, end_row, end_col))
-                # Stop further movement for non-sliding pieces
-                if piece.piece_type in {PieceType.PAWN, PieceType.NIGHT, PieceType.KING}:
-                    break
-                # Stop if the path is blocked
-                if self.get_piece(end_row, end_col).piece_type != PieceType.EMPTY:
-                    break
-                # Continue sliding for sliding pieces
-                end_row += direction[0]
-                end_col += direction[1]
+                for direction in Chessboard.pawn_directions[piece.color]:
+                    end_row, end_col = start_row + direction[0], start_col + direction[1]
+                    if self.is_valid(start_row, start_col, end_row, end_col):
+                        possible_moves.append((name, start_row, start_col, end_row, end_col))
+            case PieceType.NIGHT | PieceType.KING:
+                targets = KNIGHT_TARGETS[start] if piece.piece_type == PieceType.NIGHT else KING_TARGETS[start]
+                for end in targets:
+                    if self._grid[end >> 3][end & 7].color != piece.color:
+                        possible_moves.append((name, start_row, start_col, end >> 3, end & 7))
+                if piece.piece_type == PieceType.KING:
+                    for end in (start - 2, start + 2):
+                        if self._can_castle(start, end, piece.color):
+                            possible_moves.append((name, start_row, start_col, end >> 3, end & 7))
+            case _:
+                # Slide along the precomputed rays until the first occupied square
+                for ray in Chessboard.sliding_rays[piece.piece_type][start]:
+                    for end in ray:
+                        end_piece = self._grid[end >> 3][end & 7]
+                        if end_piece.piece_type == PieceType.EMPTY:
+                            possible_moves.append((name, start_row, start_col, end >> 3, end & 7))
+                            continue
+                        if end_piece.color != piece.color:
+                            possible_moves.append((name, start_row, start_col, end >> 3, end & 7))
+                        break
 
         return possible_moves
     
-    def evaluate_board(self):
+    @instrumented()
+    def evaluate_board(self, positional=False, tapered=False):
         """
-        Evaluate the board and calculate the total score based on piece values.
+        Evaluate the board from white's point of view. The score is read from the running
+        totals that make_move() and unmake_move() update, so it takes constant time.
+
+        Args:
+            positional (bool): Add the piece-square tables and return centipawns.
+            tapered (bool): Blend the middlegame and endgame tables by the game phase
+                instead of using the middlegame tables alone; implies positional.
 
         Returns:
-            int: The total score of the board.
+            int: The material balance in pawns, or in centipawns with the positional term.
         """
-        # Sum up piece values over both dimensions of the board using class attribute
-        total_score = sum(
-            Chessboard.piece_values[piece.piece_type] if piece.color == Color.WHITE else -Chessboard.piece_values[piece.piece_type]
-            for row in self.board for piece in row
-        )
-        return total_score
+        if not (positional or tapered):
+            return self.material
+        if tapered:
+            return self.material * 100 + taper(self.psq_middlegame, self.psq_endgame, self.phase)
+        return self.material * 100 + self.psq_middlegame
 
     def display_board_tk(self):
         """
-        Display the chess board using Tkinter.
-        Creates a window with a graphical representation of the current board state.
-        """
-        # Create the main window
-        root = tk.Tk()
-        root.title("Chess Board")
-        # Create a frame for the board
-        board_frame = tk.Frame(root)
-        board_frame.pack(padx=10, pady=10)        
-        # Define colors for the squares
-        colors = ["darkgrey", "gray"]       
-        # Dictionary to map pieces to unicode chess symbols
-        piece_symbols = {
-            (PieceType.KING, Color.WHITE): "♔",
-            (PieceType.QUEEN, Color.WHITE): "♕",
-            (PieceType.ROOK, Color.WHITE): "♖",
-            (PieceType.BISHOP, Color.WHITE): "♗",
-            (PieceType.NIGHT, Color.WHITE): "♘",
-            (PieceType.PAWN, Color.WHITE): "♙",
-            (PieceType.KING, Color.BLACK): "♚",
-            (PieceType.QUEEN, Color.BLACK): "♛",
-            (PieceType.ROOK, Color.BLACK): "♜",
-            (PieceType.BISHOP, Color.BLACK): "♝",
-            (PieceType.NIGHT, Color.BLACK): "♞",
-            (PieceType.PAWN, Color.BLACK): "♟"
-        }      
-        # Update the font to use Pecita
-        font_style = ("Arial", 70)  # Change font to Pecita with size 40
-
-        # Create the squares and place pieces
-        for row in range(8):
-            for col in range(8):
-                # Calculate square color
-                color = colors[(row + col) % 2]
-              
-                # Create square
-                square = tk.Frame(
-                    board_frame,
-                    width=60,
-                    height=60,
-                    bg=color
-                )
-                square.grid(row=row, column=col)
-                square.pack_propagate(False)
-                
-                # Get piece at current position
-                piece = self.get_piece(row, col)
-                
-                # If square is not empty, place piece symbol
-                if piece.piece_type != PieceType.EMPTY:
-                    piece_symbol = piece_symbols.get((piece.piece_type, piece.color), "")
-                    label = tk.Label(
-                        square,
-                        text=piece_symbol,
-                        font=font_style,  # Use the updated font style
-                        bg=color,
-                        fg="black" if piece.color == Color.BLACK else "white"
-                    )
-                    label.pack(expand=True)
-        
-        # Add column labels (a-h)
-        for col in range(8):
-            tk.Label(
-                board_frame,
-                text=chr(97 + col)
-            ).grid(row=8, column=col)
-        
-        # Add row labels (1-8)
-        for row in range(8):
-            tk.Label(
-                board_frame,
-                text=str(8 - row)
-            ).grid(row=row, column=8)
-        
-        root.mainloop() 
-        
+        Display the chess board in a Tkinter window, see gui.BoardView. Moves made in the
+        window by clicking are played on this board. Blocks until the window is closed.
+        """
+        from gui import show_board  # gui imports this module
+        show_board(self)
+
     def get_move_from_keyboard(self):
         """
         Get a move from keyboard input in chess notation (e.g., 'e2e4').
@@ -417,21 +871,347 @@ class Chessboard:
             except (ValueError, IndexError):
                 print("Invalid input format")
                 continue
+    @instrumented()
     def move_piece(self, start_row, start_col, end_row, end_col):
         """
         Move a piece from the starting position to the ending position.
+        Pawns reaching the last row are promoted to a queen.
         """
         piece = self.get_piece(start_row, start_col)
         if self.is_valid(start_row, start_col, end_row, end_col):
-            self.board[end_row][end_col] = piece
-            self.board[start_row][start_col] = Piece(PieceType.EMPTY, Color.NONE)
-            piece.row = end_row
-            piece.col = end_col
+            promotion = PieceType.EMPTY
+            if piece.piece_type == PieceType.PAWN and end_row in (0, 7):
+                promotion = PieceType.QUEEN
+            self.make_move(encode_move(start_row, start_col, end_row, end_col, promotion))
+            if self.move_cache is not None:
+                self.move_cache.invalidate()
             return True
         return False
-            
+
+    def make_move(self, move):
+        """
+        Play an encoded move without validating it and push an undo record, so that
+        unmake_move() can restore the position exactly. Handles castling, en passant and
+        promotion and updates the side to move, castling rights and move counters.
+
+        Args:
+            move (int): The encoded move, see encode_move().
+        """
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        board = self._grid
+        piece = board[start >> 3][start & 7]
+        captured_square = end
+        if piece.piece_type == PieceType.PAWN and end == self.en_passant and (start & 7) != (end & 7):
+            # The pawn captured en passant stands beside the start square
+            captured_square = (start & 56) | (end & 7)
+        captured = board[captured_square >> 3][captured_square & 7]
+        self.undo_stack.append((move, piece, captured, captured_square, self.castling_rights,
+                                self.en_passant, self.halfmove_clock, self.side_to_move, self.zobrist_key,
+                                self.material, self.psq_middlegame, self.psq_endgame, self.phase))
+        index = piece_index(piece.piece_type, piece.color)
+        end_index = index if not promotion else index + promotion - piece.piece_type.value
+        key = self.zobrist_key ^ PIECE_KEYS[index][start] ^ PIECE_KEYS[end_index][end]
+        middlegame = self.psq_middlegame - MIDDLEGAME_TABLES[index][start] + MIDDLEGAME_TABLES[end_index][end]
+        endgame = self.psq_endgame - ENDGAME_TABLES[index][start] + ENDGAME_TABLES[end_index][end]
+        if promotion:
+            self.material += self.index_values[end_index] - self.index_values[index]
+            self.phase += PHASE_WEIGHTS[end_index] - PHASE_WEIGHTS[index]
+        if captured.piece_type != PieceType.EMPTY:
+            captured_index = piece_index(captured.piece_type, captured.color)
+            if captured.piece_type == PieceType.KING:
+                self._kings[captured.color.value - 1] = None
+            key ^= PIECE_KEYS[captured_index][captured_square]
+            self.material -= self.index_values[captured_index]
+            self.phase -= PHASE_WEIGHTS[captured_index]
+            middlegame -= MIDDLEGAME_TABLES[captured_index][captured_square]
+            endgame -= ENDGAME_TABLES[captured_index][captured_square]
+
+        board[captured_square >> 3][captured_square & 7] = EMPTY_PIECE
+        board[start >> 3][start & 7] = EMPTY_PIECE
+        if promotion:
+            board[end >> 3][end & 7] = Piece(PieceType(promotion), piece.color, end >> 3, end & 7)
+        else:
+            board[end >> 3][end & 7] = piece
+            piece.row, piece.col = end >> 3, end & 7
+        if piece.piece_type == PieceType.KING:
+            self._kings[piece.color.value - 1] = end
+        if piece.piece_type == PieceType.KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            rook = board[rook_start >> 3][rook_start & 7]
+            board[rook_end >> 3][rook_end & 7] = rook
+            board[rook_start >> 3][rook_start & 7] = EMPTY_PIECE
+            rook.row, rook.col = rook_end >> 3, rook_end & 7
+            rook_index = index - PieceType.KING.value + PieceType.ROOK.value
+            key ^= PIECE_KEYS[rook_index][rook_start] ^ PIECE_KEYS[rook_index][rook_end]
+            middlegame += MIDDLEGAME_TABLES[rook_index][rook_end] - MIDDLEGAME_TABLES[rook_index][rook_start]
+            endgame += ENDGAME_TABLES[rook_index][rook_end] - ENDGAME_TABLES[rook_index][rook_start]
+        self.psq_middlegame, self.psq_endgame = middlegame, endgame
+
+        if piece.piece_type == PieceType.PAWN or captured.piece_type != PieceType.EMPTY:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        key ^= CASTLING_KEYS[self.castling_rights]
+        self.castling_rights &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        key ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        self.en_passant = (start + end) // 2 if piece.piece_type == PieceType.PAWN and abs(end - start) == 16 else None
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        if piece.color == Color.BLACK:
+            self.fullmove_number += 1
+        # move_piece does not enforce turns, so the side to move does not always flip
+        if self.side_to_move != OPPONENT[piece.color]:
+            key ^= BLACK_TO_MOVE_KEY
+        self.side_to_move = OPPONENT[piece.color]
+        self.zobrist_key = key
+
+    def unmake_move(self):
+        """
+        Take back the last move played with make_move() or move_piece().
+
+        Returns:
+            int: The move that was taken back.
+
+        Raises:
+            IndexError: If there is no move to take back.
+        """
+        move, piece, captured, captured_square, castling_rights, en_passant, halfmove_clock, side_to_move, \
+            self.zobrist_key, self.material, self.psq_middlegame, self.psq_endgame, self.phase = \
+            self.undo_stack.pop()
+        start, end = move & 63, move >> 6 & 63
+        board = self._grid
+        board[end >> 3][end & 7] = EMPTY_PIECE
+        board[captured_square >> 3][captured_square & 7] = captured
+        board[start >> 3][start & 7] = piece
+        piece.row, piece.col = start >> 3, start & 7
+        if piece.piece_type == PieceType.KING:
+            self._kings[piece.color.value - 1] = start
+        if captured.piece_type == PieceType.KING:
+            self._kings[captured.color.value - 1] = captured_square
+        if piece.piece_type == PieceType.KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            rook = board[rook_end >> 3][rook_end & 7]
+            board[rook_start >> 3][rook_start & 7] = rook
+            board[rook_end >> 3][rook_end & 7] = EMPTY_PIECE
+            rook.row, rook.col = rook_start >> 3, rook_start & 7
+        if piece.color == Color.BLACK:
+            self.fullmove_number -= 1
+        self.castling_rights, self.en_passant = castling_rights, en_passant
+        self.halfmove_clock, self.side_to_move = halfmove_clock, side_to_move
+        return move
+
+    def generate_legal_moves(self):
+        """
+        Generate all legal moves for the side to move, including castling,
+        en passant and promotions. Moves that leave the own king in check are removed.
+
+        Returns:
+            list: Encoded moves, see encode_move().
+        """
+        return self._legal_moves(self._pseudo_moves())
+
+    def generate_pseudo_legal_moves(self):
+        """
+        Generate the moves of the side to move without removing those that leave the own
+        king in check; the whole side at once, which is what generate_legal_moves() filters.
+
+        Returns:
+            list: Encoded moves, see encode_move().
+        """
+        return self._pseudo_moves()
+
+    def generate_captures(self):
+        """
+        Generate the legal captures, en passant captures and promotions of the side to move,
+        the first stage of staged move generation (see ordering.MoveOrderer.staged).
+
+        Returns:
+            list: Encoded moves, see encode_move().
+        """
+        return self._legal_moves(self._pseudo_moves(True))
+
+    def generate_quiets(self):
+        """
+        Generate the legal moves of the side to move that neither capture nor promote,
+        including castling. Together with generate_captures() these are all legal moves.
+
+        Returns:
+            list: Encoded moves, see encode_move().
+        """
+        return self._legal_moves(self._pseudo_moves(False))
+
+    def _pseudo_moves(self, noisy=None):
+        """
+        Return the pseudo-legal moves of the side to move.
+
+        Args:
+            noisy (bool): True for captures and promotions only, False for the other moves, None for all.
+        """
+        color = self.side_to_move
+        moves = []
+        for row in range(8):
+            for col in range(8):
+                piece = self._grid[row][col]
+                if piece.color != color:
+                    continue
+                pawn = piece.piece_type == PieceType.PAWN
+                for _, start_row, start_col, end_row, end_col in self.get_possible_moves(row, col):
+                    promotes = pawn and end_row in (0, 7)
+                    # A diagonal pawn move is always a capture, en passant included
+                    if noisy is not None and noisy != (promotes or (pawn and start_col != end_col) or
+                                                       self._grid[end_row][end_col].piece_type != PieceType.EMPTY):
+                        continue
+                    if promotes:
+                        moves.extend(encode_move(start_row, start_col, end_row, end_col, promotion)
+                                     for promotion in PROMOTION_TYPES)
+                    else:
+                        moves.append(encode_move(start_row, start_col, end_row, end_col))
+        return moves
+
+    def is_legal(self, move):
+        """
+        Check that an encoded move is legal in this position, e.g. a move from the
+        transposition table or a killer move, which may come from another position.
+
+        Args:
+            move (int): The encoded move.
+
+        Returns:
+            bool: True if the move is one of generate_legal_moves().
+        """
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        piece = self.get_piece(start >> 3, start & 7)
+        if piece.color != self.side_to_move or not self.is_valid(start >> 3, start & 7, end >> 3, end & 7):
+            return False
+        if piece.piece_type == PieceType.PAWN and end >> 3 in (0, 7):
+            if promotion not in PROMOTION_CODES:
+                return False
+        elif promotion:
+            return False
+        return bool(self._legal_moves([move]))
+
+    def see(self, move, codes=None):
+        """
+        Static exchange evaluation: the material a capture wins when both sides keep
+        recapturing on its end square with their least valuable attacker, each side
+        free to stop when going on would lose. Pieces behind the capturers (x-rays)
+        join in as the squares in front of them empty. The board is not changed.
+
+        Args:
+            move (int): The encoded move; quiet moves score what the opponent can win by capturing the piece.
+            codes (bytes): The board's square_codes(), when the caller has them already.
+
+        Returns:
+            int: The expected gain in centipawns for the side making the move.
+        """
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        bitboards, occupied = self._bitboards()  # Cached for the position, see _bitboards()
+        if codes is None:
+            codes = self.square_codes()
+        values = self.see_values
+        index = codes[start] - 1
+        side = 1 - index // 6
+        captured = codes[end]
+        gains = [values[(captured - 1) % 6] if captured else 0]
+        if index % 6 == 0 and end == self.en_passant and (start & 7) != (end & 7):
+            gains[0] = values[0]
+            occupied &= ~(1 << ((start & 56) | (end & 7)))
+        on_square = values[index % 6]
+        if promotion:
+            gains[0] += values[promotion - 1] - values[0]
+            on_square = values[promotion - 1]
+        occupied &= ~(1 << start)
+        while True:
+            base = side * 6
+            diagonal = bitboards[base + 3] | bitboards[base + 4]
+            straight = bitboards[base + 1] | bitboards[base + 4]
+            attackers = occupied & ((PAWN_ATTACKS[1 - side][end] & bitboards[base]) |
+                                    (KNIGHT_ATTACKS[end] & bitboards[base + 2]) |
+                                    (bishop_attacks(end, occupied) & diagonal) |
+                                    (rook_attacks(end, occupied) & straight) |
+                                    (KING_ATTACKS[end] & bitboards[base + 5]))
+            if not attackers:
+                break
+            # Least valuable attacker first: pawn, knight, bishop, rook, queen, king
+            offset = next(offset for offset in (0, 2, 3, 1, 4, 5) if attackers & bitboards[base + offset])
+            attacker = attackers & bitboards[base + offset]
+            gains.append(on_square - gains[-1])
+            on_square = values[offset]
+            occupied &= ~(attacker & -attacker)
+            side = 1 - side
+        # Each side may stop instead of capturing: minimax over the capture sequence, last capture first
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+        return gains[0]
+
+    def _legal_moves(self, moves):
+        """
+        Remove the pseudo-legal moves that leave the mover's king in check. Out of check,
+        only king moves, moves of pinned pieces and en passant captures can do that, so
+        only those are tested with _is_legal().
+        """
+        checkers, pinned = self._attack_info()
+        king = self._king_square(self.side_to_move)
+        if checkers or king is None:
+            return [move for move in moves if self._is_legal(move)]
+        en_passant = self.en_passant
+        return [move for move in moves
+                if not (move & 63 == king or pinned >> (move & 63) & 1 or move >> 6 & 63 == en_passant)
+                or self._is_legal(move)]
+
+    def _is_legal(self, move):
+        """Check that a pseudo-legal move does not leave the mover's king in check."""
+        color = self.side_to_move
+        self.make_move(move)
+        king = self._king_square(color)
+        legal = king is None or not self._is_attacked(king, OPPONENT[color])
+        self.unmake_move()
+        return legal
+
+    def perft(self, depth):
+        """
+        Count the leaf nodes of the legal move tree to the given depth. Comparing the
+        counts with published values is the standard test for a move generator.
+
+        Args:
+            depth (int): The number of plies to search.
+
+        Returns:
+            int: The number of leaf nodes.
+        """
+        if depth == 0:
+            return 1
+        moves = self.generate_legal_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.make_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+    def perft_divide(self, depth):
+        """
+        Return the perft count below each legal move, to find which move a wrong count comes from.
+
+        Returns:
+            dict: Node counts keyed by the move in coordinate notation, e.g. {'e2e4': 600, ...}
+        """
+        result = {}
+        for move in self.generate_legal_moves():
+            self.make_move(move)
+            result[move_to_uci(move)] = self.perft(depth - 1)
+            self.unmake_move()
+        return result
+
 if __name__ == "__main__":
+    from movecache import MoveCache
     board = Chessboard()
+    move_cache = MoveCache(board)
     print(board)  # Print the initial board configuration
     
     start_row, start_col,end_row,end_col= board.get_move_from_keyboard()
@@ -441,7 +1221,7 @@ if __name__ == "__main__":
     move_count = 0
     for piece in white_pieces:
         print( piece.color.name, piece.piece_type.name)
-        moves = board.get_possible_moves(piece.row, piece.col)  # Get possible moves for the current piece
+        moves = move_cache.get_possible_moves(piece.row, piece.col)  # Get possible moves for the current piece
         print(moves)
         move_count += len(moves)
     print(f"Number of white pieces: {len(white_pieces)} Total possible moves: {move_count}")
@@ -0,0 +1,275 @@
+"""Compact backend for the chessboard.
+The position is a 64-byte bytearray of square codes, piece_index + 1 for every
+square and 0 for empty squares, plus the few integers of game state kept by
+Chessboard. Piece objects are only created when get_piece() or the board property
+asks for them, and copying a position copies the one buffer.
+
+This is the backend for keeping many positions in memory; BitboardChessboard is
+faster at move generation but carries twelve bitboards on top of the same codes.
+"""
+import copy
+from chessboard import (CASTLING_MASK, CASTLING_MOVES, MOVE_TUPLES, OPPONENT, PROMOTION_TYPES, Chessboard, Color,
+                        Piece, PieceType, piece_index)
+from evaluation import ENDGAME_TABLES, MIDDLEGAME_TABLES, PHASE_WEIGHTS
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+from attacks import BETWEEN_SQUARES, BISHOP_RAYS, KING_TARGETS, KNIGHT_TARGETS, PAWN_ATTACKS, RAYS, ROOK_RAYS
+from instrumentation import instrumented
+
+# Piece types in code order and their offsets inside a color's six codes ((code - 1) % 6)
+PIECE_TYPES = [piece_type for piece_type in PieceType if piece_type != PieceType.EMPTY]
+PAWN, ROOK, NIGHT, BISHOP, QUEEN, KING = range(6)
+PROMOTION_VALUES = [piece_type.value for piece_type in PROMOTION_TYPES]
+COLORS = [Color.WHITE, Color.BLACK]
+# PAWN_TARGETS[color][square]: the squares a pawn of color (0 white, 1 black) attacks
+PAWN_TARGETS = [[[end for end in range(64) if mask >> end & 1] for mask in masks] for masks in PAWN_ATTACKS]
+SLIDING_RAYS = {ROOK: ROOK_RAYS, BISHOP: BISHOP_RAYS, QUEEN: RAYS}
+
+
+def _start_squares():
+    codes = bytearray(64)
+    back_rank = [PieceType.ROOK, PieceType.NIGHT, PieceType.BISHOP, PieceType.QUEEN,
+                 PieceType.KING, PieceType.BISHOP, PieceType.NIGHT, PieceType.ROOK]
+    for color, back_row, pawn_row in ((Color.WHITE, 7, 6), (Color.BLACK, 0, 1)):
+        for col, piece_type in enumerate(back_rank):
+            codes[back_row * 8 + col] = piece_index(piece_type, color) + 1
+            codes[pawn_row * 8 + col] = piece_index(PieceType.PAWN, color) + 1
+    return bytes(codes)
+
+
+START_SQUARES = _start_squares()
+
+
+class CompactChessboard(Chessboard):
+    """
+    A Chessboard whose position is stored as 64 bytes of square codes.
+    Attributes:
+        squares (bytearray): piece_index + 1 for every square, 0 for empty squares.
+    Example:
+        chessboard = CompactChessboard()
+        snapshot = chessboard.copy()  # Copies 64 bytes and the undo stack
+    """
+
+    # The grid of Piece objects is built on demand from the square codes
+    @property
+    def board(self):
+        """A fresh 8x8 grid of Piece objects; assigning a grid loads it."""
+        return [[self.get_piece(row, col) for col in range(8)] for row in range(8)]
+
+    @board.setter
+    def board(self, grid):
+        self._load_grid(grid)
+
+    def _load_square_codes(self, codes):
+        self.squares = bytearray(codes)
+
+    def square_codes(self):
+        return bytes(self.squares)
+
+    def initialize_board(self):
+        self.squares = bytearray(START_SQUARES)
+        self._reset_state()
+
+    def get_piece(self, row, col):
+        code = self.squares[row * 8 + col]
+        if not code:
+            return Piece(PieceType.EMPTY, Color.NONE, row, col)
+        return Piece(PIECE_TYPES[(code - 1) % 6], COLORS[(code - 1) // 6], row, col)
+
+    def copy(self):
+        board = copy.copy(self)
+        board.squares = bytearray(self.squares)
+        # Undo records only hold integers and enums, a shallow copy is independent
+        board.undo_stack = self.undo_stack[:]
+        board._attack_cache = {}
+        return board
+
+    def _targets(self, square):
+        """Return the pseudo-legal destination squares of the piece on square."""
+        squares = self.squares
+        code = squares[square]
+        if not code:
+            return []
+        color, offset = (code - 1) // 6, (code - 1) % 6
+        targets = []
+        if offset == PAWN:
+            step = -8 if color == 0 else 8
+            end = square + step
+            if 0 <= end < 64 and not squares[end]:
+                targets.append(end)
+                if square >> 3 == (6 if color == 0 else 1) and not squares[end + step]:
+                    targets.append(end + step)
+            en_passant_row = 2 if color == 0 else 5
+            for end in PAWN_TARGETS[color][square]:
+                target = squares[end]
+                if (target and (target - 1) // 6 != color) or (end == self.en_passant and end >> 3 == en_passant_row):
+                    targets.append(end)
+        elif offset == NIGHT or offset == KING:
+            for end in (KNIGHT_TARGETS if offset == NIGHT else KING_TARGETS)[square]:
+                target = squares[end]
+                if not target or (target - 1) // 6 != color:
+                    targets.append(end)
+            if offset == KING:
+                targets.extend(end for end in (square - 2, square + 2)
+                               if self._can_castle(square, end, COLORS[color]))
+        else:
+            for ray in SLIDING_RAYS[offset][square]:
+                for end in ray:
+                    target = squares[end]
+                    if not target:
+                        targets.append(end)
+                        continue
+                    if (target - 1) // 6 != color:
+                        targets.append(end)
+                    break
+        return targets
+
+    def _can_castle(self, start, end, color):
+        if end not in CASTLING_MOVES or start != (60 if color == Color.WHITE else 4) or abs(end - start) != 2:
+            return False
+        right, rook_start, _ = CASTLING_MOVES[end]
+        if not self.castling_rights & right or self.squares[rook_start] != piece_index(PieceType.ROOK, color) + 1:
+            return False
+        if any(self.squares[square] for square in BETWEEN_SQUARES[start][rook_start]):
+            return False
+        return not any(self._is_attacked(square, OPPONENT[color]) for square in (start, (start + end) // 2, end))
+
+    def _is_attacked(self, square, by_color):
+        squares = self.squares
+        by = 0 if by_color == Color.WHITE else 1
+        base = by * 6 + 1
+        if any(squares[target] == base + NIGHT for target in KNIGHT_TARGETS[square]):
+            return True
+        if any(squares[target] == base + KING for target in KING_TARGETS[square]):
+            return True
+        # The pawns attacking a square stand where a pawn of the other color on it would attack
+        if any(squares[target] == base + PAWN for target in PAWN_TARGETS[1 - by][square]):
+            return True
+        queen = base + QUEEN
+        for rays, slider in ((BISHOP_RAYS[square], base + BISHOP), (ROOK_RAYS[square], base + ROOK)):
+            for ray in rays:
+                for target in ray:
+                    code = squares[target]
+                    if code:
+                        if code == slider or code == queen:
+                            return True
+                        break
+        return False
+
+    def _king_square(self, color):
+        square = self.squares.find(piece_index(PieceType.KING, color) + 1)
+        return None if square < 0 else square
+
+    @instrumented()
+    def is_valid(self, start_row, start_col, end_row, end_col):
+        if not (0 <= start_row < 8 and 0 <= start_col < 8 and 0 <= end_row < 8 and 0 <= end_col < 8):
+            return False
+        return end_row * 8 + end_col in self._targets(start_row * 8 + start_col)
+
+    @instrumented()
+    def get_possible_moves(self, start_row, start_col):
+        square = start_row * 8 + start_col
+        code = self.squares[square]
+        if not code:
+            return []
+        moves = MOVE_TUPLES[(code - 1) % 6][square]
+        return [moves[end] for end in self._targets(square)]
+
+    def _pseudo_moves(self, noisy=None):
+        us = 0 if self.side_to_move == Color.WHITE else 1
+        squares = self.squares
+        moves = []
+        for start, code in enumerate(squares):
+            if not code or (code - 1) // 6 != us:
+                continue
+            pawn = (code - 1) % 6 == PAWN
+            for end in self._targets(start):
+                promotes = pawn and (end < 8 or end >= 56)
+                # Diagonal pawn moves are captures, en passant included
+                if noisy is not None and noisy != bool(promotes or squares[end] or
+                                                       (pawn and (start & 7) != (end & 7))):
+                    continue
+                move = start | end << 6
+                if promotes:
+                    moves.extend(move | promotion << 12 for promotion in PROMOTION_VALUES)
+                else:
+                    moves.append(move)
+        return moves
+
+    def make_move(self, move):
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        squares = self.squares
+        index = squares[start] - 1
+        color, offset = index // 6, index % 6
+        captured_square = end
+        if offset == PAWN and end == self.en_passant and (start & 7) != (end & 7):
+            captured_square = (start & 56) | (end & 7)
+        captured = squares[captured_square]
+        self.undo_stack.append((move, captured, captured_square, self.castling_rights, self.en_passant,
+                                self.halfmove_clock, self.side_to_move, self.zobrist_key,
+                                self.material, self.psq_middlegame, self.psq_endgame, self.phase))
+        end_index = color * 6 + promotion - 1 if promotion else index
+        key = self.zobrist_key ^ PIECE_KEYS[index][start] ^ PIECE_KEYS[end_index][end]
+        middlegame = self.psq_middlegame - MIDDLEGAME_TABLES[index][start] + MIDDLEGAME_TABLES[end_index][end]
+        endgame = self.psq_endgame - ENDGAME_TABLES[index][start] + ENDGAME_TABLES[end_index][end]
+        if promotion:
+            self.material += self.index_values[end_index] - self.index_values[index]
+            self.phase += PHASE_WEIGHTS[end_index] - PHASE_WEIGHTS[index]
+        if captured:
+            key ^= PIECE_KEYS[captured - 1][captured_square]
+            self.material -= self.index_values[captured - 1]
+            self.phase -= PHASE_WEIGHTS[captured - 1]
+            middlegame -= MIDDLEGAME_TABLES[captured - 1][captured_square]
+            endgame -= ENDGAME_TABLES[captured - 1][captured_square]
+
+        squares[captured_square] = 0
+        squares[start] = 0
+        squares[end] = end_index + 1
+        if offset == KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            rook_index = color * 6 + ROOK
+            squares[rook_start], squares[rook_end] = 0, rook_index + 1
+            key ^= PIECE_KEYS[rook_index][rook_start] ^ PIECE_KEYS[rook_index][rook_end]
+            middlegame += MIDDLEGAME_TABLES[rook_index][rook_end] - MIDDLEGAME_TABLES[rook_index][rook_start]
+            endgame += ENDGAME_TABLES[rook_index][rook_end] - ENDGAME_TABLES[rook_index][rook_start]
+        self.psq_middlegame, self.psq_endgame = middlegame, endgame
+
+        self.halfmove_clock = 0 if offset == PAWN or captured else self.halfmove_clock + 1
+        key ^= CASTLING_KEYS[self.castling_rights]
+        self.castling_rights &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        key ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        self.en_passant = None
+        if offset == PAWN and abs(end - start) == 16:
+            self.en_passant = (start + end) // 2
+            key ^= EN_PASSANT_KEYS[end & 7]
+        if color == 1:
+            self.fullmove_number += 1
+        # move_piece does not enforce turns, so the side to move does not always flip
+        side_to_move = COLORS[1 - color]
+        if side_to_move != self.side_to_move:
+            key ^= BLACK_TO_MOVE_KEY
+        self.side_to_move = side_to_move
+        self.zobrist_key = key
+
+    def unmake_move(self):
+        move, captured, captured_square, castling_rights, en_passant, halfmove_clock, side_to_move, \
+            self.zobrist_key, self.material, self.psq_middlegame, self.psq_endgame, self.phase = \
+            self.undo_stack.pop()
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        squares = self.squares
+        index = squares[end] - 1
+        color = index // 6
+        if promotion:
+            index = color * 6 + PAWN
+        squares[end] = 0
+        squares[captured_square] = captured
+        squares[start] = index + 1
+        if index % 6 == KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            squares[rook_start], squares[rook_end] = color * 6 + ROOK + 1, 0
+        if color == 1:
+            self.fullmove_number -= 1
+        self.castling_rights, self.en_passant = castling_rights, en_passant
+        self.halfmove_clock, self.side_to_move = halfmove_clock, side_to_move
+        return move
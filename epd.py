@@ -0,0 +1,121 @@
+"""Streaming reader for FEN and EPD files.
+Files are read one line at a time, either through the buffered file object or a
+read-only memory map, so a corpus of any size is processed in constant memory.
+Empty lines and lines starting with "#" are skipped.
+
+An EPD line holds the first four FEN fields followed by operations such as
+`bm Nf3; id "test 1";`. A FEN line has the two move counters instead.
+
+Example:
+    for board, operations in iter_positions("positions.epd"):
+        print(board.evaluate_board(), operations.get("id"))
+"""
+import mmap
+import os
+import sys
+import time
+from bitboard import BitboardChessboard
+
+
+def iter_lines(path, use_mmap=False):
+    """
+    Yield the non-empty, non-comment lines of a text file without loading it.
+
+    Args:
+        path (str): The file to read.
+        use_mmap (bool): Read through a read-only memory map instead of the buffered file.
+
+    Yields:
+        str: Each line without surrounding whitespace.
+    """
+    if use_mmap:
+        if not os.path.getsize(path):
+            return  # An empty file cannot be mapped
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for raw in iter(mapped.readline, b""):
+                line = raw.strip()
+                if line and not line.startswith(b"#"):
+                    yield line.decode()
+        return
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def parse_epd(line):
+    """
+    Split an EPD or FEN line into the position and its operations.
+
+    Args:
+        line (str): The line to parse.
+
+    Returns:
+        tuple: (fen, operations) where fen holds the position fields and operations maps
+        each opcode to its operand string with quotes removed ('' for opcodes without one).
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 5:
+        return line, {}
+    rest = fields[4]
+    counters = rest.split(None, 2)
+    if len(counters) >= 2 and counters[0].isdigit() and counters[1].isdigit():
+        # A FEN line; anything after the counters is still read as operations
+        fen = " ".join(fields[:4] + counters[:2])
+        rest = counters[2] if len(counters) > 2 else ""
+    else:
+        fen = " ".join(fields[:4])
+    operations = {}
+    for operation in _split_operations(rest):
+        opcode, _, operand = operation.partition(" ")
+        operations[opcode] = operand.strip().strip('"')
+    return fen, operations
+
+
+def _split_operations(text):
+    """Split operations at semicolons that are not inside a quoted string."""
+    operation, quoted = "", False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            if operation.strip():
+                yield operation.strip()
+            operation = ""
+        else:
+            operation += char
+    if operation.strip():
+        yield operation.strip()
+
+
+def iter_positions(path, backend=BitboardChessboard, use_mmap=False):
+    """
+    Yield the positions of a FEN or EPD file one at a time.
+
+    Args:
+        path (str): The file to read.
+        backend (type): The Chessboard class to create.
+        use_mmap (bool): Read through a read-only memory map.
+
+    Yields:
+        tuple: (board, operations), see parse_epd.
+
+    Raises:
+        ValueError: If a line is not a valid position; the message gives the position's number.
+    """
+    for number, line in enumerate(iter_lines(path, use_mmap), 1):
+        fen, operations = parse_epd(line)
+        try:
+            board = backend.from_fen(fen)
+        except ValueError as error:
+            raise ValueError(f"{path}, position {number}: {error}") from None
+        yield board, operations
+
+
+if __name__ == "__main__":
+    # Report the ingest rate of a file: python epd.py positions.epd [--mmap]
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_positions(sys.argv[1], use_mmap="--mmap" in sys.argv))
+    seconds = time.perf_counter() - start
+    print(f"{count} positions in {seconds:.2f} s, {count / seconds if seconds else 0:,.0f} positions/s")
@@ -0,0 +1,239 @@
+"""Tkinter board view and a game window against the engine.
+BoardView draws the board on one Canvas with a rectangle and a text item per
+square, created once. refresh() compares the board's square codes with what is
+shown and reconfigures only the squares that changed, so a move redraws two to
+four squares instead of the whole board.
+
+ChessGui adds click-to-move: a click on a piece highlights its legal targets and a
+click on one of them plays the move. The legal moves come from a MoveCache
+attached to the board, so selecting pieces again costs no move generation. The
+engine searches a copy of the board in a background thread; the Tk loop polls for
+its move with after(), so the window keeps drawing and answering clicks while the
+engine thinks.
+
+Example:
+    ChessGui(engine_color=Color.BLACK, think_time=1.0).run()
+"""
+import queue
+import threading
+import tkinter as tk
+from chessboard import OPPONENT, Color
+from bitboard import BitboardChessboard
+from movecache import MoveCache
+from search import find_best_move
+
+# Unicode symbols by square code (piece_index + 1), 0 for an empty square
+PIECE_SYMBOLS = " ♙♖♘♗♕♔♟♜♞♝♛♚"
+SQUARE_COLORS = ("darkgrey", "gray")
+SELECTED_COLOR = "#c8c85a"
+TARGET_COLOR = "#7fa650"
+# Milliseconds between checks for the engine's move, about one frame at 60 fps
+POLL_INTERVAL = 16
+
+
+def changed_squares(shown, codes):
+    """
+    Return the squares whose codes differ between two square code sequences.
+
+    Args:
+        shown (bytes): The codes currently drawn.
+        codes (bytes): The codes of the position to draw.
+
+    Returns:
+        list: The squares (row * 8 + col) to redraw.
+    """
+    return [square for square in range(64) if shown[square] != codes[square]]
+
+
+class BoardView:
+    """
+    A Canvas showing a board, redrawn square by square.
+    Attributes:
+        canvas (tk.Canvas): The canvas, already placed in its master with pack().
+        board (Chessboard): The board shown.
+        square_size (int): Width of a square in pixels.
+    """
+
+    def __init__(self, master, board, square_size=60):
+        """
+        Args:
+            master (tk.Widget): The parent widget.
+            board (Chessboard): The board to show.
+            square_size (int): Width of a square in pixels.
+        """
+        self.board = board
+        self.square_size = square_size
+        self.canvas = tk.Canvas(master, width=8 * square_size + 20, height=8 * square_size + 20,
+                                highlightthickness=0)
+        self.canvas.pack(padx=10, pady=10)
+        self.rectangles, self.texts = [], []
+        font = ("Arial", square_size * 2 // 3)
+        for square in range(64):
+            row, col = divmod(square, 8)
+            x, y = col * square_size, row * square_size
+            self.rectangles.append(self.canvas.create_rectangle(
+                x, y, x + square_size, y + square_size, fill=self.square_color(square), width=0))
+            self.texts.append(self.canvas.create_text(x + square_size // 2, y + square_size // 2, text="",
+                                                      font=font))
+        for index in range(8):
+            self.canvas.create_text(index * square_size + square_size // 2, 8 * square_size + 10,
+                                    text=chr(97 + index))
+            self.canvas.create_text(8 * square_size + 10, index * square_size + square_size // 2,
+                                    text=str(8 - index))
+        self.shown = bytes(64)
+        self.highlighted = []
+        self.refresh()
+
+    def square_color(self, square):
+        """Return the normal color of a square."""
+        return SQUARE_COLORS[(square >> 3) + (square & 7) & 1]
+
+    def refresh(self):
+        """
+        Redraw the squares that changed since the last refresh.
+
+        Returns:
+            int: The number of squares redrawn.
+        """
+        codes = self.board.square_codes()
+        changed = changed_squares(self.shown, codes)
+        for square in changed:
+            code = codes[square]
+            self.canvas.itemconfigure(self.texts[square], text=PIECE_SYMBOLS[code],
+                                      fill="white" if 0 < code <= 6 else "black")
+        self.shown = codes
+        return len(changed)
+
+    def highlight(self, squares, color):
+        """Color the given squares, see clear_highlights."""
+        for square in squares:
+            self.canvas.itemconfigure(self.rectangles[square], fill=color)
+        self.highlighted.extend(squares)
+
+    def clear_highlights(self):
+        """Restore the colors of the highlighted squares."""
+        for square in self.highlighted:
+            self.canvas.itemconfigure(self.rectangles[square], fill=self.square_color(square))
+        self.highlighted = []
+
+    def square_at(self, x, y):
+        """Return the square under a canvas position, None outside the board."""
+        col, row = x // self.square_size, y // self.square_size
+        return row * 8 + col if 0 <= row < 8 and 0 <= col < 8 else None
+
+
+class ChessGui:
+    """
+    A window to play against the engine, or to move both sides by hand.
+    Attributes:
+        root (tk.Tk): The main window.
+        view (BoardView): The board view.
+        board (Chessboard): The game position.
+        engine_color (Color): The side the engine plays, None for none.
+        moves (MoveCache): The legal moves of the positions shown, attached to board.
+    """
+
+    def __init__(self, board=None, engine_color=Color.BLACK, think_time=1.0, square_size=60):
+        """
+        Args:
+            board (Chessboard): The position to start from, the initial position if None.
+            engine_color (Color): The side the engine plays, None to move both sides by hand.
+            think_time (float): Seconds the engine searches per move.
+            square_size (int): Width of a square in pixels.
+        """
+        self.board = board if board is not None else BitboardChessboard()
+        self.engine_color = engine_color
+        self.think_time = think_time
+        self.root = tk.Tk()
+        self.root.title("Chess Board")
+        self.moves = MoveCache(self.board)
+        self.view = BoardView(self.root, self.board, square_size)
+        self.status = tk.Label(self.root, anchor="w")
+        self.status.pack(fill="x", padx=10, pady=(0, 10))
+        self.view.canvas.bind("<Button-1>", self.on_click)
+        self.selected = None
+        self.targets = []
+        self.results = queue.Queue()
+        self.thinking = False
+        self.update_status()
+        self.start_engine()
+
+    def run(self):
+        """Run the Tk event loop until the window is closed."""
+        self.root.mainloop()
+
+    def on_click(self, event):
+        """Select a piece of the side to move, or play the move to a highlighted target."""
+        square = self.view.square_at(event.x, event.y)
+        if square is None or self.thinking:
+            return
+        if self.selected is not None and square in self.targets:
+            self.board.move_piece(self.selected >> 3, self.selected & 7, square >> 3, square & 7)
+            self.deselect()
+            self.after_move()
+            return
+        self.deselect()
+        piece = self.board.get_piece(square >> 3, square & 7)
+        if piece.color != self.board.side_to_move:
+            return
+        self.targets = self.moves.lookup().targets(square)
+        self.selected = square
+        self.view.highlight([square], SELECTED_COLOR)
+        self.view.highlight(self.targets, TARGET_COLOR)
+
+    def deselect(self):
+        """Forget the selected piece and remove the highlights."""
+        self.view.clear_highlights()
+        self.selected, self.targets = None, []
+
+    def after_move(self):
+        """Redraw the changed squares and let the engine answer."""
+        self.view.refresh()
+        self.update_status()
+        self.start_engine()
+
+    def update_status(self):
+        """Show whose move it is, or the end of the game."""
+        side = self.board.side_to_move
+        if self.moves.lookup().moves:
+            text = f"{side.name.capitalize()} to move" + (" - thinking" if self.thinking else "")
+        else:
+            text = f"Checkmate, {OPPONENT[side].name.capitalize()} wins" if self.board.in_check() else "Stalemate"
+        self.status.configure(text=text)
+
+    def start_engine(self):
+        """Start a search in a background thread if it is the engine's turn."""
+        if self.board.side_to_move != self.engine_color or not self.moves.lookup().moves:
+            return
+        self.thinking = True
+        self.update_status()
+        board = self.board.copy()
+        threading.Thread(target=lambda: self.results.put(find_best_move(board, time_limit=self.think_time)),
+                         daemon=True).start()
+        self.root.after(POLL_INTERVAL, self.poll_engine)
+
+    def poll_engine(self):
+        """Play the engine's move once it is ready, otherwise check again after POLL_INTERVAL."""
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_INTERVAL, self.poll_engine)
+            return
+        self.thinking = False
+        if result.best_move:
+            self.board.make_move(result.best_move)
+        self.after_move()
+
+
+def show_board(board):
+    """
+    Show a board in a window without an engine, moving both sides by hand. Blocks until the window is closed.
+
+    Args:
+        board (Chessboard): The board, updated by the moves made in the window.
+    """
+    ChessGui(board, engine_color=None).run()
+
+
+if __name__ == "__main__":
+    ChessGui().run()
@@ -0,0 +1,181 @@
+"""Legal move cache for interactive front ends.
+A GUI asks for the moves of a square every time the user selects or hovers over
+it, and an API front end answers the same positions again and again. MoveCache
+computes the moves of a position once and keeps them in a bounded LRU table keyed
+by position snapshot (position.Position), so a position seen before is answered
+from the table even after other positions were played in between.
+
+An entry holds the lists of get_possible_moves() for all 64 squares, the legal
+moves of the side to move, and a 4096-bit legality bitmap indexed like the low
+bits of an encoded move, start square + end square * 64, so a legality check is
+one byte lookup.
+
+A cache attached to a board remembers the entry of the board's current position.
+move_piece() invalidates it explicitly; make_move() and unmake_move() do not, to
+keep the search free of overhead, but the entry is only reused while the board's
+Zobrist key matches it, so a stale entry is never returned.
+
+Example:
+    cache = MoveCache(board)
+    cache.get_possible_moves(6, 4)    # computed once per position
+    cache.is_valid(6, 4, 4, 4)        # O(1), legal moves only
+    print(cache.stats())
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from position import Position
+
+DEFAULT_SIZE = 256
+
+
+@dataclass(frozen=True, slots=True)
+class MoveLists:
+    """
+    The moves of one position.
+    Attributes:
+        moves (tuple): The legal moves of the side to move, encoded (see encode_move).
+        squares (tuple): For each square from a8 to h1, the tuples of get_possible_moves() for its piece,
+            of either colour.
+        legal (bytes): 512-byte bitmap with bit start + end * 64 (move & 4095) set when a legal move
+            goes from start to end.
+    """
+    moves: tuple
+    squares: tuple
+    legal: bytes
+
+    @classmethod
+    def from_board(cls, board):
+        """Compute the moves of the board's position."""
+        moves = tuple(board.generate_legal_moves())
+        squares = tuple(tuple(board.get_possible_moves(square >> 3, square & 7)) for square in range(64))
+        legal = bytearray(512)
+        for move in moves:
+            index = move & 4095
+            legal[index >> 3] |= 1 << (index & 7)
+        return cls(moves, squares, bytes(legal))
+
+    def is_legal(self, start, end):
+        """Check that a legal move goes from square start to square end."""
+        index = start | end << 6
+        return bool(self.legal[index >> 3] >> (index & 7) & 1)
+
+    def targets(self, start):
+        """Return the end squares of the legal moves from square start, in ascending order."""
+        return sorted({move >> 6 & 63 for move in self.moves if move & 63 == start})
+
+
+class MoveCache:
+    """
+    A bounded LRU cache of MoveLists by position.
+    Attributes:
+        size (int): The most positions kept; the least recently used one is evicted first.
+        board (Chessboard): The attached board, whose move_piece() invalidates the current entry, or None.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that computed the moves.
+        evictions (int): Entries dropped to stay within size.
+        invalidations (int): Calls of invalidate().
+    """
+
+    def __init__(self, board=None, size=DEFAULT_SIZE):
+        """
+        Args:
+            board (Chessboard): A board to attach, see attach().
+            size (int): The most positions to keep.
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.board = None
+        self.current = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        if board is not None:
+            self.attach(board)
+
+    def attach(self, board):
+        """Make board the default board of the lookups and let its move_piece() invalidate the cache."""
+        if self.board is not None:
+            self.board.move_cache = None
+        board.move_cache = self
+        self.board = board
+        self.current = None
+
+    def invalidate(self):
+        """Forget the entry of the attached board's current position; the LRU entries stay valid."""
+        self.current = None
+        self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries; the counters are kept."""
+        self.entries.clear()
+        self.current = None
+
+    def lookup(self, board=None):
+        """
+        Return the moves of a position, computing them on the first lookup.
+
+        Args:
+            board (Chessboard): The position, the attached board if None.
+
+        Returns:
+            MoveLists: The moves of the position.
+        """
+        attached = board is None or board is self.board
+        board = self.board if board is None else board
+        current = self.current
+        if attached and current is not None and current[0] == board.zobrist_key:
+            self.hits += 1
+            return current[1]
+        position = Position.from_board(board)
+        entry = self.entries.get(position)
+        if entry is None:
+            self.misses += 1
+            entry = self.entries[position] = MoveLists.from_board(board)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(position)
+        if attached:
+            self.current = (board.zobrist_key, entry)
+        return entry
+
+    def get_possible_moves(self, start_row, start_col, board=None):
+        """
+        Return what board.get_possible_moves(start_row, start_col) returns, from the cache.
+
+        Returns:
+            list: A list of tuples (piece_type.name, start_row, start_col, end_row, end_col).
+        """
+        return list(self.lookup(board).squares[start_row * 8 + start_col])
+
+    def is_valid(self, start_row, start_col, end_row, end_col, board=None):
+        """
+        Check that a move is legal for the side to move; unlike Chessboard.is_valid,
+        moves that leave the own king in check and moves of the other side are rejected.
+
+        Returns:
+            bool: True if a legal move goes from the start to the end square.
+        """
+        if not (0 <= start_row < 8 and 0 <= start_col < 8 and 0 <= end_row < 8 and 0 <= end_col < 8):
+            return False
+        return self.lookup(board).is_legal(start_row * 8 + start_col, end_row * 8 + end_col)
+
+    def legal_moves(self, board=None):
+        """Return the legal moves of the side to move, as generate_legal_moves() does."""
+        return list(self.lookup(board).moves)
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups answered from the cache, 0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Return the counters.
+
+        Returns:
+            dict: {'size', 'entries', 'hits', 'misses', 'evictions', 'invalidations', 'hit_rate'}.
+        """
+        return {"size": self.size, "entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "invalidations": self.invalidations, "hit_rate": self.hit_rate}
@@ -0,0 +1,173 @@
+"""Move ordering for the alpha-beta search.
+Alpha-beta prunes the most when the best move is searched first. MoveOrderer sorts
+the moves of a node by how likely they are to be best:
+
+1. the transposition table move,
+2. captures and promotions by MVV-LVA (most valuable victim, least valuable attacker),
+   using Chessboard.piece_values,
+3. the two killer moves of the ply: quiet moves that caused a beta cutoff in a
+   sibling node,
+4. the other quiet moves by their history score, a butterfly table indexed by side,
+   start and end square that grows every time the move causes a cutoff.
+
+MoveOrderer.staged() yields the moves in the same order but generates them in
+stages, each only when the moves before it are used up: the table move is checked
+with Chessboard.is_legal(), then come generate_captures(), the killers, and last
+generate_quiets(). After a cutoff on an early move the later stages never run.
+
+Example:
+    orderer = MoveOrderer()
+    moves = orderer.order(board, board.generate_legal_moves(), ply=0)
+    for move in orderer.staged(board, ply=1, tt_move=tt_move):
+        ...
+"""
+from chessboard import Chessboard, Color, PieceType
+
+# Sort keys of the move classes, far enough apart that the class always decides first
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 23, (1 << 23) - 1)
+# History scores are halved once one reaches this, so they stay below the killers
+HISTORY_LIMIT = 1 << 22
+# Piece values by square code (piece_index + 1), 0 for an empty square
+CODE_VALUES = [0] + [abs(value) for value in Chessboard.index_values]
+PROMOTION_VALUES = {piece_type.value: value for piece_type, value in Chessboard.piece_values.items()}
+
+
+def capture_score(codes, move, en_passant):
+    """
+    Return the MVV-LVA score of a capture or promotion, 0 for a quiet move.
+
+    Args:
+        codes (bytes): The square codes of the position, see Chessboard.square_codes.
+        move (int): The encoded move.
+        en_passant (int): The en passant square of the position, or None.
+    """
+    start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+    victim = CODE_VALUES[codes[end]]
+    attacker = CODE_VALUES[codes[start]]
+    if not victim and end == en_passant and attacker == 1 and (start & 7) != (end & 7):
+        victim = 1
+    if not victim and not promotion:
+        return 0
+    return CAPTURE_SCORE + (victim + PROMOTION_VALUES[promotion] if promotion else victim) * 128 - attacker
+
+
+def is_quiet(board, move):
+    """
+    Check that a move is neither a capture nor a promotion.
+
+    Args:
+        board (Chessboard): The position the move is played in.
+        move (int): The encoded move.
+    """
+    start, end = move & 63, move >> 6 & 63
+    if move >> 12 or board.get_piece(end >> 3, end & 7).piece_type != PieceType.EMPTY:
+        return False
+    return not (end == board.en_passant and (start & 7) != (end & 7)
+                and board.get_piece(start >> 3, start & 7).piece_type == PieceType.PAWN)
+
+
+class MoveOrderer:
+    """
+    Killer moves and history scores collected during a search, and the sort that uses them.
+    Attributes:
+        killers (list): Two killer moves per ply, 0 for an empty slot.
+        history (list): Scores indexed by side * 4096 + start + end * 64, i.e. move & 4095.
+    """
+
+    def __init__(self, max_ply=128):
+        """
+        Args:
+            max_ply (int): The deepest ply that can be searched.
+        """
+        self.killers = [[0, 0] for _ in range(max_ply + 1)]
+        self.history = [0] * 8192
+
+    def new_search(self):
+        """Forget the killers, which belong to the previous position, and age the history."""
+        for slots in self.killers:
+            slots[0] = slots[1] = 0
+        self.history = [score >> 1 for score in self.history]
+
+    def order(self, board, moves, ply, tt_move=0):
+        """
+        Return the moves sorted best first.
+
+        Args:
+            board (Chessboard): The position the moves are played in.
+            moves (list): The encoded moves.
+            ply (int): Distance from the root, selects the killer slots.
+            tt_move (int): The transposition table move, searched first; 0 if there is none.
+
+        Returns:
+            list: The same moves in search order.
+        """
+        codes = board.square_codes()
+        en_passant = board.en_passant
+        first, second = self.killers[ply]
+        history = self.history
+        side = 0 if board.side_to_move == Color.WHITE else 4096
+
+        def score(move):
+            if move == tt_move:
+                return TT_MOVE_SCORE
+            value = capture_score(codes, move, en_passant)
+            if value:
+                return value
+            if move == first:
+                return KILLER_SCORES[0]
+            if move == second:
+                return KILLER_SCORES[1]
+            return history[side + (move & 4095)]
+        return sorted(moves, key=score, reverse=True)
+
+    def staged(self, board, ply, tt_move=0):
+        """
+        Yield the legal moves of the side to move in the order of order(), generating
+        each stage only when it is reached. The board must be back in the same
+        position whenever the next move is requested.
+
+        Args:
+            board (Chessboard): The position.
+            ply (int): Distance from the root, selects the killer slots.
+            tt_move (int): The transposition table move, searched first; 0 if there is none.
+
+        Yields:
+            int: Encoded moves, each legal move exactly once.
+        """
+        if tt_move and board.is_legal(tt_move):
+            yield tt_move
+        codes = board.square_codes()
+        en_passant = board.en_passant
+        captures = board.generate_captures()
+        for move in sorted(captures, key=lambda move: capture_score(codes, move, en_passant), reverse=True):
+            if move != tt_move:
+                yield move
+        killers = [move for move in self.killers[ply] if move and move != tt_move]
+        # Killers come from sibling positions, where they were quiet; here they may not even be legal
+        killers = [move for move in killers if is_quiet(board, move) and board.is_legal(move)]
+        yield from killers
+        history = self.history
+        side = 0 if board.side_to_move == Color.WHITE else 4096
+        for move in sorted(board.generate_quiets(), key=lambda move: history[side + (move & 4095)], reverse=True):
+            if move != tt_move and move not in killers:
+                yield move
+
+    def update(self, board, move, ply, depth):
+        """
+        Record a quiet move that caused a beta cutoff, in the killer slots and the history.
+
+        Args:
+            board (Chessboard): The position the move was played in.
+            move (int): The encoded move.
+            ply (int): Distance from the root.
+            depth (int): Remaining depth of the node; deeper cutoffs count more.
+        """
+        slots = self.killers[ply]
+        if slots[0] != move:
+            slots[0], slots[1] = move, slots[0]
+        index = (0 if board.side_to_move == Color.WHITE else 4096) + (move & 4095)
+        self.history[index] += depth * depth
+        if self.history[index] >= HISTORY_LIMIT:
+            self.history = [score >> 1 for score in self.history]
@@ -0,0 +1,141 @@
+"""Parallel search over a process pool by root move splitting.
+The legal moves of the root position are dealt out round-robin to the workers.
+Each worker runs the ordinary iterative deepening search (search.Searcher) on its
+share of the moves, in its own process with its own transposition table, and
+reports every finished iteration. The results are merged at the deepest iteration
+that all workers finished, so the compared scores come from searches of equal depth.
+
+stop() ends a search early through an event shared with the workers, which check
+it as they check their time limit.
+
+Workers receive the position as a FEN string and the keys of the positions played
+before it, so that they see repetitions of the game as the single search does.
+
+Example:
+    with ParallelSearcher(workers=8) as searcher:
+        result = searcher.search(board, time_limit=5.0)
+        print(move_to_uci(result.best_move), result.score, result.depth)
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from search import MAX_PLY, SearchResult, Searcher
+from transposition import TranspositionTable
+
+
+def _search_share(backend, fen, moves, max_depth, time_limit, node_limit, hash_mb, stop_event, history=None):
+    """
+    Worker entry point: search the given root moves and return every finished iteration.
+
+    Returns:
+        tuple: (iterations, nodes, last) where iterations is a list of (depth, best_move, score, pv)
+            and last is the search's result in the same form, which may come from an unfinished iteration.
+    """
+    board = backend.from_fen(fen)
+    iterations = []
+    searcher = Searcher(TranspositionTable(hash_mb))
+    searcher.stop_event = stop_event
+    result = searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit,
+                             root_moves=moves, history=history,
+                             on_iteration=lambda result: iterations.append((result.depth, result.best_move,
+                                                                            result.score, result.pv)))
+    return iterations, searcher.nodes, (result.depth, result.best_move, result.score, result.pv)
+
+
+class ParallelSearcher:
+    """
+    A pool of worker processes that search positions together. The pool is started
+    once and reused, so create one ParallelSearcher per program rather than per move.
+    Attributes:
+        workers (int): The number of worker processes.
+        hash_mb (float): Transposition table size of each worker in megabytes.
+        stop_event: The event behind stop(), shared with the workers.
+    """
+
+    def __init__(self, workers=None, hash_mb=16):
+        """
+        Args:
+            workers (int): Worker processes, the number of CPUs if None.
+            hash_mb (float): Transposition table size of each worker in megabytes.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.hash_mb = hash_mb
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # A manager event can be passed to the pool workers, unlike a plain multiprocessing.Event
+        self._manager = multiprocessing.Manager()
+        self.stop_event = self._manager.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes."""
+        self.pool.shutdown()
+        self._manager.shutdown()
+
+    def stop(self):
+        """
+        Make a running search return early, from another thread. The request stays
+        in force until stop_event is cleared.
+        """
+        self.stop_event.set()
+
+    def search(self, board, max_depth=MAX_PLY, time_limit=None, node_limit=None, history=None):
+        """
+        Search the position on board with all workers.
+
+        Args:
+            board (Chessboard): The position to search, side_to_move moves first.
+            max_depth (int): The deepest iteration to run.
+            time_limit (float): Seconds to search, None for no limit.
+            node_limit (int): Nodes to search per worker, None for no limit.
+            history (list): The repetition keys of the positions before this one, see Searcher.search.
+
+        Returns:
+            SearchResult: The merged result; nodes counts the nodes of all workers.
+        """
+        start = time.perf_counter()
+        moves = board.generate_legal_moves()
+        if len(moves) < 2:
+            # Nothing to split, a single search also finds mates and stalemates
+            searcher = Searcher(TranspositionTable(self.hash_mb))
+            searcher.stop_event = self.stop_event
+            return searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit,
+                                   history=history)
+        shares = [moves[worker::self.workers] for worker in range(min(self.workers, len(moves)))]
+        fen = board.to_fen()
+        futures = [self.pool.submit(_search_share, type(board), fen, share, max_depth, time_limit, node_limit,
+                                    self.hash_mb, self.stop_event, history) for share in shares]
+        reports = [future.result() for future in futures]
+        nodes = sum(worker_nodes for _, worker_nodes, _ in reports)
+        seconds = time.perf_counter() - start
+
+        # Compare the workers at the deepest iteration every one of them finished
+        depth = min((iterations[-1][0] if iterations else 0) for iterations, _, _ in reports)
+        if depth == 0:
+            # Some worker stopped in its first iteration: the best move any worker searched
+            _, best_move, score, pv = max((last for _, _, last in reports), key=lambda last: last[2])
+            return SearchResult(best_move, score, 0, nodes, seconds, pv)
+        best = max((next(iteration for iteration in iterations if iteration[0] == depth)
+                    for iterations, _, _ in reports), key=lambda iteration: iteration[2])
+        _, best_move, score, pv = best
+        return SearchResult(best_move, score, depth, nodes, seconds, pv)
+
+
+def parallel_find_best_move(board, workers=None, time_limit=1.0, max_depth=MAX_PLY, node_limit=None):
+    """
+    Search board with a temporary ParallelSearcher and return its SearchResult.
+
+    Args:
+        board (Chessboard): The position to search.
+        workers (int): Worker processes, the number of CPUs if None.
+        time_limit (float): Seconds to search, None for no limit.
+        max_depth (int): The deepest iteration to run.
+        node_limit (int): Nodes to search per worker, None for no limit.
+    """
+    with ParallelSearcher(workers) as searcher:
+        return searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit)
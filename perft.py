@@ -0,0 +1,68 @@
+"""Perft reference positions and benchmark.
+Perft counts the leaf nodes of the legal move tree. The published counts below
+(from the Chess Programming Wiki) catch almost every move generator bug, and the
+time taken gives the move generation speed in nodes per second.
+Run with `python perft.py [depth]`.
+"""
+import sys
+import time
+from chessboard import Chessboard
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+
+# (name, FEN, node counts for depth 1, 2, 3, ...)
+PERFT_POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def run_perft_suite(depth=3, backend=BitboardChessboard, verbose=True):
+    """
+    Run perft on every reference position and compare with the published counts.
+
+    Args:
+        depth (int): The depth to search; positions with fewer known counts use their deepest.
+        backend (type): The Chessboard class to test.
+        verbose (bool): Print one line per position.
+
+    Returns:
+        list: One dict per position with name, depth, nodes, expected, passed, seconds and nps.
+    """
+    results = []
+    for name, fen, counts in PERFT_POSITIONS:
+        board = backend.from_fen(fen)
+        search_depth = min(depth, len(counts))
+        start = time.perf_counter()
+        nodes = board.perft(search_depth)
+        seconds = time.perf_counter() - start
+        result = {"name": name, "depth": search_depth, "nodes": nodes,
+                  "expected": counts[search_depth - 1], "passed": nodes == counts[search_depth - 1],
+                  "seconds": seconds, "nps": nodes / seconds if seconds else 0.0}
+        results.append(result)
+        if verbose:
+            status = "ok" if result["passed"] else f"FAILED (expected {result['expected']})"
+            print(f"{name:12} depth {search_depth} {nodes:10} nodes {result['nps']:12,.0f} nps  {status}")
+    return results
+
+
+if __name__ == "__main__":
+    suite_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for suite_backend in (Chessboard, BitboardChessboard, CompactChessboard):
+        print(suite_backend.__name__)
+        suite_results = run_perft_suite(suite_depth, suite_backend)
+        total_nodes = sum(result["nodes"] for result in suite_results)
+        total_seconds = sum(result["seconds"] for result in suite_results)
+        print(f"Total {total_nodes} nodes, {total_nodes / total_seconds:,.0f} nps")
+        if not all(result["passed"] for result in suite_results):
+            sys.exit(1)
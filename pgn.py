@@ -0,0 +1,338 @@
+"""SAN moves and streaming PGN reading.
+move_from_san() and move_to_san() convert between Standard Algebraic Notation
+('Nf3', 'exd5', 'O-O', 'e8=Q+') and encoded moves. iter_games() reads a PGN file
+one line at a time and yields one Game per game, so archives of any size are read
+in constant memory. map_games() spreads the games of one file over a process pool:
+the parent only scans for the byte offset of each game, handing out ranges of the
+file while it scans, and every worker parses and processes its own range.
+
+Example:
+    for game in iter_games("games.pgn"):
+        for board, move in game.replay():
+            print(board.to_fen())
+"""
+import os
+import re
+from collections import deque
+from itertools import chain, islice, pairwise
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from chessboard import FEN_PIECES, Color, PieceType
+from bitboard import BitboardChessboard
+
+_SAN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h])([1-8])(?:=?([NBRQ]))?")
+_TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Movetext tokens: results, move numbers, comments, variations, NAGs and moves
+_TOKEN = re.compile(r'1-0|0-1|1/2-1/2|\*|\d+\.+|[{};()]|\$\d+|[^\s{};()$]+')
+_COMMENT_START = re.compile(rb"[{;]")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+CASTLING_SAN = {"O-O": 2, "O-O-O": -2, "0-0": 2, "0-0-0": -2}
+
+
+def move_from_san(board, san):
+    """
+    Parse a move in Standard Algebraic Notation for the side to move.
+
+    Args:
+        board (Chessboard): The position the move is played in.
+        san (str): The move, e.g. 'Nbd7', 'exd6', 'O-O-O' or 'b1=Q+'; check and
+            annotation marks are ignored.
+
+    Returns:
+        int: The encoded move, see encode_move().
+
+    Raises:
+        ValueError: If the text is not a legal move or is ambiguous.
+    """
+    text = san.rstrip("+#!?")
+    us = 0 if board.side_to_move == Color.WHITE else 1
+    codes = board.square_codes()
+    if text in CASTLING_SAN:
+        piece_type, start_file, start_rank = PieceType.KING, None, None
+        start = codes.find(us * 6 + PieceType.KING.value)
+        if start < 0:
+            raise ValueError(f"Cannot castle without a king: {san!r}")
+        end, promotion = start + CASTLING_SAN[text], 0
+    else:
+        match = _SAN.fullmatch(text)
+        if not match:
+            raise ValueError(f"Invalid SAN move {san!r}")
+        letter, file, rank, end_file, end_rank, promoted = match.groups()
+        piece_type = FEN_PIECES[letter] if letter else PieceType.PAWN
+        start_file = ord(file) - 97 if file else None
+        start_rank = 8 - int(rank) if rank else None
+        end = (8 - int(end_rank)) * 8 + ord(end_file) - 97
+        promotion = FEN_PIECES[promoted].value if promoted else 0
+        if piece_type == PieceType.PAWN and (end < 8 or end >= 56) and not promotion:
+            raise ValueError(f"Promotion piece missing: {san!r}")
+        if promotion and piece_type != PieceType.PAWN:
+            raise ValueError(f"Only pawns promote: {san!r}")
+    code = us * 6 + piece_type.value
+    candidates = []
+    for start, square_code in enumerate(codes):
+        if square_code != code or (start_file is not None and start & 7 != start_file) \
+                or (start_rank is not None and start >> 3 != start_rank):
+            continue
+        for _, _, _, end_row, end_col in board.get_possible_moves(start >> 3, start & 7):
+            if end_row * 8 + end_col == end:
+                move = start | end << 6 | promotion << 12
+                if board.is_legal(move):
+                    candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(f"{'Ambiguous' if candidates else 'Illegal'} move {san!r} in {board.to_fen()}")
+    return candidates[0]
+
+
+def move_to_san(board, move):
+    """
+    Return a legal move in Standard Algebraic Notation, with '+' or '#' for check and mate.
+
+    Args:
+        board (Chessboard): The position the move is played in.
+        move (int): The encoded move.
+
+    Returns:
+        str: The move, e.g. 'Nbd7'.
+    """
+    start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+    codes = board.square_codes()
+    code = codes[start]
+    piece_type = PieceType((code - 1) % 6 + 1)
+    if piece_type == PieceType.KING and abs(end - start) == 2:
+        text = "O-O" if end > start else "O-O-O"
+    else:
+        square = f"{chr(97 + (end & 7))}{8 - (end >> 3)}"
+        capture = codes[end] or (piece_type == PieceType.PAWN and start & 7 != end & 7)
+        if piece_type == PieceType.PAWN:
+            text = f"{chr(97 + (start & 7))}x{square}" if capture else square
+            if promotion:
+                text += "=" + PieceType(promotion).name[0]
+        else:
+            # Other pieces of the same kind that can reach the square
+            rivals = [other & 63 for other in board.generate_legal_moves()
+                      if other >> 6 & 63 == end and other & 63 != start and codes[other & 63] == code]
+            prefix = ""
+            if rivals:
+                if all(rival & 7 != start & 7 for rival in rivals):
+                    prefix = chr(97 + (start & 7))
+                elif all(rival >> 3 != start >> 3 for rival in rivals):
+                    prefix = str(8 - (start >> 3))
+                else:
+                    prefix = f"{chr(97 + (start & 7))}{8 - (start >> 3)}"
+            text = piece_type.name[0] + prefix + ("x" if capture else "") + square
+    board.make_move(move)
+    if board.in_check():
+        text += "#" if not board.generate_legal_moves() else "+"
+    board.unmake_move()
+    return text
+
+
+@dataclass
+class Game:
+    """
+    One game read from a PGN file.
+    Attributes:
+        headers (dict): The tag pairs, e.g. {'White': 'Carlsen, M', 'Result': '1-0'}.
+        moves (list): The moves of the main line in SAN, without annotations.
+        result (str): The game termination marker: '1-0', '0-1', '1/2-1/2' or '*'.
+        offset (int): Byte offset of the game in its file.
+    """
+    headers: dict = field(default_factory=dict)
+    moves: list = field(default_factory=list)
+    result: str = "*"
+    offset: int = 0
+
+    def start_board(self, backend=BitboardChessboard):
+        """Return the starting position, taken from the FEN tag if there is one."""
+        fen = self.headers.get("FEN")
+        return backend.from_fen(fen) if fen else backend()
+
+    def replay(self, backend=BitboardChessboard):
+        """
+        Play the moves of the game.
+
+        Args:
+            backend (type): The Chessboard class to use.
+
+        Yields:
+            tuple: (board, move) after each move; board is the same object every time.
+
+        Raises:
+            ValueError: If a move is illegal, with the move number in the message.
+        """
+        board = self.start_board(backend)
+        for ply, san in enumerate(self.moves):
+            try:
+                move = move_from_san(board, san)
+            except ValueError as error:
+                raise ValueError(f"Game at offset {self.offset}, ply {ply + 1}: {error}") from None
+            board.make_move(move)
+            yield board, move
+
+
+def _is_tag(line):
+    return line.startswith(b"[")
+
+
+def _comment_open(line, in_comment):
+    """Return whether a {...} comment is still open at the end of a line of movetext."""
+    position = 0
+    while True:
+        if in_comment:
+            position = line.find(b"}", position) + 1
+            if not position:
+                return True
+            in_comment = False
+        match = _COMMENT_START.search(line, position)
+        if match is None or match.group() == b";":
+            return False  # A ';' comment runs to the end of the line
+        in_comment, position = True, match.end()
+
+
+def _scan_lines(file, start=0):
+    """
+    Read the lines of a PGN file, telling where games start. Shared by iter_games() and
+    scan_game_offsets(), so both split a file into the same games: a tag line starts a new
+    game after movetext, except inside a {...} comment.
+
+    Args:
+        file: The PGN file, opened in binary mode.
+        start (int): The offset the file is positioned at; must be the start of a game.
+
+    Yields:
+        tuple: (offset, line, new_game, in_comment) for each non-empty line: its byte offset,
+        the stripped bytes, whether a game starts with it, and whether a comment is open
+        at its start (None for tag lines).
+    """
+    started = in_movetext = in_comment = False
+    offset = start
+    for raw in iter(file.readline, b""):
+        line_offset, offset = offset, offset + len(raw)
+        line = raw.strip()
+        if not line or raw.startswith(b"%"):
+            continue
+        tag = _is_tag(line) and not in_comment
+        new_game = not started or tag and in_movetext
+        started = True
+        if new_game:
+            in_movetext = False
+        if tag and not in_movetext:
+            yield line_offset, line, new_game, None
+            continue
+        in_movetext = True
+        yield line_offset, line, new_game, in_comment
+        in_comment = _comment_open(line, in_comment)
+
+
+def iter_games(path, start=0, stop=None):
+    """
+    Read the games of a PGN file one at a time. Comments, variations and NAGs are skipped.
+
+    Args:
+        path (str): The PGN file.
+        start (int): Byte offset to start reading at; must be the start of a game.
+        stop (int): Stop before the first game starting at or after this offset, None for the end.
+
+    Yields:
+        Game: Each game with its headers, main line moves and result.
+    """
+    game = None
+    depth = 0
+    with open(path, "rb") as file:
+        file.seek(start)
+        for line_offset, line, new_game, in_comment in _scan_lines(file, start):
+            if new_game:
+                if stop is not None and line_offset >= stop:
+                    break
+                if game is not None:
+                    yield game
+                game, depth = Game(offset=line_offset), 0
+            text = line.decode("utf-8", errors="replace")
+            if in_comment is None:
+                match = _TAG.match(text)
+                if match:
+                    game.headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+                continue
+            depth = _read_movetext(text, game, in_comment, depth)
+    if game is not None:
+        yield game
+
+
+def _read_movetext(text, game, in_comment, depth):
+    """Add the moves and result of one line of movetext to game; return the variation depth at its end."""
+    position = 0
+    if in_comment:
+        position = text.find("}") + 1
+        if not position:
+            return depth
+    for match in _TOKEN.finditer(text, position):
+        if match.start() < position:
+            continue  # Inside a comment closed on this line
+        token = match.group()
+        if token == "{":
+            position = text.find("}", match.end()) + 1
+            if not position:
+                return depth
+        elif token == ";":
+            break  # Comment to the end of the line
+        elif token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(depth - 1, 0)
+        elif depth or token[0] == "$" or token[0].isdigit() and token.endswith(".") or token == "e.p.":
+            continue
+        elif token in RESULTS:
+            game.result = token
+        else:
+            game.moves.append(token.rstrip("!?"))
+    return depth
+
+
+def scan_game_offsets(path):
+    """
+    Yield the byte offset of every game in a PGN file without parsing the moves.
+    The games are the ones iter_games() reads.
+
+    Args:
+        path (str): The PGN file.
+
+    Yields:
+        int: The offsets, ascending.
+    """
+    with open(path, "rb") as file:
+        for offset, _, new_game, _ in _scan_lines(file):
+            if new_game:
+                yield offset
+
+
+def _map_range(path, start, stop, function):
+    return [function(game) for game in iter_games(path, start, stop)]
+
+
+def map_games(path, function, workers=None, games_per_task=256):
+    """
+    Apply function to every game of a PGN file in a process pool. The file is scanned
+    for game offsets as tasks are handed out, and at most two tasks per worker are
+    pending at a time, so memory stays bounded however large the file.
+
+    Args:
+        path (str): The PGN file.
+        function (callable): A picklable (module level) function taking a Game.
+        workers (int): Worker processes, the number of CPUs if None.
+        games_per_task (int): Games parsed by a worker per task.
+
+    Yields:
+        The results of function in file order.
+    """
+    # Every games_per_task-th offset starts a range, which ends where the next one starts
+    starts = islice(scan_game_offsets(path), 0, None, games_per_task)
+    ranges = pairwise(chain(starts, [None]))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(_map_range, path, start, stop, function))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,147 @@
+"""Immutable position snapshots.
+A Position holds a position as 64 bytes of square codes (the codes of
+Chessboard.square_codes) and the game state, and never changes after it is made.
+It can therefore be shared by threads, used as a dictionary key, and pickled to
+worker processes in about 160 bytes, none of which is safe or cheap with a
+Chessboard, whose moves change the Piece objects on it in place.
+
+Position.from_board() copies the codes of a board, child(move) applies an encoded
+move to the codes without building a board and updates the Zobrist key
+incrementally, and to_board() turns a snapshot back into a board of any backend.
+Two snapshots are equal when they have the same pieces, side to move, castling
+rights and en passant square, the fields the Zobrist key covers; the move counters
+do not count. Their hash is the Zobrist key.
+
+Example:
+    position = Position.from_board(board)
+    seen = {position: score}
+    after = position.child(move_from_uci("e2e4"))
+    board = after.to_board(BitboardChessboard)
+"""
+from dataclasses import dataclass
+from chessboard import (CASTLING_MASK, CASTLING_MOVES, FEN_CASTLING, PROMOTION_CODES, Color, PieceType,
+                        format_fen_placement)
+from bitboard import BitboardChessboard
+from zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS
+
+# Offsets of pawn and king inside a color's six codes ((code - 1) % 6)
+_PAWN, _KING = PieceType.PAWN.value - 1, PieceType.KING.value - 1
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Position:
+    """
+    A frozen, hashable snapshot of a position.
+    Attributes:
+        codes (bytes): piece_index + 1 for each square from a8 to h1, 0 for empty squares.
+        side_to_move (Color): The side to move.
+        castling_rights (int): Bit set of the remaining castling rights.
+        en_passant (int): The square a pawn can capture en passant on, or None.
+        halfmove_clock (int): Moves since the last capture or pawn move.
+        fullmove_number (int): The number of the full move, starting at 1.
+        key (int): The Zobrist key, the same as the zobrist_key of a board in this position.
+    """
+    codes: bytes
+    side_to_move: Color
+    castling_rights: int
+    en_passant: int
+    halfmove_clock: int
+    fullmove_number: int
+    key: int
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Take a snapshot of a board; copies its 64 square codes.
+
+        Args:
+            board (Chessboard): The board, of any backend.
+
+        Returns:
+            Position: The snapshot.
+        """
+        return cls(board.square_codes(), board.side_to_move, board.castling_rights, board.en_passant,
+                   board.halfmove_clock, board.fullmove_number, board.zobrist_key)
+
+    def to_board(self, backend=BitboardChessboard):
+        """
+        Return a new board in this position, with an empty move history.
+
+        Args:
+            backend (type): The Chessboard class to create.
+        """
+        board = backend.__new__(backend)
+        board._load_square_codes(self.codes)
+        board._reset_state(self.side_to_move, self.castling_rights, self.en_passant, self.halfmove_clock,
+                           self.fullmove_number)
+        return board
+
+    def child(self, move):
+        """
+        Return the snapshot after a move, following the rules of Chessboard.make_move.
+        The move is not validated, see Chessboard.is_legal.
+
+        Args:
+            move (int): The encoded move, see encode_move().
+
+        Returns:
+            Position: The new snapshot; this one is unchanged.
+
+        Raises:
+            ValueError: If the start square is empty or the promotion piece is invalid.
+        """
+        start, end, promotion = move & 63, move >> 6 & 63, move >> 12
+        codes = bytearray(self.codes)
+        index = codes[start] - 1
+        if index < 0:
+            raise ValueError(f"No piece on the start square of move {move}")
+        if promotion and promotion not in PROMOTION_CODES:
+            raise ValueError(f"Invalid promotion piece in move {move}")
+        color, offset = index // 6, index % 6
+        captured_square = end
+        if offset == _PAWN and end == self.en_passant and (start & 7) != (end & 7):
+            # The pawn captured en passant stands beside the start square
+            captured_square = (start & 56) | (end & 7)
+        captured = codes[captured_square]
+        end_index = index + promotion - PieceType.PAWN.value if promotion else index
+        key = self.key ^ PIECE_KEYS[index][start] ^ PIECE_KEYS[end_index][end]
+        if captured:
+            key ^= PIECE_KEYS[captured - 1][captured_square]
+        codes[captured_square] = codes[start] = 0
+        codes[end] = end_index + 1
+        if offset == _KING and abs(end - start) == 2 and end in CASTLING_MOVES:
+            _, rook_start, rook_end = CASTLING_MOVES[end]
+            rook = codes[rook_start]
+            codes[rook_start], codes[rook_end] = 0, rook
+            key ^= PIECE_KEYS[rook - 1][rook_start] ^ PIECE_KEYS[rook - 1][rook_end]
+        castling_rights = self.castling_rights & CASTLING_MASK[start] & CASTLING_MASK[end]
+        key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        en_passant = (start + end) // 2 if offset == _PAWN and abs(end - start) == 16 else None
+        if en_passant is not None:
+            key ^= EN_PASSANT_KEYS[en_passant & 7]
+        # As in make_move, the side after the move is the mover's opponent
+        side_to_move = Color.BLACK if color == 0 else Color.WHITE
+        if side_to_move != self.side_to_move:
+            key ^= BLACK_TO_MOVE_KEY
+        halfmove_clock = 0 if offset == _PAWN or captured else self.halfmove_clock + 1
+        return Position(bytes(codes), side_to_move, castling_rights, en_passant, halfmove_clock,
+                        self.fullmove_number + color, key)
+
+    def to_fen(self):
+        """Return the position as a FEN string."""
+        castling = "".join(char for char, right in FEN_CASTLING if self.castling_rights & right) or "-"
+        en_passant = "-" if self.en_passant is None else f"{chr(97 + (self.en_passant & 7))}{8 - (self.en_passant >> 3)}"
+        side = "w" if self.side_to_move == Color.WHITE else "b"
+        return f"{format_fen_placement(self.codes)} {side} {castling} {en_passant} " \
+               f"{self.halfmove_clock} {self.fullmove_number}"
+
+    def __hash__(self):
+        return self.key
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self.key == other.key and self.codes == other.codes and self.side_to_move == other.side_to_move
+                and self.castling_rights == other.castling_rights and self.en_passant == other.en_passant)
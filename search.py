@@ -0,0 +1,364 @@
+"""Alpha-beta search engine built on Chessboard.
+Negamax with alpha-beta pruning and iterative deepening. Every finished iteration
+updates the best move, score and principal variation; the transposition table
+carries move ordering and bounds from one iteration to the next. The search stops
+at the first of its depth, time and node limits, or when stop() is called from
+another thread. It returns the result of the last finished iteration, or the best
+root move of the unfinished one if it found a better move: the limits only apply
+once the first root move of the first iteration is searched, so the move returned
+has always been searched.
+
+At depth 0 a quiescence search plays out captures and promotions until the position
+is quiet, so the evaluation is never taken in the middle of an exchange. It stands
+pat on the static evaluation and skips captures that cannot raise alpha (delta
+pruning) or that lose material by static exchange evaluation (Chessboard.see).
+
+A position that repeats one of the search path, or of the game before the root when
+its positions are passed as history, is scored as a draw. Repetitions are detected on
+Chessboard.repetition_key, which ignores an en passant square no pawn can use.
+
+Scores are in centipawns from the side to move's point of view. Mate scores are
+MATE_SCORE minus the number of plies to mate.
+
+Example:
+    board = BitboardChessboard()
+    result = find_best_move(board, time_limit=0.1)
+    print(move_to_uci(result.best_move), result.score, result.depth, result.nps)
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from chessboard import Color
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+from ordering import CODE_VALUES, MoveOrderer, capture_score, is_quiet
+import instrumentation
+
+MATE_SCORE = 100000
+MAX_PLY = 128
+INFINITY = 1000000
+# Scores beyond this are mate scores
+MATE_BOUND = MATE_SCORE - MAX_PLY
+# Added to the evaluation of positions a bitbase scores as won, below any mate score
+KNOWN_WIN = 20000
+# Delta pruning: a capture is skipped if even this much on top of its gain cannot reach alpha
+DELTA_MARGIN = 200
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when a time or node limit is reached or a stop is requested."""
+
+
+@dataclass
+class SearchResult:
+    """
+    The outcome of a search.
+    Attributes:
+        best_move (int): The best move found (encoded, see encode_move), 0 if there is none.
+        score (int): Its score in centipawns for the side to move.
+        depth (int): The depth of the last finished iteration.
+        nodes (int): Nodes searched in total.
+        seconds (float): Time used.
+        pv (list): The principal variation, starting with best_move.
+    """
+    best_move: int
+    score: int
+    depth: int
+    nodes: int = 0
+    seconds: float = 0.0
+    pv: list = field(default_factory=list)
+
+    @property
+    def nps(self):
+        """Nodes searched per second."""
+        return int(self.nodes / self.seconds) if self.seconds > 0 else 0
+
+
+class Searcher:
+    """
+    Iterative deepening alpha-beta search. A Searcher keeps its transposition table
+    between searches, so searching successive positions of a game reuses earlier work.
+    Attributes:
+        table (TranspositionTable): The transposition table.
+        nodes (int): Nodes searched by the current or last search.
+        cutoffs (int): Beta cutoffs in the current or last search.
+        bitbases (Bitbases): Endgame bitbases scoring three-piece positions exactly, or None.
+        stop_event (threading.Event): Stops the search when set; anything with is_set() will do,
+            e.g. a multiprocessing Event shared with other processes.
+        orderer (MoveOrderer): Killer and history move ordering, None to order by the table move only.
+        quiescence (bool): Resolve captures at the leaves instead of evaluating them directly.
+    """
+
+    def __init__(self, table=None, bitbases=None, ordering=True, quiescence=True):
+        self.table = table if table is not None else TranspositionTable()
+        self.bitbases = bitbases
+        self.orderer = MoveOrderer(MAX_PLY) if ordering else None
+        self.quiescence = quiescence
+        self.nodes = 0
+        self.cutoffs = 0
+        self.board = None
+        self.deadline = None
+        self.node_limit = None
+        self.path = []
+        self.root_moves = None
+        self.root_best = None
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Ask a running search to return its last finished iteration. Safe to call from
+        another thread. The request stays in force until stop_event is cleared.
+        """
+        self.stop_event.set()
+
+    def search(self, board, max_depth=MAX_PLY, time_limit=None, node_limit=None, on_iteration=None,
+               root_moves=None, history=None):
+        """
+        Search the position on board. The board is returned to its original position.
+
+        Args:
+            board (Chessboard): The position to search, side_to_move moves first.
+            max_depth (int): The deepest iteration to run.
+            time_limit (float): Seconds to search, None for no limit.
+            node_limit (int): Nodes to search, None for no limit.
+            on_iteration (callable): Called with a SearchResult after every finished iteration.
+            root_moves (list): Search only these legal moves at the root, all moves if None.
+            history (list): The repetition_key() of each position of the game before this one, oldest
+                first, so that the search sees repetitions of positions played earlier.
+
+        Returns:
+            SearchResult: The result of the last finished iteration.
+        """
+        start = time.perf_counter()
+        self.board = board
+        self.nodes = 0
+        self.cutoffs = 0
+        hits = self.table.hits
+        self.deadline = start + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.path = list(history or ()) + [board.repetition_key()]
+        if self.orderer is not None:
+            self.orderer.new_search()
+        root_undo = len(board.undo_stack)
+
+        moves = board.generate_legal_moves()
+        if root_moves is not None:
+            moves = [move for move in moves if move in root_moves]
+        self.root_moves = moves
+        self.root_best = None
+        if not moves:
+            score = -MATE_SCORE if board.in_check() else 0
+            return SearchResult(0, score, 0, 0, time.perf_counter() - start, [])
+
+        result = None
+        for depth in range(1, max_depth + 1):
+            pv = []
+            try:
+                score = self._negamax(depth, -INFINITY, INFINITY, 0, pv)
+            except SearchTimeout:
+                while len(board.undo_stack) > root_undo:
+                    board.unmake_move()
+                # The first root move searched is the best move of the last iteration, so the best
+                # move of the unfinished iteration is at least as good
+                best_depth, best_move, best_score, best_pv = self.root_best
+                if best_depth == depth:
+                    result = SearchResult(best_move, best_score, depth - 1, pv=best_pv)
+                break
+            elapsed = time.perf_counter() - start
+            # The root is searched with a full window, so its principal variation is never empty
+            result = SearchResult(pv[0], score, depth, self.nodes, elapsed, pv)
+            if on_iteration is not None:
+                on_iteration(result)
+            # A forced move needs no deeper search, unless the root moves were restricted
+            if abs(score) >= MATE_BOUND or (len(moves) == 1 and root_moves is None):
+                break
+            # The next iteration takes several times longer, do not start what cannot finish
+            if self.deadline is not None and elapsed > time_limit / 2:
+                break
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        instrumentation.add("search.searches")
+        instrumentation.add("search.nodes", self.nodes)
+        instrumentation.add("search.cutoffs", self.cutoffs)
+        instrumentation.add("search.hash_hits", self.table.hits - hits)
+        return result
+
+    def _check_limits(self):
+        # Nothing stops the search before a root move is searched. A node takes tens of microseconds
+        # even on the fastest backend and reading the clock well under one, so it is read every 16 nodes;
+        # the stop event may be shared between processes, where is_set() is a round trip, and is read
+        # every 256
+        if self.root_best is None:
+            return
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout
+        if not self.nodes & 15:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout
+            if not self.nodes & 255 and self.stop_event.is_set():
+                raise SearchTimeout
+
+    def evaluate(self):
+        """Return the static evaluation in centipawns for the side to move."""
+        board = self.board
+        score = board.evaluate_board(tapered=True)
+        score = score if board.side_to_move == Color.WHITE else -score
+        # At most a queen left besides pawns: cheap test before looking for a bitbase position
+        if self.bitbases is not None and board.phase <= 4:
+            result = self.bitbases.probe(board)
+            if result is not None:
+                # Keep the evaluation on wins so that the search still makes progress
+                return result * KNOWN_WIN + score if result else 0
+        return score
+
+    def _negamax(self, depth, alpha, beta, ply, pv):
+        """
+        Return the score of the position, searching depth plies. pv is filled with
+        the principal variation when the score lies inside (alpha, beta).
+        """
+        self.nodes += 1
+        self._check_limits()
+        board = self.board
+        key = board.zobrist_key
+        if ply:
+            # Draw by the fifty-move rule or by repeating a position of the game or the search path
+            if board.halfmove_clock >= 100 or self.path[-1] in self.path[-board.halfmove_clock - 1:-1]:
+                return 0
+
+        entry = self.table.probe(key)
+        tt_move = 0
+        if entry is not None:
+            tt_move, tt_score, tt_depth, bound = entry
+            if ply and tt_depth >= depth:
+                tt_score = _score_from_table(tt_score, ply)
+                if bound == EXACT:
+                    return tt_score
+                if bound == LOWER_BOUND:
+                    alpha = max(alpha, tt_score)
+                elif bound == UPPER_BOUND:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(alpha, beta, ply) if self.quiescence else self.evaluate()
+
+        if self.orderer is not None and ply:
+            # Staged generation: a cutoff on an early move saves generating the rest
+            moves = self.orderer.staged(board, ply, tt_move)
+        else:
+            moves = board.generate_legal_moves() if ply else self.root_moves[:]
+            if self.orderer is not None:
+                moves = self.orderer.order(board, moves, ply, tt_move)
+            elif tt_move in moves:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, 0
+        for move in moves:
+            child_pv = []
+            board.make_move(move)
+            self.path.append(board.repetition_key())
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1, child_pv)
+            self.path.pop()
+            board.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    pv[:] = [move] + child_pv
+                    if not ply:
+                        self.root_best = (depth, move, score, pv[:])
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        if self.orderer is not None and is_quiet(board, move):
+                            self.orderer.update(board, move, ply, depth)
+                        break
+        if not best_move:
+            # No legal move: checkmate or stalemate
+            return -MATE_SCORE + ply if board.in_check() else 0
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(key, depth, _score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiesce(self, alpha, beta, ply):
+        """
+        Return the score of the position searching only captures and promotions, or
+        all moves when in check, where standing pat is not an option.
+        """
+        self.nodes += 1
+        self._check_limits()
+        board = self.board
+        if ply >= MAX_PLY:
+            return self.evaluate()
+        in_check = board.in_check()
+        if in_check:
+            moves = board.generate_legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -INFINITY
+        else:
+            best_score = stand_pat = self.evaluate()
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            codes = board.square_codes()
+            scored = [(capture_score(codes, move, board.en_passant), move) for move in board.generate_captures()]
+            moves = [move for _, move in sorted(scored, reverse=True)]
+        for move in moves:
+            if not in_check:
+                # Delta pruning on the captured material, then skip captures that lose material
+                # (an empty target square is an en passant capture)
+                gain = (CODE_VALUES[codes[move >> 6 & 63]] or 1) * 100
+                if not move >> 12 and stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                if board.see(move, codes) < 0:
+                    continue
+            board.make_move(move)
+            score = -self._quiesce(-beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+
+def _score_to_table(score, ply):
+    """Store mate scores relative to the node instead of the root."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def find_best_move(board, time_limit=0.1, max_depth=MAX_PLY, node_limit=None, table=None, bitbases=None):
+    """
+    Search board with a fresh Searcher and return its SearchResult.
+
+    Args:
+        board (Chessboard): The position to search.
+        time_limit (float): Seconds to search, None for no limit.
+        max_depth (int): The deepest iteration to run.
+        node_limit (int): Nodes to search, None for no limit.
+        table (TranspositionTable): A table to reuse, a new one if None.
+        bitbases (Bitbases): Endgame bitbases to use, see bitbase.py.
+    """
+    return Searcher(table, bitbases).search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit)
@@ -0,0 +1,221 @@
+"""JSON-lines analysis server.
+Clients connect over TCP on localhost or a Unix socket and send one JSON object per
+line; every request gets one JSON line back, in the order the work completes, with
+the request's "id" copied into the reply. Requests of one connection run
+concurrently on a process pool that is started once, so no call pays for starting
+Python. A request for work that is already in flight, the same operation on the
+same position with the same limits, waits for that work instead of repeating it.
+
+Requests:
+    {"id": 1, "op": "bestmove", "fen": "...", "depth": 6, "time": 0.5, "nodes": 100000}
+        -> {"id": 1, "move": "e2e4", "score": 30, "depth": 6, "nodes": 51234, "pv": [...], "seconds": 0.41}
+    {"id": 2, "op": "evaluate", "fen": "..."}
+        -> {"id": 2, "score": 35, "material": 0, "seconds": 0.0001}
+    {"id": 3, "op": "moves", "fen": "..."}
+        -> {"id": 3, "moves": ["a2a3", ...], "seconds": 0.0002}
+The op defaults to "bestmove", and a search without limits gets DEFAULT_TIME
+seconds. Scores are centipawns for the side to move. Failed requests are answered
+with {"id": ..., "error": "..."}.
+
+Example:
+    python server.py --port 8765 --workers 8
+    python server.py --unix /tmp/chess.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from chessboard import Color, move_to_uci
+from bitboard import BitboardChessboard
+from movecache import MoveCache
+from search import Searcher
+from transposition import TranspositionTable
+
+DEFAULT_PORT = 8765
+DEFAULT_TIME = 0.1
+OPERATIONS = ("bestmove", "evaluate", "moves")
+
+# The searcher of a worker process, kept between requests with its transposition table
+_searcher = None
+# The legal moves of recently asked positions, per process
+_move_cache = MoveCache()
+
+
+def _init_worker(hash_mb):
+    global _searcher
+    _searcher = Searcher(TranspositionTable(hash_mb))
+
+
+def analyse(operation, fen, depth=None, time_limit=None, nodes=None):
+    """
+    Carry out one request; runs in a worker process.
+
+    Args:
+        operation (str): 'bestmove', 'evaluate' or 'moves'.
+        fen (str): The position.
+        depth (int): Search depth limit.
+        time_limit (float): Search time limit in seconds.
+        nodes (int): Search node limit.
+
+    Returns:
+        dict: The reply fields, see the module docstring.
+
+    Raises:
+        ValueError: If the FEN is not valid.
+    """
+    start = time.perf_counter()
+    board = BitboardChessboard.from_fen(fen)
+    if operation == "evaluate":
+        sign = 1 if board.side_to_move == Color.WHITE else -1
+        reply = {"score": sign * board.evaluate_board(tapered=True), "material": sign * board.material}
+    elif operation == "moves":
+        reply = {"moves": [move_to_uci(move) for move in _move_cache.legal_moves(board)]}
+    else:
+        searcher = _searcher or Searcher()
+        if depth is None and time_limit is None and nodes is None:
+            time_limit = DEFAULT_TIME
+        result = searcher.search(board, **({"max_depth": depth} if depth is not None else {}),
+                                 time_limit=time_limit, node_limit=nodes)
+        reply = {"move": move_to_uci(result.best_move) if result.best_move else None, "score": result.score,
+                 "depth": result.depth, "nodes": result.nodes, "pv": [move_to_uci(move) for move in result.pv]}
+    reply["seconds"] = round(time.perf_counter() - start, 6)
+    return reply
+
+
+def _parse_request(request):
+    """Return the arguments of analyse() for a decoded request, raising ValueError if it is malformed."""
+    if not isinstance(request, dict) or not isinstance(request.get("fen"), str):
+        raise ValueError("a request must be an object with a 'fen' string")
+    operation = request.get("op", "bestmove")
+    if operation not in OPERATIONS:
+        raise ValueError(f"unknown op {operation!r}, expected one of {', '.join(OPERATIONS)}")
+    limits = []
+    for name, kind in (("depth", int), ("time", (int, float)), ("nodes", int)):
+        value = request.get(name)
+        if value is not None and (not isinstance(value, kind) or isinstance(value, bool) or value <= 0):
+            raise ValueError(f"{name} must be a positive number")
+        limits.append(value)
+    # Normalized so that requests differing only in spacing share their work
+    fen = " ".join(request["fen"].split())
+    return (operation, fen, *limits) if operation == "bestmove" else (operation, fen)
+
+
+class AnalysisServer:
+    """
+    Serves analysis requests from any number of connections on one process pool.
+    Attributes:
+        workers (int): The number of worker processes.
+        in_flight (dict): Running work by its analyse() arguments.
+        requests (int): Requests received.
+        shared (int): Requests answered by work that was already in flight.
+    """
+
+    def __init__(self, workers=None, hash_mb=16):
+        """
+        Args:
+            workers (int): Worker processes, the number of CPUs if None.
+            hash_mb (float): Transposition table size of each worker in megabytes.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(hash_mb,))
+        self.in_flight = {}
+        self.requests = 0
+        self.shared = 0
+
+    def close(self):
+        """Shut down the worker processes."""
+        self.pool.shutdown(cancel_futures=True)
+
+    async def submit(self, arguments):
+        """
+        Run analyse(*arguments) on the pool, or wait for the same work if it is already running.
+
+        Returns:
+            dict: The reply fields.
+        """
+        future = self.in_flight.get(arguments)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, analyse, *arguments)
+            self.in_flight[arguments] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(arguments, None))
+        else:
+            self.shared += 1
+        # Shielded so that a client going away does not cancel work other clients wait for
+        return dict(await asyncio.shield(future))
+
+    async def answer(self, line):
+        """
+        Answer one request line.
+
+        Returns:
+            dict: The reply, with the request's id.
+        """
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get("id")
+            arguments = _parse_request(request)
+        except (ValueError, TypeError) as error:  # json.JSONDecodeError is a ValueError
+            return {"error": str(error), "id": request_id}
+        try:
+            reply = await self.submit(arguments)
+        except Exception as error:  # Any failure of the worker, e.g. BrokenProcessPool, still gets a reply
+            reply = {"error": str(error) or type(error).__name__}
+        reply["id"] = request_id
+        return reply
+
+    async def handle_connection(self, reader, writer):
+        """Read request lines until the client closes the connection, answering each as it completes."""
+        tasks = set()
+
+        async def reply_to(line):
+            writer.write(json.dumps(await self.answer(line)).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            async for line in reader:
+                if line.strip():
+                    task = asyncio.create_task(reply_to(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, path=None):
+        """
+        Accept connections until cancelled.
+
+        Args:
+            host (str): The TCP address to listen on.
+            port (int): The TCP port.
+            path (str): Listen on this Unix socket instead of TCP.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON-lines chess analysis server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="worker processes, the number of CPUs by default")
+    parser.add_argument("--hash", type=float, default=16, help="transposition table megabytes per worker")
+    options = parser.parse_args()
+    analysis_server = AnalysisServer(options.workers, options.hash)
+    try:
+        asyncio.run(analysis_server.serve(options.host, options.port, options.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analysis_server.close()
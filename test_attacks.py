@@ -0,0 +1,56 @@
+"""
+Test the precomputed attack tables.
+"""
+import random
+import unittest
+from attacks import (BETWEEN, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, QUEEN_DIRECTIONS,
+                     bishop_attacks, queen_attacks, rook_attacks)
+
+
+def slow_attacks(square, occupied, directions):
+    """Walk every direction square by square, the way Chessboard used to."""
+    row, col = divmod(square, 8)
+    attacks = 0
+    for step_row, step_col in directions:
+        r, c = row + step_row, col + step_col
+        while 0 <= r < 8 and 0 <= c < 8:
+            attacks |= 1 << (r * 8 + c)
+            if occupied >> (r * 8 + c) & 1:
+                break
+            r, c = r + step_row, c + step_col
+    return attacks
+
+
+class TestAttacks(unittest.TestCase):
+    """Test the attacks module.
+    """
+    def test_leaper_tables(self):
+        """Test knight, king and pawn attacks on corner and center squares."""
+        self.assertEqual(KNIGHT_ATTACKS[0], 1 << 10 | 1 << 17)
+        self.assertEqual(bin(KNIGHT_ATTACKS[27]).count("1"), 8)
+        self.assertEqual(bin(KING_ATTACKS[63]).count("1"), 3)
+        self.assertEqual(PAWN_ATTACKS[0][52], 1 << 43 | 1 << 45)  # e2 pawn attacks d3 and f3
+        self.assertEqual(PAWN_ATTACKS[1][8], 1 << 17)  # a7 pawn attacks b6 only
+
+    def test_between(self):
+        """Test the squares between two aligned squares."""
+        self.assertEqual(BETWEEN[56][63], 0b111111 << 57)  # a1-h1
+        self.assertEqual(BETWEEN[0][63], BETWEEN[63][0])
+        self.assertEqual(BETWEEN[0][10], 0)  # Not on a common line
+
+    def test_sliding_tables_match_ray_walk(self):
+        """Test that the blocker tables agree with walking the rays."""
+        rng = random.Random(1)
+        for _ in range(200):
+            occupied = rng.getrandbits(64) & rng.getrandbits(64)
+            for square in range(64):
+                self.assertEqual(rook_attacks(square, occupied),
+                                 slow_attacks(square, occupied, QUEEN_DIRECTIONS[4:]))
+                self.assertEqual(bishop_attacks(square, occupied),
+                                 slow_attacks(square, occupied, QUEEN_DIRECTIONS[:4]))
+                self.assertEqual(queen_attacks(square, occupied),
+                                 slow_attacks(square, occupied, QUEEN_DIRECTIONS))
+
+
+if __name__ == '__main__':
+    unittest.main()
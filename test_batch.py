@@ -0,0 +1,74 @@
+"""
+Test the batch evaluation against Chessboard.evaluate_board.
+"""
+import random
+import unittest
+from chessboard import Chessboard
+from bitboard import BitboardChessboard
+from batch import board_to_codes, evaluate_batch, fen_to_codes, np, positions_from_boards, positions_from_fens
+from perft import PERFT_POSITIONS
+
+FENS = [fen for _, fen, _ in PERFT_POSITIONS]
+
+
+def random_boards(count, seed=11):
+    """Boards reached by random legal moves from the start position."""
+    rng = random.Random(seed)
+    board = BitboardChessboard()
+    boards = []
+    for _ in range(count):
+        moves = board.generate_legal_moves()
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+        boards.append(board.copy())
+    return boards
+
+
+class TestCodes(unittest.TestCase):
+    """Test the square code converters, which do not need NumPy.
+    """
+    def test_fen_to_codes(self):
+        """Test that FEN parsing gives the same codes as a bitboard board."""
+        for fen in FENS:
+            self.assertEqual(fen_to_codes(fen), bytes(BitboardChessboard.from_fen(fen).squares))
+
+    def test_board_to_codes(self):
+        """Test that both backends give the same codes."""
+        for fen in FENS:
+            self.assertEqual(board_to_codes(Chessboard.from_fen(fen)), board_to_codes(BitboardChessboard.from_fen(fen)))
+
+    def test_invalid_fen(self):
+        """Test that malformed placements are rejected."""
+        with self.assertRaises(ValueError):
+            fen_to_codes("8/8/8 w - - 0 1")
+        with self.assertRaises(ValueError):
+            fen_to_codes("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestEvaluateBatch(unittest.TestCase):
+    """Test evaluate_batch against the incremental evaluation.
+    """
+    def test_matches_evaluate_board(self):
+        """Test every evaluation mode on random positions."""
+        boards = random_boards(200)
+        positions = positions_from_boards(boards)
+        self.assertEqual(positions.shape, (len(boards), 64))
+        for options in ({}, {"positional": True}, {"tapered": True}):
+            expected = [board.evaluate_board(**options) for board in boards]
+            self.assertEqual(evaluate_batch(positions, **options).tolist(), expected)
+
+    def test_from_fens(self):
+        """Test that positions packed from FEN strings evaluate like the boards."""
+        scores = evaluate_batch(positions_from_fens(FENS), tapered=True)
+        self.assertEqual(scores.tolist(), [Chessboard.from_fen(fen).evaluate_board(tapered=True) for fen in FENS])
+
+    def test_shape_is_checked(self):
+        """Test that arrays of the wrong shape are rejected."""
+        with self.assertRaises(ValueError):
+            evaluate_batch(np.zeros((3, 63), dtype=np.uint8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Test the endgame bitbases against known positions and the move generator.
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from chessboard import OPPONENT, Chessboard
+from bitbase import DRAW, LOSS, SECTION_BYTES, WIN, Bitbases, build_bitbases, build_table
+from search import KNOWN_WIN, find_best_move
+
+
+class TestBitbases(unittest.TestCase):
+    """Build the bitbases once and probe them.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        build_bitbases(cls.directory)
+        cls.bitbases = Bitbases(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bitbases.close()
+        shutil.rmtree(cls.directory)
+
+    def probe(self, fen):
+        return self.bitbases.probe(Chessboard.from_fen(fen))
+
+    def test_files(self):
+        """Test that every table is written as two packed bit sets."""
+        for name in ("kpk", "krk", "kqk"):
+            self.assertEqual(os.path.getsize(os.path.join(self.directory, name + ".bb")), 65536)
+
+    def test_shares(self):
+        """Test that a table solved in several shares equals the one built."""
+        tables = {}
+        for name in ("kpk", "krk", "kqk"):
+            with open(os.path.join(self.directory, name + ".bb"), "rb") as file:
+                tables[name] = file.read()
+        promotions = [tables["kqk"][SECTION_BYTES:], tables["krk"][SECTION_BYTES:]]
+        self.assertEqual(build_table("KPK", promotions, shares=3), tables["kpk"])
+
+    def test_known_positions(self):
+        """Test textbook results, with white and with black as the stronger side."""
+        self.assertEqual(self.probe("4k3/8/4K3/4P3/8/8/8/8 b - - 0 1"), LOSS)  # Opposition
+        self.assertEqual(self.probe("4k3/4P3/4K3/8/8/8/8/8 b - - 0 1"), DRAW)  # Stalemate
+        self.assertEqual(self.probe("4k3/4P3/4K3/8/8/8/8/8 w - - 0 1"), WIN)
+        self.assertEqual(self.probe("8/8/8/8/8/4k3/4p3/4K3 w - - 0 1"), DRAW)  # Mirrored
+        self.assertEqual(self.probe("7k/8/8/8/8/8/P7/K7 w - - 0 1"), WIN)
+        self.assertEqual(self.probe("k7/8/8/8/8/8/P7/K7 w - - 0 1"), DRAW)  # Rook pawn, king in the corner
+        self.assertEqual(self.probe("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"), DRAW)  # Stalemate
+        self.assertEqual(self.probe("8/8/8/8/8/8/6kQ/7K b - - 0 1"), DRAW)  # The queen hangs
+        self.assertEqual(self.probe("8/8/8/8/4k3/8/8/K6r w - - 0 1"), LOSS)
+        self.assertEqual(self.probe("8/8/8/8/4k3/8/8/K6n w - - 0 1"), DRAW)
+        self.assertIsNone(self.probe("8/8/8/8/4k3/8/P7/K6r w - - 0 1"))
+
+    def test_consistent_with_moves(self):
+        """Test that each result is the best result over the legal moves."""
+        rng = random.Random(7)
+        checked = 0
+        while checked < 300:
+            squares = rng.sample(range(64), 3)
+            letter = rng.choice("PRQprq")
+            if letter in "Pp" and not 8 <= squares[2] < 56:
+                continue
+            placement = ["1"] * 64
+            placement[squares[0]], placement[squares[1]], placement[squares[2]] = "K", "k", letter
+            fen = "/".join("".join(placement[row:row + 8]) for row in range(0, 64, 8))
+            board = Chessboard.from_fen(f"{fen} {rng.choice('wb')} - - 0 1")
+            if abs(squares[0] % 8 - squares[1] % 8) <= 1 and abs(squares[0] // 8 - squares[1] // 8) <= 1 \
+                    or board.in_check(OPPONENT[board.side_to_move]):
+                continue
+            results = []
+            for move in board.generate_legal_moves():
+                board.make_move(move)
+                child = self.bitbases.probe(board)
+                results.append(-(DRAW if child is None else child))  # Only the kings are left
+                board.unmake_move()
+            if results:
+                expected = max(results)
+            else:
+                expected = LOSS if board.in_check() else DRAW
+            self.assertEqual(self.bitbases.probe(board), expected, board.to_fen())
+            checked += 1
+
+    def test_search(self):
+        """Test that the search sees the draw in a position worth a pawn of material."""
+        board = Chessboard.from_fen("k7/8/8/8/8/8/P7/K7 w - - 0 1")
+        self.assertEqual(find_best_move(board, time_limit=None, max_depth=2, bitbases=self.bitbases).score, 0)
+        board = Chessboard.from_fen("4k3/8/4K3/4P3/8/8/8/8 w - - 0 1")
+        self.assertGreater(find_best_move(board, time_limit=None, max_depth=2, bitbases=self.bitbases).score,
+                           KNOWN_WIN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Test the BitboardChessboard backend against the Chessboard reference.
+"""
+import random
+import unittest
+from chessboard import Chessboard, PieceType, Color, Piece
+from bitboard import BitboardChessboard
+
+
+def random_game(seed, plies):
+    """Play the same random move sequence on both backends."""
+    rng = random.Random(seed)
+    reference, bitboard = Chessboard(), BitboardChessboard()
+    for _ in range(plies):
+        moves = [move for row in range(8) for col in range(8)
+                 for move in reference.get_possible_moves(row, col)]
+        if not moves:
+            break
+        _, start_row, start_col, end_row, end_col = rng.choice(moves)
+        reference.move_piece(start_row, start_col, end_row, end_col)
+        bitboard.move_piece(start_row, start_col, end_row, end_col)
+    return reference, bitboard
+
+
+class TestBitboardChessboard(unittest.TestCase):
+    """Test the BitboardChessboard class.
+    """
+    def setUp(self):
+        """Set up a fresh bitboard chessboard for each test."""
+        self.board = BitboardChessboard()
+
+    def test_initial_board_setup(self):
+        """Test that the bitboards describe the standard setup."""
+        self.assertEqual(bin(self.board.occupied).count("1"), 32)
+        self.assertEqual(self.board.get_piece(7, 4).piece_type, PieceType.KING)
+        self.assertEqual(self.board.get_piece(7, 4).color, Color.WHITE)
+        self.assertEqual(self.board.get_piece(0, 3).piece_type, PieceType.QUEEN)
+        self.assertEqual(self.board.get_piece(0, 3).color, Color.BLACK)
+        self.assertEqual(self.board.get_piece(4, 4).piece_type, PieceType.EMPTY)
+        self.assertEqual(str(self.board), str(Chessboard()))
+
+    def test_board_assignment(self):
+        """Test that assigning a grid of pieces loads it into the bitboards."""
+        grid = [[Piece(PieceType.EMPTY, Color.NONE, r, c) for c in range(8)] for r in range(8)]
+        grid[3][3] = Piece(PieceType.QUEEN, Color.WHITE, 3, 3)
+        self.board.board = grid
+        self.assertEqual(len(self.board.get_possible_moves(3, 3)), 27)
+        self.assertEqual(self.board.evaluate_board(), 9)
+        self.assertEqual(self.board.zobrist_key, self.board.compute_zobrist_key())
+        self.assertNotEqual(self.board.zobrist_key, BitboardChessboard().zobrist_key)
+
+    def test_move_and_evaluate(self):
+        """Test moves and captures update the evaluation."""
+        self.assertTrue(self.board.move_piece(6, 0, 4, 0))
+        self.assertTrue(self.board.move_piece(1, 1, 3, 1))
+        self.assertTrue(self.board.move_piece(4, 0, 3, 1))
+        self.assertEqual(self.board.evaluate_board(), 1)
+        self.assertFalse(self.board.move_piece(7, 4, 5, 4))
+
+    def test_matches_reference(self):
+        """Test is_valid, get_possible_moves and evaluate_board agree with Chessboard."""
+        for seed in range(5):
+            reference, bitboard = random_game(seed, 40)
+            self.assertEqual(str(reference), str(bitboard))
+            self.assertEqual(reference.evaluate_board(), bitboard.evaluate_board())
+            for row in range(8):
+                for col in range(8):
+                    self.assertEqual(sorted(reference.get_possible_moves(row, col)),
+                                     sorted(bitboard.get_possible_moves(row, col)))
+                    for end in range(64):
+                        self.assertEqual(reference.is_valid(row, col, end >> 3, end & 7),
+                                         bitboard.is_valid(row, col, end >> 3, end & 7))
+
+    def test_make_unmake_matches_reference(self):
+        """Test make_move, unmake_move and the move generators on a random walk through both backends."""
+        rng = random.Random(7)
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        reference, bitboard = Chessboard.from_fen(fen), BitboardChessboard.from_fen(fen)
+        fens = []
+        for _ in range(60):
+            moves = reference.generate_legal_moves()
+            self.assertEqual(sorted(moves), sorted(bitboard.generate_legal_moves()))
+            self.assertEqual(sorted(reference.generate_pseudo_legal_moves()),
+                             sorted(bitboard.generate_pseudo_legal_moves()))
+            self.assertEqual(sorted(reference.generate_captures()), sorted(bitboard.generate_captures()))
+            self.assertEqual((reference.checkers(), reference.pinned()), (bitboard.checkers(), bitboard.pinned()))
+            if not moves:
+                break
+            fens.append(bitboard.to_fen())
+            move = rng.choice(moves)
+            reference.make_move(move)
+            bitboard.make_move(move)
+            self.assertEqual(reference.to_fen(), bitboard.to_fen())
+        while fens:
+            bitboard.unmake_move()
+            self.assertEqual(bitboard.to_fen(), fens.pop())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Test the memory-mapped opening book.
+"""
+import os
+import random
+import tempfile
+import unittest
+from chessboard import Chessboard, move_from_uci, move_to_uci
+from bitboard import BitboardChessboard
+from book import ENTRY, OpeningBook, build_book, decode_book_move, encode_book_move, internal_key
+from polyglot import polyglot_key
+
+PGN = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Result "1/2-1/2"]
+
+1. e4 c5 2. Nf3 1/2-1/2
+
+[Result "0-1"]
+
+1. d4 d5 0-1
+"""
+
+
+class TestBookMoves(unittest.TestCase):
+    """Test the Polyglot move encoding.
+    """
+    def test_encoding(self):
+        """Test the published encoding of e2e4, castling and promotion."""
+        board = Chessboard()
+        self.assertEqual(encode_book_move(board, move_from_uci("e2e4")), 4 | 3 << 3 | 4 << 6 | 1 << 9)
+        board = Chessboard.from_fen("r3k2r/1P6/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        castle = encode_book_move(board, move_from_uci("e1g1"))
+        self.assertEqual(castle, 7 | 0 << 3 | 4 << 6 | 0 << 9)  # e1h1
+        for uci in ("e1g1", "e1c1", "b7a8q", "b7b8n", "a1a8"):
+            move = move_from_uci(uci)
+            self.assertEqual(decode_book_move(board, encode_book_move(board, move)), move)
+
+
+class TestOpeningBook(unittest.TestCase):
+    """Test building and probing a book.
+    """
+    def setUp(self):
+        """Build a book from three short games."""
+        handle, self.pgn_path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(handle, "w") as file:
+            file.write(PGN)
+        handle, self.book_path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        self.written = build_book([self.pgn_path], self.book_path)
+
+    def tearDown(self):
+        os.remove(self.pgn_path)
+        os.remove(self.book_path)
+
+    def test_file_layout(self):
+        """Test that the entries are sorted by key."""
+        self.assertEqual(os.path.getsize(self.book_path), self.written * ENTRY.size)
+        with open(self.book_path, "rb") as file:
+            keys = [ENTRY.unpack(chunk)[0] for chunk in iter(lambda: file.read(ENTRY.size), b"")]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_probe(self):
+        """Test the weighted moves of the start position and after 1. e4."""
+        with OpeningBook(self.book_path) as book:
+            board = BitboardChessboard()
+            self.assertEqual([(move_to_uci(move), weight) for move, weight in book.probe(board)],
+                             [("e2e4", 3), ("d2d4", 0)])
+            self.assertEqual(book.candidates(board)[0], ((6, 4, 4, 4), 3))
+            board.make_move(move_from_uci("e2e4"))
+            self.assertEqual(sorted(move_to_uci(move) for move, _ in book.probe(board)), ["c7c5", "e7e5"])
+            self.assertEqual(move_to_uci(book.choose(board, random.Random(1))), "c7c5")  # e5 lost, weight 0
+            board.make_move(move_from_uci("a7a6"))
+            self.assertEqual(book.probe(board), [])
+            self.assertIsNone(book.choose(board))
+
+    def test_polyglot_keys(self):
+        """Test the published Polyglot keys, and that books keyed either way are read back."""
+        board = Chessboard()
+        self.assertEqual(polyglot_key(board), 0x463B96181691FC9C)
+        for uci, key in (("e2e4", 0x823C9B50FD114196), ("d7d5", 0x0756B94461C50FB0),
+                         ("e4e5", 0x662FAFB965DB29D4), ("f7f5", 0x22A48B5A8E47FF78)):
+            board.make_move(move_from_uci(uci))
+            self.assertEqual(polyglot_key(BitboardChessboard.from_fen(board.to_fen())), key)
+        # Entries are written under the Polyglot key of the position
+        with open(self.book_path, "rb") as file:
+            keys = [ENTRY.unpack(chunk)[0] for chunk in iter(lambda: file.read(ENTRY.size), b"")]
+        self.assertIn(0x463B96181691FC9C, keys)
+        build_book([self.pgn_path], self.book_path, key=internal_key)
+        with OpeningBook(self.book_path, key=internal_key) as book:
+            self.assertEqual(len(book.probe(Chessboard())), 2)
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(book.probe(Chessboard()), [])
+
+    def test_empty_book(self):
+        """Test that an empty file is a valid, empty book."""
+        open(self.book_path, "wb").close()
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(book.size, 0)
+            self.assertEqual(book.probe(Chessboard()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,9 @@
 Test the Chessboard class.
 """
 import unittest
-from chessboard import Chessboard, PieceType, Color, Piece
+from chessboard import (Chessboard, PieceType, Color, Piece, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                        move_from_uci, move_to_uci)
+from bitboard import BitboardChessboard
 
 class TestChessboard(unittest.TestCase):
     """Test the Chessboard class.
@@ -197,6 +199,8 @@ class TestChessboard(unittest.TestCase):
         board = Chessboard()
         # Replace a black piece with a white pawn
         board.board[1][0] = Piece(PieceType.PAWN, Color.WHITE, 1, 0)
+        # Clear the promotion square, pawns cannot capture straight ahead
+        board.board[0][0] = Piece(PieceType.EMPTY, Color.NONE, 0, 0)
         
         # Move to promotion square
         self.assertTrue(board.move_piece(1, 0, 0, 0))
@@ -261,8 +265,8 @@ class TestChessboard(unittest.TestCase):
         # Verify pieces are in the correct positions
         self.assertEqual(board.get_piece(4, 4).piece_type, PieceType.PAWN)
         self.assertEqual(board.get_piece(4, 4).color, Color.WHITE)
-        self.assertEqual(board.get_piece(2, 2).piece_type, PieceType.PAWN)
-        self.assertEqual(board.get_piece(2, 2).color, Color.BLACK)
+        self.assertEqual(board.get_piece(3, 2).piece_type, PieceType.PAWN)  # c5
+        self.assertEqual(board.get_piece(3, 2).color, Color.BLACK)
         self.assertEqual(board.get_piece(5, 5).piece_type, PieceType.NIGHT)
         self.assertEqual(board.get_piece(5, 5).color, Color.WHITE)
 
@@ -278,5 +282,142 @@ class TestChessboard(unittest.TestCase):
         self.assertEqual(board_copy.get_piece(6, 0).piece_type, PieceType.PAWN)
         self.assertEqual(board_copy.get_piece(4, 0).piece_type, PieceType.EMPTY)
 
+    def test_castling(self):
+        """Test castling moves the rook and is refused through attacked squares."""
+        board = Chessboard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        self.assertTrue(board.move_piece(7, 4, 7, 6))  # O-O
+        self.assertEqual(board.get_piece(7, 5).piece_type, PieceType.ROOK)
+        self.assertEqual(board.get_piece(7, 7).piece_type, PieceType.EMPTY)
+        self.assertEqual(board.castling_rights & (WHITE_KINGSIDE | WHITE_QUEENSIDE), 0)
+        # The rook on f1 now covers f8, so black may only castle queenside
+        self.assertFalse(board.is_valid(0, 4, 0, 6))
+        self.assertTrue(board.move_piece(0, 4, 0, 2))  # O-O-O
+        self.assertEqual(board.get_piece(0, 3).piece_type, PieceType.ROOK)
+
+    def test_en_passant(self):
+        """Test capturing en passant right after a double pawn push."""
+        for move in [(6, 4, 4, 4), (1, 0, 2, 0), (4, 4, 3, 4), (1, 3, 3, 3)]:
+            self.assertTrue(self.board.move_piece(*move))
+        self.assertEqual(self.board.en_passant, 2 * 8 + 3)  # d6
+        self.assertTrue(self.board.move_piece(3, 4, 2, 3))  # exd6 e.p.
+        self.assertEqual(self.board.get_piece(3, 3).piece_type, PieceType.EMPTY)
+        self.assertEqual(self.board.evaluate_board(), 1)
+
+    def test_generate_legal_moves(self):
+        """Test that legal moves cover the side to move and respect check."""
+        self.assertEqual(len(self.board.generate_legal_moves()), 20)
+        self.board.move_piece(6, 4, 4, 4)
+        self.assertEqual(self.board.side_to_move, Color.BLACK)
+        # Black king in check from a rook: only moves that resolve the check remain
+        board = Chessboard.from_fen("4k3/8/8/8/8/8/8/4R1K1 b - - 0 1")
+        moves = sorted(move_to_uci(move) for move in board.generate_legal_moves())
+        self.assertEqual(moves, ["e8d7", "e8d8", "e8f7", "e8f8"])
+        # Promotions are generated for all four pieces
+        board = Chessboard.from_fen("8/P6k/8/8/8/8/8/K7 w - - 0 1")
+        self.assertIn(move_from_uci("a7a8n"), board.generate_legal_moves())
+        self.assertEqual(board.perft(1), 7)
+
+    def test_attack_queries(self):
+        """Test attacked squares, check, checkers and pins, and that a move updates them."""
+        self.assertTrue(self.board.is_square_attacked(5 * 8 + 4, Color.WHITE))  # e3
+        self.assertFalse(self.board.is_square_attacked(4 * 8 + 4, Color.WHITE))  # e4
+        self.assertFalse(self.board.in_check())
+        # The bishop on b4 checks e1; the rook on e8 pins the knight on e2
+        board = Chessboard.from_fen("4r1k1/8/8/8/1b6/8/4N3/4K3 w - - 0 1")
+        self.assertTrue(board.in_check())
+        self.assertFalse(board.in_check(Color.BLACK))
+        self.assertEqual(board.checkers(), 1 << 33)
+        self.assertEqual(board.pinned(), 1 << 52)
+        self.assertEqual(sorted(move_to_uci(move) for move in board.generate_legal_moves()),
+                         ["e1d1", "e1f1", "e1f2"])
+        board.move_piece(7, 4, 7, 5)  # Kf1
+        self.assertFalse(board.in_check(Color.WHITE))
+        self.assertEqual(board.pinned(Color.WHITE), 0)
+        board.unmake_move()
+        self.assertTrue(board.in_check())
+
+    def test_repetition_key(self):
+        """Test that the en passant file counts only when an en passant capture is possible."""
+        for backend in (Chessboard, BitboardChessboard):
+            board = backend.from_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+            self.assertFalse(board.en_passant_possible())
+            self.assertEqual(board.repetition_key(),
+                             backend.from_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1").zobrist_key)
+            board = backend.from_fen("rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+            self.assertTrue(board.en_passant_possible())
+            self.assertEqual(board.repetition_key(), board.zobrist_key)
+
+    def test_attack_caches(self):
+        """Test the attack map and king squares against a scan of the board, through moves and grid assignment."""
+        board = Chessboard.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        for move in [None] + board.generate_legal_moves():
+            if move is not None:
+                board.make_move(move)
+            for color in (Color.WHITE, Color.BLACK):
+                self.assertEqual([square for square in range(64) if board.is_square_attacked(square, color)],
+                                 [square for square in range(64) if board._is_attacked(square, color)])
+                king = next(square for square in range(64) if board.get_piece(square >> 3, square & 7) ==
+                            Piece(PieceType.KING, color, square >> 3, square & 7))
+                self.assertEqual(board._king_square(color), king)
+            if move is not None:
+                board.unmake_move()
+        self.assertEqual(board.copy()._king_square(Color.WHITE), 60)
+        # Assigning a grid reloads the position, so nothing is answered from the caches of the old one
+        self.assertTrue(board.is_square_attacked(2 * 8 + 5, Color.WHITE))  # The queen on f3 attacks f6
+        grid = board.board
+        grid[5][5] = Piece(PieceType.EMPTY, Color.NONE, 5, 5)
+        board.board = grid
+        self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+        self.assertFalse(board.is_square_attacked(2 * 8 + 5, Color.WHITE))
+
+    def test_see(self):
+        """Test static exchange evaluation, including x-rays, and that the board is not changed."""
+        for backend in (Chessboard, BitboardChessboard):
+            # Rxe5 wins the pawn: the knight on d7 is the only defender and the rook x-rays through
+            board = backend.from_fen("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1")
+            self.assertEqual(board.see(move_from_uci("e1e5")), 100)
+            # Nxe5 loses the knight for a pawn
+            board = backend.from_fen("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1")
+            fen = board.to_fen()
+            self.assertEqual(board.see(move_from_uci("d3e5")), -200)
+            self.assertEqual(board.to_fen(), fen)
+            # A quiet move to a square the pawn covers
+            board = backend.from_fen("4k3/8/3p4/8/8/8/8/2R1K3 w - - 0 1")
+            self.assertEqual(board.see(move_from_uci("c1c5")), -500)
+
+    def test_fen_round_trip(self):
+        """Test that FEN fields survive loading and saving."""
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq e3 3 17"
+        self.assertEqual(Chessboard.from_fen(fen).to_fen(), fen)
+        with self.assertRaises(ValueError):
+            Chessboard.from_fen("rnbqkbnr/pppppppp/8/8")
+        for invalid in ("rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1",
+                        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x - - 0 1",
+                        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KX - 0 1",
+                        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - e5 0 1"):
+            with self.assertRaises(ValueError):
+                Chessboard.from_fen(invalid)
+        # EPD lines have operations instead of move counters
+        board = Chessboard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R b Qk - bm O-O;")
+        self.assertEqual(board.to_fen(), "r3k2r/8/8/8/8/8/8/R3K2R b Qk - 0 1")
+
+    def test_make_unmake_move(self):
+        """Test that unmake_move restores the exact position, including game state."""
+        fen = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"
+        board = Chessboard.from_fen(fen)
+        for move in board.generate_legal_moves():
+            board.make_move(move)
+            for reply in board.generate_legal_moves():
+                board.make_move(reply)
+                self.assertEqual(board.unmake_move(), reply)
+            self.assertEqual(board.unmake_move(), move)
+            self.assertEqual(board.to_fen(), fen)
+        self.assertEqual(board.undo_stack, [])
+        # move_piece can be taken back as well
+        self.board.move_piece(6, 4, 4, 4)
+        self.board.unmake_move()
+        self.assertEqual(self.board.to_fen(), Chessboard().to_fen())
+        self.assertEqual(self.board.get_piece(6, 4).row, 6)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
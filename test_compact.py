@@ -0,0 +1,76 @@
+"""
+Test the CompactChessboard backend against the Chessboard reference.
+"""
+import random
+import unittest
+from chessboard import Chessboard, Color, PieceType
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+from perft import PERFT_POSITIONS
+
+
+class TestCompactChessboard(unittest.TestCase):
+    """Test the CompactChessboard class.
+    """
+    def test_initial_board_setup(self):
+        """Test that the square codes describe the standard setup."""
+        board = CompactChessboard()
+        self.assertEqual(len(board.squares), 64)
+        self.assertEqual(str(board), str(Chessboard()))
+        self.assertEqual(board.get_piece(7, 4).piece_type, PieceType.KING)
+        self.assertEqual(board.get_piece(0, 3).color, Color.BLACK)
+        self.assertEqual(board.zobrist_key, Chessboard().zobrist_key)
+
+    def test_perft(self):
+        """Test the move generator on the perft reference positions."""
+        for name, fen, counts in PERFT_POSITIONS:
+            with self.subTest(name):
+                self.assertEqual(CompactChessboard.from_fen(fen).perft(2), counts[1])
+
+    def test_random_games_match_reference(self):
+        """Test moves, keys and evaluation against the bitboard backend along random games."""
+        for seed in range(3):
+            rng = random.Random(seed)
+            compact, bitboard = CompactChessboard(), BitboardChessboard()
+            for _ in range(150):
+                moves = compact.generate_legal_moves()
+                self.assertEqual(sorted(moves), sorted(bitboard.generate_legal_moves()))
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                compact.make_move(move)
+                bitboard.make_move(move)
+                self.assertEqual(compact.squares, bitboard.squares)
+                self.assertEqual(compact.zobrist_key, bitboard.zobrist_key)
+                self.assertEqual(compact.evaluate_board(tapered=True), bitboard.evaluate_board(tapered=True))
+            fen = compact.to_fen()
+            while compact.undo_stack:
+                compact.unmake_move()
+            self.assertEqual(compact.to_fen(), CompactChessboard().to_fen())
+            self.assertEqual(compact.compute_evaluation_totals(), CompactChessboard().compute_evaluation_totals())
+            self.assertEqual(fen, bitboard.to_fen())
+
+    def test_copy_is_independent(self):
+        """Test that a copy does not share the square buffer."""
+        board = CompactChessboard()
+        clone = board.copy()
+        self.assertTrue(clone.move_piece(6, 4, 4, 4))
+        self.assertEqual(board.get_piece(6, 4).piece_type, PieceType.PAWN)
+        self.assertIsNot(board.squares, clone.squares)
+        clone.unmake_move()
+        self.assertEqual(clone.squares, board.squares)
+
+    def test_board_assignment(self):
+        """Test that assigning a grid of pieces loads it."""
+        board = CompactChessboard()
+        board.board = Chessboard.from_fen("8/8/8/4k3/8/8/8/4K2R w K - 0 1").board
+        self.assertEqual(board.get_piece(7, 7).piece_type, PieceType.ROOK)
+        self.assertEqual(board.squares.count(0), 61)
+        reference = Chessboard.from_fen("8/8/8/4k3/8/8/8/4K2R w KQkq - 0 1")
+        self.assertEqual(board.zobrist_key, reference.zobrist_key)
+        self.assertEqual((board.material, board.psq_middlegame, board.psq_endgame, board.phase),
+                         (reference.material, reference.psq_middlegame, reference.psq_endgame, reference.phase))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Test the streaming FEN and EPD reader.
+"""
+import os
+import tempfile
+import unittest
+from chessboard import Chessboard
+from compact import CompactChessboard
+from epd import iter_lines, iter_positions, parse_epd
+from perft import PERFT_POSITIONS
+
+
+class TestEpd(unittest.TestCase):
+    """Test reading positions from files.
+    """
+    def setUp(self):
+        """Write a small file mixing FEN lines, EPD lines, comments and blank lines."""
+        handle, self.path = tempfile.mkstemp(suffix=".epd")
+        with os.fdopen(handle, "w") as file:
+            file.write("# Perft positions\n\n")
+            for _, fen, _ in PERFT_POSITIONS:
+                file.write(fen + "\n")
+            file.write('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - bm Bb5; id "ruy; lopez";\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_parse_epd(self):
+        """Test the split into position and operations."""
+        fen, operations = parse_epd('8/8/8/8/8/8/8/K6k w - - bm Kb2; id "a;b"; c0 "x y";')
+        self.assertEqual(fen, "8/8/8/8/8/8/8/K6k w - -")
+        self.assertEqual(operations, {"bm": "Kb2", "id": "a;b", "c0": "x y"})
+        self.assertEqual(parse_epd(PERFT_POSITIONS[0][1]), (PERFT_POSITIONS[0][1], {}))
+
+    def test_iter_positions(self):
+        """Test that both reading modes yield every position with its operations."""
+        expected = [fen for _, fen, _ in PERFT_POSITIONS]
+        for use_mmap in (False, True):
+            positions = list(iter_positions(self.path, use_mmap=use_mmap))
+            self.assertEqual([board.to_fen() for board, _ in positions[:-1]], expected)
+            board, operations = positions[-1]
+            self.assertEqual(operations, {"bm": "Bb5", "id": "ruy; lopez"})
+            self.assertEqual(board.fullmove_number, 1)
+
+    def test_backend_and_errors(self):
+        """Test the backend choice and that bad lines are reported with their position."""
+        board, _ = next(iter_positions(self.path, backend=CompactChessboard))
+        self.assertIsInstance(board, CompactChessboard)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("not a position\n")
+        with self.assertRaisesRegex(ValueError, "position 8"):
+            list(iter_positions(self.path, backend=Chessboard))
+
+    def test_empty_file(self):
+        """Test that an empty file yields nothing, also when memory mapped."""
+        open(self.path, "w", encoding="utf-8").close()
+        self.assertEqual(list(iter_lines(self.path, use_mmap=True)), [])
+        self.assertEqual(list(iter_lines(self.path)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
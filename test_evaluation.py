@@ -0,0 +1,72 @@
+"""
+Test the incremental material and piece-square evaluation.
+"""
+import random
+import unittest
+from chessboard import Chessboard
+from bitboard import BitboardChessboard
+from evaluation import ENDGAME_TABLES, MAX_PHASE, MIDDLEGAME_TABLES, taper
+
+
+class TestEvaluation(unittest.TestCase):
+    """Test the evaluation totals kept by make_move and unmake_move.
+    """
+    def test_tables_are_mirrored(self):
+        """Test that a black piece scores the negative of the white piece on the mirrored square."""
+        for tables in (MIDDLEGAME_TABLES, ENDGAME_TABLES):
+            for index in range(6):
+                for square in range(64):
+                    self.assertEqual(tables[index + 6][square ^ 56], -tables[index][square])
+
+    def test_start_position(self):
+        """Test that the symmetric start position is level at full phase."""
+        for backend in (Chessboard, BitboardChessboard):
+            board = backend()
+            self.assertEqual(board.evaluate_board(), 0)
+            self.assertEqual(board.evaluate_board(positional=True), 0)
+            self.assertEqual(board.evaluate_board(tapered=True), 0)
+            self.assertEqual(board.phase, MAX_PHASE)
+
+    def test_incremental_totals_match_full_computation(self):
+        """Test that make_move and unmake_move keep the totals equal to a fresh computation."""
+        for backend in (Chessboard, BitboardChessboard):
+            rng = random.Random(5)
+            board = backend.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+            start = board.compute_evaluation_totals()
+            totals = []
+            for _ in range(120):
+                moves = board.generate_legal_moves()
+                if not moves:
+                    break
+                totals.append((board.material, board.psq_middlegame, board.psq_endgame, board.phase))
+                board.make_move(rng.choice(moves))
+                self.assertEqual((board.material, board.psq_middlegame, board.psq_endgame, board.phase),
+                                 board.compute_evaluation_totals())
+            while totals:
+                board.unmake_move()
+                self.assertEqual((board.material, board.psq_middlegame, board.psq_endgame, board.phase),
+                                 totals.pop())
+            self.assertEqual(board.compute_evaluation_totals(), start)
+
+    def test_promotion_and_castling(self):
+        """Test the totals after a promotion and after castling."""
+        for backend in (Chessboard, BitboardChessboard):
+            board = backend.from_fen("4k3/1P6/8/8/8/8/8/R3K3 w Q - 0 1")
+            self.assertTrue(board.move_piece(1, 1, 0, 1))
+            self.assertEqual(board.evaluate_board(), 14)
+            self.assertEqual((board.material, board.psq_middlegame, board.psq_endgame, board.phase),
+                             board.compute_evaluation_totals())
+            self.assertTrue(board.move_piece(7, 4, 7, 2))
+            self.assertEqual((board.material, board.psq_middlegame, board.psq_endgame, board.phase),
+                             board.compute_evaluation_totals())
+
+    def test_taper(self):
+        """Test that the blend moves from the middlegame to the endgame score."""
+        self.assertEqual(taper(100, -100, MAX_PHASE), 100)
+        self.assertEqual(taper(100, -100, 0), -100)
+        self.assertEqual(taper(100, -100, MAX_PHASE // 2), 0)
+        self.assertEqual(taper(100, -100, MAX_PHASE + 8), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test the Tkinter board view. Tests that open a window are skipped without a display.
+"""
+import tkinter as tk
+import unittest
+from chessboard import Chessboard, move_from_uci
+from bitboard import BitboardChessboard
+from gui import PIECE_SYMBOLS, TARGET_COLOR, BoardView, changed_squares
+
+
+class TestChangedSquares(unittest.TestCase):
+    """Test the comparison that decides what to redraw.
+    """
+    def test_move(self):
+        """Test that a move changes its two squares and castling its four."""
+        board = Chessboard()
+        shown = board.square_codes()
+        board.make_move(move_from_uci("e2e4"))
+        self.assertEqual(changed_squares(shown, board.square_codes()), [36, 52])
+        board = Chessboard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        shown = board.square_codes()
+        board.make_move(move_from_uci("e1c1"))
+        self.assertEqual(changed_squares(shown, board.square_codes()), [56, 58, 59, 60])
+
+    def test_symbols(self):
+        """Test that the symbols follow the square codes."""
+        self.assertEqual(PIECE_SYMBOLS[Chessboard().square_codes()[60]], "♔")
+        self.assertEqual(PIECE_SYMBOLS[Chessboard().square_codes()[3]], "♛")
+
+
+class TestBoardView(unittest.TestCase):
+    """Test the canvas items of a BoardView.
+    """
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+        self.root.withdraw()
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_refresh_and_highlight(self):
+        """Test that refresh redraws only the changed squares and highlights are undone."""
+        board = BitboardChessboard()
+        view = BoardView(self.root, board)
+        self.assertEqual(view.canvas.itemcget(view.texts[60], "text"), "♔")
+        board.make_move(move_from_uci("g1f3"))
+        self.assertEqual(view.refresh(), 2)
+        self.assertEqual(view.refresh(), 0)
+        self.assertEqual(view.canvas.itemcget(view.texts[45], "text"), "♘")
+        view.highlight([36], TARGET_COLOR)
+        view.clear_highlights()
+        self.assertEqual(view.canvas.itemcget(view.rectangles[36], "fill"), view.square_color(36))
+        self.assertEqual(view.square_at(65, 5), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Test the opt-in instrumentation.
+"""
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+from unittest import mock
+import instrumentation
+from chessboard import Chessboard
+
+SCRIPT = """
+import json, instrumentation, search
+from bitboard import BitboardChessboard
+board = BitboardChessboard()
+board.move_piece(6, 4, 4, 4)
+moved = instrumentation.snapshot()
+search.find_best_move(board, time_limit=None, max_depth=2)
+print(json.dumps([moved, instrumentation.snapshot()]))
+"""
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test the decorator, the counters and the log.
+    """
+    def setUp(self):
+        instrumentation.reset()
+
+    def test_disabled_is_free(self):
+        """Test that without CHESS_INSTRUMENT the methods are not wrapped."""
+        if instrumentation.ENABLED:
+            self.skipTest("instrumentation is enabled in this process")
+        self.assertNotIn("__wrapped__", vars(Chessboard.is_valid))
+
+        def function():
+            return 1
+        self.assertIs(instrumentation.instrumented()(function), function)
+        instrumentation.add("nodes", 5)
+        self.assertEqual(instrumentation.snapshot()["counters"], {})
+
+    def test_counts_and_times(self):
+        """Test that a wrapped function is counted and timed."""
+        wrapped = instrumentation.instrument(lambda seconds: time.sleep(seconds), "sleep")
+        wrapped(0.01)
+        wrapped(0)
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(snapshot["calls"], {"sleep": 2})
+        self.assertGreaterEqual(snapshot["seconds"]["sleep"], 0.01)
+        with mock.patch.object(instrumentation, "ENABLED", True):
+            instrumentation.add("nodes", 5)
+        self.assertEqual(instrumentation.snapshot()["counters"], {"nodes": 5})
+
+    def test_log(self):
+        """Test the JSON snapshot lines."""
+        stream = io.StringIO()
+        instrumentation.write_snapshot(stream)
+        instrumentation.start_log(stream, interval=0.01)
+        time.sleep(0.05)
+        instrumentation.stop_log()
+        lines = stream.getvalue().splitlines()
+        self.assertGreaterEqual(len(lines), 2)
+        self.assertIn("calls", json.loads(lines[-1]))
+
+    def test_enabled_at_import(self):
+        """Test the hot path counters and search counters in a process started with CHESS_INSTRUMENT=1."""
+        output = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True,
+                                env={**os.environ, "CHESS_INSTRUMENT": "1"},
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        moved, snapshot = json.loads(output)
+        self.assertTrue(snapshot["enabled"])
+        self.assertEqual(moved["calls"]["Chessboard.move_piece"], 1)
+        self.assertEqual(moved["calls"]["BitboardChessboard.is_valid"], 1)
+        self.assertGreater(snapshot["calls"]["Chessboard.evaluate_board"], 0)
+        self.assertEqual(snapshot["counters"]["search.searches"], 1)
+        self.assertGreater(snapshot["counters"]["search.nodes"], snapshot["counters"]["search.cutoffs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
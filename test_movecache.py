@@ -0,0 +1,79 @@
+"""
+Test the legal move cache.
+"""
+import unittest
+from chessboard import Chessboard, Color, move_from_uci
+from bitboard import BitboardChessboard
+from movecache import MoveCache, MoveLists
+
+PINNED = "4r1k1/8/8/8/1b6/8/4N3/4K3 w - - 0 1"
+
+
+class TestMoveCache(unittest.TestCase):
+    """Test the cached move lists, the LRU table and the invalidation.
+    """
+    def test_matches_board(self):
+        """Test that the cached lists match the board and the bitmap holds exactly the legal moves."""
+        for backend in (Chessboard, BitboardChessboard):
+            board = backend.from_fen(PINNED)
+            cache = MoveCache(board)
+            legal = set(board.generate_legal_moves())
+            for square in range(64):
+                row, col = square >> 3, square & 7
+                self.assertEqual(cache.get_possible_moves(row, col), board.get_possible_moves(row, col))
+                for end in range(64):
+                    self.assertEqual(cache.is_valid(row, col, end >> 3, end & 7),
+                                     any(move & 4095 == square | end << 6 for move in legal))
+            self.assertEqual(set(cache.legal_moves()), legal)
+            # The pinned knight has pseudo-legal moves but no legal ones
+            self.assertTrue(board.is_valid(6, 4, 4, 3))
+            self.assertFalse(cache.is_valid(6, 4, 4, 3))
+            self.assertEqual(cache.lookup().targets(60), [53, 59, 61])  # f2, d1 and f1
+
+    def test_hits_and_invalidation(self):
+        """Test the counters, the invalidation by move_piece and the key check after make_move."""
+        board = Chessboard()
+        cache = MoveCache(board)
+        self.assertIs(board.move_cache, cache)
+        cache.get_possible_moves(6, 4)
+        cache.get_possible_moves(7, 6)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertTrue(board.move_piece(6, 4, 4, 4))
+        self.assertEqual(cache.invalidations, 1)
+        self.assertIsNone(cache.current)
+        self.assertTrue(cache.is_valid(1, 4, 3, 4))  # Black's e7e5 is legal now
+        self.assertFalse(cache.is_valid(6, 3, 4, 3))
+        board.unmake_move()  # Not invalidated, but the key no longer matches
+        self.assertTrue(cache.is_valid(6, 3, 4, 3))
+        self.assertEqual((cache.hits, cache.misses), (3, 2))
+        self.assertAlmostEqual(cache.hit_rate, 0.6)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used position is dropped first."""
+        cache = MoveCache(size=2)
+        boards = [Chessboard.from_fen(fen) for fen in (PINNED, "4k3/8/8/8/8/8/8/4K3 w - - 0 1",
+                                                        "4k3/8/8/8/8/8/8/4K3 b - - 0 1")]
+        cache.lookup(boards[0])
+        cache.lookup(boards[1])
+        cache.lookup(boards[0])
+        cache.lookup(boards[2])
+        self.assertEqual((cache.misses, cache.evictions), (3, 1))
+        cache.lookup(boards[0])
+        self.assertEqual(cache.misses, 3)
+        cache.lookup(boards[1])
+        self.assertEqual(cache.misses, 4)
+        cache.clear()
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_move_lists(self):
+        """Test an entry built without a cache."""
+        board = BitboardChessboard.from_fen("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        entry = MoveLists.from_board(board)
+        self.assertTrue(entry.is_legal(8, 0))
+        self.assertEqual(len([move for move in entry.moves if move & 4095 == move_from_uci("a7a8") & 4095]), 4)
+        self.assertEqual(board.side_to_move, Color.WHITE)
+
+
+if __name__ == '__main__':
+    unittest.main()
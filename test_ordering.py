@@ -0,0 +1,103 @@
+"""
+Test the move ordering heuristics.
+"""
+import unittest
+from unittest import mock
+from chessboard import Chessboard, move_from_uci, move_to_uci
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+from ordering import MoveOrderer, capture_score, is_quiet
+from perft import PERFT_POSITIONS
+from search import Searcher
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+class TestMoveOrderer(unittest.TestCase):
+    """Test MoveOrderer and the capture scores.
+    """
+    def test_mvv_lva(self):
+        """Test that the most valuable victim comes first, then the least valuable attacker."""
+        board = Chessboard.from_fen("4k3/8/3q1r2/4P3/8/8/8/3RK3 w - - 0 1")
+        ordered = [move_to_uci(move) for move in MoveOrderer().order(board, board.generate_legal_moves(), 0)]
+        self.assertEqual(ordered[:3], ["e5d6", "d1d6", "e5f6"])
+        codes = board.square_codes()
+        self.assertEqual(capture_score(codes, move_from_uci("e1e2"), None), 0)
+
+    def test_en_passant_and_promotion(self):
+        """Test that en passant captures and promotions are not quiet."""
+        board = Chessboard.from_fen("4k3/P7/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        self.assertFalse(is_quiet(board, move_from_uci("e5d6")))
+        self.assertFalse(is_quiet(board, move_from_uci("a7a8q")))
+        self.assertTrue(is_quiet(board, move_from_uci("e5e6")))
+        self.assertGreater(capture_score(board.square_codes(), move_from_uci("a7a8q"), board.en_passant),
+                           capture_score(board.square_codes(), move_from_uci("a7a8n"), board.en_passant))
+
+    def test_killers_and_history(self):
+        """Test the order table move, captures, killers, history, then the rest."""
+        board = Chessboard.from_fen(KIWIPETE)
+        orderer = MoveOrderer()
+        killer, history_move, tt_move = (move_from_uci(uci) for uci in ("a2a3", "g2g3", "a1b1"))
+        orderer.update(board, history_move, 2, 3)
+        orderer.update(board, killer, 3, 1)
+        ordered = orderer.order(board, board.generate_legal_moves(), 3, tt_move)
+        self.assertEqual(ordered[0], tt_move)
+        captures = [move for move in ordered if not is_quiet(board, move)]
+        self.assertEqual(ordered[1:1 + len(captures)], captures)
+        self.assertEqual(ordered[1 + len(captures)], killer)
+        self.assertEqual(ordered[2 + len(captures)], history_move)
+        orderer.new_search()
+        self.assertEqual(orderer.killers[3], [0, 0])
+
+    def test_staged_matches_order(self):
+        """Test that the stages split the legal moves and yield them in the order of order()."""
+        orderer = MoveOrderer()
+        for killer in ("a2a3", "e1g1", "b7b5"):
+            orderer.update(Chessboard(), move_from_uci(killer), 1, 1)
+        for backend in (Chessboard, BitboardChessboard, CompactChessboard):
+            for name, fen, _ in PERFT_POSITIONS:
+                with self.subTest(backend=backend.__name__, position=name):
+                    board = backend.from_fen(fen)
+                    legal = board.generate_legal_moves()
+                    captures, quiets = board.generate_captures(), board.generate_quiets()
+                    self.assertEqual(sorted(captures + quiets), sorted(legal))
+                    self.assertTrue(all(is_quiet(board, move) for move in quiets))
+                    for tt_move in (0, legal[-1], move_from_uci("h8h1")):
+                        self.assertEqual(list(orderer.staged(board, 1, tt_move)),
+                                         orderer.order(board, legal, 1, tt_move))
+
+    def test_staged_is_lazy(self):
+        """Test that a stage is generated only when the moves before it are used up."""
+        board = BitboardChessboard.from_fen(KIWIPETE)
+        tt_move = move_from_uci("e2a6")
+        with mock.patch.object(board, "generate_captures", wraps=board.generate_captures) as captures, \
+                mock.patch.object(board, "generate_quiets", wraps=board.generate_quiets) as quiets:
+            moves = MoveOrderer().staged(board, 1, tt_move)
+            self.assertEqual(next(moves), tt_move)
+            self.assertEqual((captures.call_count, quiets.call_count), (0, 0))
+            self.assertFalse(is_quiet(board, next(moves)))
+            self.assertEqual((captures.call_count, quiets.call_count), (1, 0))
+            self.assertEqual(len(list(moves)) + 2, len(board.generate_legal_moves()))
+            self.assertEqual(quiets.call_count, 1)
+
+    def test_is_legal(self):
+        """Test the check of moves that may come from another position."""
+        board = Chessboard.from_fen("4r1k1/8/8/8/1b6/8/4N3/4K3 w - - 0 1")
+        self.assertTrue(board.is_legal(move_from_uci("e1f1")))
+        self.assertFalse(board.is_legal(move_from_uci("e2c3")))  # Pinned knight
+        self.assertFalse(board.is_legal(move_from_uci("b4c3")))  # Not White's piece
+        self.assertFalse(board.is_legal(move_from_uci("e1e3")))
+        board = BitboardChessboard.from_fen("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertTrue(board.is_legal(move_from_uci("a7a8n")))
+        self.assertFalse(board.is_legal(move_from_uci("a7a8")))
+
+    def test_fewer_nodes(self):
+        """Test that ordering searches fewer nodes for the same score."""
+        results = [Searcher(ordering=ordering).search(BitboardChessboard.from_fen(KIWIPETE), max_depth=3)
+                   for ordering in (False, True)]
+        self.assertEqual(results[0].score, results[1].score)
+        self.assertLess(results[1].nodes, results[0].nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Test the parallel root splitting search.
+"""
+import threading
+import unittest
+from chessboard import move_to_uci
+from bitboard import BitboardChessboard
+from parallel import ParallelSearcher
+from search import MATE_SCORE, find_best_move
+
+
+class TestParallelSearcher(unittest.TestCase):
+    """Test ParallelSearcher with a small pool.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.searcher = ParallelSearcher(workers=2, hash_mb=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.searcher.close()
+
+    def test_finds_mate(self):
+        """Test that the mating move is found whichever worker searches it."""
+        board = BitboardChessboard.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        result = self.searcher.search(board, max_depth=3)
+        self.assertEqual(move_to_uci(result.best_move), "a1a8")
+        self.assertEqual(result.score, MATE_SCORE - 1)
+
+    def test_matches_single_search_score(self):
+        """Test that the merged score equals the score of a single-process search of the same depth."""
+        board = BitboardChessboard.from_fen("4k3/8/8/3q4/4P3/8/8/4K3 w - - 0 1")
+        result = self.searcher.search(board, max_depth=3)
+        single = find_best_move(board, time_limit=None, max_depth=3)
+        self.assertEqual(result.depth, 3)
+        self.assertEqual(result.score, single.score)
+        self.assertEqual(move_to_uci(result.best_move), "e4d5")
+        self.assertEqual(result.pv[0], result.best_move)
+
+    def test_single_legal_move(self):
+        """Test that a position with one legal move is searched without splitting."""
+        board = BitboardChessboard.from_fen("k7/8/8/8/8/8/1R6/7K b - - 0 1")
+        result = self.searcher.search(board, max_depth=2)
+        self.assertEqual(move_to_uci(result.best_move), "a8a7")
+
+    def test_stop(self):
+        """Test that stop() ends a search without limits from another thread."""
+        timer = threading.Timer(0.3, self.searcher.stop)
+        timer.start()
+        result = self.searcher.search(BitboardChessboard())
+        self.searcher.stop_event.clear()
+        self.assertLess(result.seconds, 5)
+        self.assertTrue(result.best_move)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+Test the legal move generators against the perft reference counts.
+"""
+import unittest
+from chessboard import Chessboard
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+from perft import PERFT_POSITIONS, run_perft_suite
+
+
+class TestPerft(unittest.TestCase):
+    """Test perft counts for all backends.
+    """
+    def test_reference_backend(self):
+        """Test the Chessboard move generator to depth 3."""
+        for result in run_perft_suite(3, Chessboard, verbose=False):
+            self.assertTrue(result["passed"], result)
+
+    def test_bitboard_backend(self):
+        """Test the BitboardChessboard move generator to depth 3."""
+        for result in run_perft_suite(3, BitboardChessboard, verbose=False):
+            self.assertTrue(result["passed"], result)
+
+    def test_compact_backend(self):
+        """Test the CompactChessboard move generator to depth 3."""
+        for result in run_perft_suite(3, CompactChessboard, verbose=False):
+            self.assertTrue(result["passed"], result)
+
+    def test_divide_matches(self):
+        """Test that all backends agree move by move."""
+        for _, fen, _ in PERFT_POSITIONS:
+            reference = Chessboard.from_fen(fen).perft_divide(1)
+            self.assertEqual(BitboardChessboard.from_fen(fen).perft_divide(1), reference)
+            self.assertEqual(CompactChessboard.from_fen(fen).perft_divide(1), reference)
+
+
+if __name__ == '__main__':
+    unittest.main()
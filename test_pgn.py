@@ -0,0 +1,138 @@
+"""
+Test SAN conversion and the streaming PGN reader.
+"""
+import os
+import random
+import tempfile
+import unittest
+from chessboard import Chessboard, move_from_uci, move_to_uci
+from bitboard import BitboardChessboard
+from pgn import iter_games, map_games, move_from_san, move_to_san, scan_game_offsets
+from perft import PERFT_POSITIONS
+
+PGN = """[Event "Casual"]
+[White "Morphy, Paul"]
+[Black "Duke & Count"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 {This is a weak move
+already.--Fischer} 4. dxe5 Bxf3 5. Qxf3 dxe5 6. Bc4 Nf6 7. Qb3 Qe7
+8. Nc3 c6 9. Bg5 (9. O-O b5 10. Bd3) 9... b5 $2 10. Nxb5 cxb5 11. Bxb5+ Nbd7
+12. O-O-O Rd8 13. Rxd7 Rxd7 14. Rd1 Qe6 15. Bxd7+ Nxd7 16. Qb8+ Nxb8 17. Rd8# 1-0
+
+[Event "Promotion"]
+[FEN "8/P6k/8/8/8/8/8/K7 w - - 0 1"]
+[SetUp "1"]
+
+1. a8=N! Kg6 ; the knight is enough
+2. Nb6 *
+[Event "No blank line before"]
+
+1. d4 d5 1/2-1/2
+"""
+
+
+def count_moves(game):
+    """Module level so that worker processes can run it."""
+    return game.headers.get("Event"), len(game.moves)
+
+
+class TestSan(unittest.TestCase):
+    """Test move_from_san and move_to_san.
+    """
+    def test_round_trip(self):
+        """Test that every legal move survives conversion to SAN and back, on both backends."""
+        rng = random.Random(7)
+        for backend in (Chessboard, BitboardChessboard):
+            for _, fen, _ in PERFT_POSITIONS:
+                board = backend.from_fen(fen)
+                for _ in range(6):
+                    moves = board.generate_legal_moves()
+                    if not moves:
+                        break
+                    for move in moves:
+                        self.assertEqual(move_from_san(board, move_to_san(board, move)), move)
+                    board.make_move(rng.choice(moves))
+
+    def test_notation(self):
+        """Test disambiguation, castling, promotion and check marks."""
+        board = Chessboard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        self.assertEqual(move_to_san(board, move_from_uci("e1g1")), "O-O")
+        self.assertEqual(move_to_san(board, move_from_uci("a1a8")), "Rxa8+")
+        board = Chessboard.from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1")
+        self.assertEqual(move_to_san(board, move_from_uci("a1d1")), "Rad1")
+        board = Chessboard.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.assertEqual(move_to_san(board, move_from_uci("a1a8")), "Ra8#")
+        board = Chessboard.from_fen("8/P6k/8/8/8/8/8/K7 w - - 0 1")
+        self.assertEqual(move_to_uci(move_from_san(board, "a8=Q")), "a7a8q")
+        self.assertEqual(move_to_uci(move_from_san(board, "a8N+")), "a7a8n")
+
+    def test_invalid(self):
+        """Test that illegal, ambiguous and malformed moves are rejected."""
+        board = Chessboard.from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1")
+        for san in ("Rd1", "Ke4", "e4", "Zz9", "O-O"):
+            with self.assertRaises(ValueError):
+                move_from_san(board, san)
+        with self.assertRaises(ValueError):
+            move_from_san(Chessboard.from_fen("8/P6k/8/8/8/8/8/K7 w - - 0 1"), "a8")
+
+
+class TestPgn(unittest.TestCase):
+    """Test reading and replaying PGN files.
+    """
+    def setUp(self):
+        """Write the sample games to a file."""
+        handle, self.path = tempfile.mkstemp(suffix=".pgn")
+        with os.fdopen(handle, "w") as file:
+            file.write(PGN)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_iter_games(self):
+        """Test headers, moves and results with comments, variations and NAGs skipped."""
+        games = list(iter_games(self.path))
+        self.assertEqual(len(games), 3)
+        self.assertEqual(games[0].headers["White"], "Morphy, Paul")
+        self.assertEqual(len(games[0].moves), 33)
+        self.assertEqual(games[0].moves[16:18], ["Bg5", "b5"])
+        self.assertEqual(games[0].result, "1-0")
+        self.assertEqual(games[1].moves, ["a8=N", "Kg6", "Nb6"])
+        self.assertEqual(games[2].result, "1/2-1/2")
+        self.assertEqual([game.offset for game in games], list(scan_game_offsets(self.path)))
+
+    def test_replay(self):
+        """Test that the games replay to the expected positions."""
+        games = list(iter_games(self.path))
+        board, move = list(games[0].replay())[-1]
+        self.assertEqual(move_to_uci(move), "d1d8")
+        self.assertFalse(board.generate_legal_moves())  # Checkmate
+        board, _ = list(games[1].replay(Chessboard))[-1]
+        self.assertEqual(board.to_fen(), "8/8/1N4k1/8/8/8/8/K7 b - - 2 2")
+
+    def test_offsets(self):
+        """Test reading from a game offset up to another."""
+        offsets = list(scan_game_offsets(self.path))
+        games = list(iter_games(self.path, offsets[1], offsets[2]))
+        self.assertEqual([game.headers["Event"] for game in games], ["Promotion"])
+
+    def test_tag_in_comment(self):
+        """Test that a tag-like line inside a comment starts no game, for iter_games and scan_game_offsets alike."""
+        with open(self.path, "w") as file:
+            file.write('[Event "One"]\n\n1. e4 {Compare\n[Event "Other"] with\n} e5 1-0\n\n'
+                       '[Event "Two"]\n\n1. d4 ; {not a comment opener\n[Event "Three"]\n\n1. c4 *\n')
+        games = list(iter_games(self.path))
+        self.assertEqual([(game.headers["Event"], game.moves) for game in games],
+                         [("One", ["e4", "e5"]), ("Two", ["d4"]), ("Three", ["c4"])])
+        self.assertEqual([game.offset for game in games], list(scan_game_offsets(self.path)))
+
+    def test_map_games(self):
+        """Test the process pool over game ranges."""
+        expected = [("Casual", 33), ("Promotion", 3), ("No blank line before", 2)]
+        for games_per_task in (1, 2, 3):
+            self.assertEqual(list(map_games(self.path, count_moves, workers=2, games_per_task=games_per_task)),
+                             expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Test the immutable position snapshots.
+"""
+import dataclasses
+import pickle
+import random
+import threading
+import unittest
+from chessboard import Chessboard, move_from_uci
+from bitboard import BitboardChessboard
+from compact import CompactChessboard
+from perft import PERFT_POSITIONS
+from position import Position
+
+
+class TestPosition(unittest.TestCase):
+    """Test Position snapshots against the boards they come from.
+    """
+    def test_child_matches_make_move(self):
+        """Test every legal move along random games from the perft positions."""
+        rng = random.Random(7)
+        for name, fen, _ in PERFT_POSITIONS:
+            with self.subTest(name):
+                board = BitboardChessboard.from_fen(fen)
+                position = Position.from_board(board)
+                for _ in range(40):
+                    moves = board.generate_legal_moves()
+                    if not moves:
+                        break
+                    for move in moves:
+                        child = position.child(move)
+                        board.make_move(move)
+                        self.assertEqual(child.key, board.zobrist_key)
+                        self.assertEqual(child.to_fen(), board.to_fen())
+                        board.unmake_move()
+                    move = rng.choice(moves)
+                    board.make_move(move)
+                    position = position.child(move)
+
+    def test_equality_and_hash(self):
+        """Test that snapshots of the same position are equal dictionary keys whatever the move counters."""
+        start = Position.from_board(Chessboard())
+        after = start.child(move_from_uci("g1f3")).child(move_from_uci("g8f6"))
+        back = after.child(move_from_uci("f3g1")).child(move_from_uci("f6g8"))
+        self.assertEqual(back, start)
+        self.assertEqual(hash(back), hash(start))
+        self.assertEqual((back.halfmove_clock, back.fullmove_number), (4, 3))
+        self.assertNotEqual(after, start)
+        self.assertEqual(len({start: 1, back: 2, after: 3}), 2)
+        self.assertEqual(Position.from_board(CompactChessboard()), start)
+
+    def test_immutable_and_picklable(self):
+        """Test that a snapshot cannot be changed, survives pickling and is shared by threads unchanged."""
+        position = Position.from_board(BitboardChessboard.from_fen(PERFT_POSITIONS[1][1]))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            position.key = 0
+        copy = pickle.loads(pickle.dumps(position))
+        self.assertEqual((copy, copy.to_fen()), (position, position.to_fen()))
+        fens = []
+        threads = [threading.Thread(target=lambda: fens.append(position.to_board(CompactChessboard).to_fen()))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fens, [position.to_fen()] * 4)
+
+    def test_to_board(self):
+        """Test boards of each backend made from a snapshot, and invalid moves."""
+        fen = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"
+        position = Position.from_board(Chessboard.from_fen(fen))
+        for backend in (Chessboard, BitboardChessboard, CompactChessboard):
+            board = position.to_board(backend)
+            self.assertIsInstance(board, backend)
+            self.assertEqual((board.to_fen(), board.zobrist_key), (fen, position.key))
+            self.assertEqual(board.perft(1), 6)
+        with self.assertRaises(ValueError):
+            position.child(move_from_uci("e5e4"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Test the alpha-beta search.
+"""
+import time
+import unittest
+from chessboard import Chessboard, move_to_uci
+from bitboard import BitboardChessboard
+from search import MATE_SCORE, Searcher, find_best_move
+
+
+class TestSearch(unittest.TestCase):
+    """Test the Searcher class.
+    """
+    def test_finds_mate_in_one(self):
+        """Test that a back rank mate is found and scored as mate."""
+        board = BitboardChessboard.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        result = find_best_move(board, time_limit=None, max_depth=3)
+        self.assertEqual(move_to_uci(result.best_move), "a1a8")
+        self.assertEqual(result.score, MATE_SCORE - 1)
+        self.assertEqual(result.pv[0], result.best_move)
+
+    def test_wins_hanging_queen(self):
+        """Test that a free queen is captured on both backends."""
+        fen = "4k3/8/8/3q4/4P3/8/8/4K3 w - - 0 1"
+        for backend in (Chessboard, BitboardChessboard):
+            result = find_best_move(backend.from_fen(fen), time_limit=None, max_depth=2)
+            self.assertEqual(move_to_uci(result.best_move), "e4d5")
+            self.assertGreater(result.score, 50)  # Pawn against bare king
+
+    def test_board_is_restored(self):
+        """Test that the position is unchanged after a search, also after a timeout."""
+        board = BitboardChessboard.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        fen = board.to_fen()
+        find_best_move(board, time_limit=0.05)
+        self.assertEqual(board.to_fen(), fen)
+        self.assertEqual(board.undo_stack, [])
+
+    def test_limits(self):
+        """Test the node and time limits."""
+        board = BitboardChessboard()
+        result = Searcher().search(board, node_limit=500)
+        self.assertLessEqual(result.nodes, 500)
+        self.assertNotEqual(result.best_move, 0)
+        start = time.perf_counter()
+        result = find_best_move(board, time_limit=0.1)
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertGreater(result.nps, 0)
+        # The slowest backend keeps to the time limit as well
+        board = Chessboard.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        start = time.perf_counter()
+        find_best_move(board, time_limit=0.1)
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+    def test_unfinished_iteration(self):
+        """Test that a search stopped in its first iteration returns a searched move with its score."""
+        board = BitboardChessboard.from_fen("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1")
+        result = Searcher().search(board, node_limit=1)
+        self.assertEqual(result.depth, 0)
+        self.assertEqual(result.pv, [result.best_move])
+        self.assertEqual(move_to_uci(result.best_move), "d1d5")
+        self.assertLess(result.score, 0)
+
+    def test_quiescence(self):
+        """Test that the search sees the recapture at the horizon and does not take a defended pawn."""
+        fen = "4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1"
+        grabs = Searcher(quiescence=False).search(BitboardChessboard.from_fen(fen), max_depth=1)
+        self.assertEqual(move_to_uci(grabs.best_move), "d1d5")
+        result = Searcher().search(BitboardChessboard.from_fen(fen), max_depth=1)
+        self.assertNotEqual(move_to_uci(result.best_move), "d1d5")
+        self.assertGreater(result.score, 500)
+
+    def test_history(self):
+        """Test that positions played before the root count as repetitions."""
+        board = BitboardChessboard.from_fen("4k3/8/8/8/8/8/q7/4K3 w - - 10 40")
+        self.assertLess(Searcher().search(board, max_depth=3).score, -500)
+        # Every move returns to a position of the game: a draw by repetition
+        history = []
+        for move in board.generate_legal_moves():
+            board.make_move(move)
+            history.append(board.repetition_key())
+            board.unmake_move()
+        self.assertEqual(Searcher().search(board, max_depth=3, history=history).score, 0)
+
+    def test_no_legal_moves(self):
+        """Test checkmated and stalemated positions."""
+        mated = find_best_move(BitboardChessboard.from_fen("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1"))
+        self.assertEqual((mated.best_move, mated.score), (0, -MATE_SCORE))
+        stalemate = find_best_move(BitboardChessboard.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"))
+        self.assertEqual((stalemate.best_move, stalemate.score), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
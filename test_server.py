@@ -0,0 +1,86 @@
+"""
+Test the JSON-lines analysis server.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from server import AnalysisServer, analyse
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+class TestAnalyse(unittest.TestCase):
+    """Test the worker function on its own.
+    """
+    def test_operations(self):
+        """Test the three operations."""
+        self.assertEqual(analyse("bestmove", MATE_IN_ONE, depth=2)["move"], "a1a8")
+        self.assertEqual(analyse("evaluate", START)["score"], 0)
+        self.assertEqual(len(analyse("moves", START)["moves"]), 20)
+        with self.assertRaises(ValueError):
+            analyse("moves", "not a fen")
+
+
+class TestAnalysisServer(unittest.TestCase):
+    """Run the server on a Unix socket with one worker and talk to it.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.server = AnalysisServer(workers=1, hash_mb=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def exchange(self, lines):
+        """Send the lines over one connection and return the replies by id."""
+        async def session():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "server.sock")
+                serving = asyncio.create_task(self.server.serve(path=path))
+                while not os.path.exists(path):
+                    await asyncio.sleep(0.01)
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write("".join(line + "\n" for line in lines).encode())
+                await writer.drain()
+                replies = [json.loads(await reader.readline()) for _ in lines]
+                writer.close()
+                serving.cancel()
+                return replies
+        return {reply["id"]: reply for reply in asyncio.run(session())}
+
+    def test_requests(self):
+        """Test replies, errors and the sharing of identical requests in flight."""
+        shared = self.server.shared
+        replies = self.exchange([
+            json.dumps({"id": 1, "fen": MATE_IN_ONE, "depth": 3}),
+            json.dumps({"id": 2, "fen": MATE_IN_ONE + "  ", "depth": 3}),
+            json.dumps({"id": 3, "op": "evaluate", "fen": START}),
+            json.dumps({"id": 4, "op": "moves", "fen": "8/8/8/8 w - - 0 1"}),
+            json.dumps({"id": 5, "op": "think", "fen": START}),
+            "not json",
+        ])
+        self.assertEqual(replies[1]["move"], "a1a8")
+        self.assertEqual(replies[2]["pv"], replies[1]["pv"])
+        self.assertEqual(self.server.shared - shared, 1)
+        self.assertEqual(replies[3]["score"], 0)
+        self.assertIn("error", replies[4])
+        self.assertIn("unknown op", replies[5]["error"])
+        self.assertIn("error", replies[None])
+        self.assertEqual(self.server.in_flight, {})
+
+    def test_worker_failure(self):
+        """Test that a request whose work fails in any way is answered with an error."""
+        async def fail(arguments):
+            raise IndexError("list index out of range")
+        with mock.patch.object(self.server, "submit", fail):
+            reply = asyncio.run(self.server.answer(json.dumps({"id": 7, "fen": START})))
+        self.assertEqual(reply, {"error": "list index out of range", "id": 7})
+
+
+if __name__ == '__main__':
+    unittest.main()
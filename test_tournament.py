@@ -0,0 +1,76 @@
+"""
+Test the self-play match runner.
+"""
+import io
+import json
+import math
+import unittest
+from chessboard import Chessboard
+from tournament import EngineConfig, elo_estimate, game_result, play_game, run_match, sprt
+
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+class TestTournament(unittest.TestCase):
+    """Test game end detection, the statistics and a short match.
+    """
+    def test_game_result(self):
+        """Test checkmate, stalemate, repetition and the fifty-move rule."""
+        board = Chessboard.from_fen("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+        self.assertEqual(game_result(board, {}), ("1-0", "checkmate"))
+        board = Chessboard.from_fen("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(game_result(board, {}), ("1/2-1/2", "stalemate"))
+        board = Chessboard.from_fen("4k3/8/8/8/8/8/8/R3K3 b - - 100 80")
+        self.assertEqual(game_result(board, {}), ("1/2-1/2", "fifty moves"))
+        board = Chessboard()
+        counts = {board.repetition_key(): 1}
+        for _ in range(2):
+            for move in ((7, 6, 5, 5), (0, 6, 2, 5), (5, 5, 7, 6), (2, 5, 0, 6)):
+                board.move_piece(*move)
+                counts[board.repetition_key()] = counts.get(board.repetition_key(), 0) + 1
+        self.assertEqual(game_result(board, counts), ("1/2-1/2", "repetition"))
+        # After 1. e4 no black pawn can capture en passant, so the position counts as the one
+        # reached again by moving the knights back and forth
+        board = Chessboard.from_fen("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+        counts = {board.repetition_key(): 1}
+        for _ in range(2):
+            for move in ((0, 6, 2, 5), (7, 6, 5, 5), (2, 5, 0, 6), (5, 5, 7, 6)):
+                board.move_piece(*move)
+                counts[board.repetition_key()] = counts.get(board.repetition_key(), 0) + 1
+        self.assertEqual(game_result(board, counts), ("1/2-1/2", "repetition"))
+
+    def test_play_game(self):
+        """Test a game that ends in mate and a game stopped by the move limit."""
+        engine = EngineConfig("engine", node_limit=2000)
+        game = play_game(engine, engine, MATE_IN_ONE)
+        self.assertEqual((game["result"], game["reason"], game["moves"]), ("1-0", "checkmate", ["a1a8"]))
+        game = play_game(engine, EngineConfig("other", max_depth=1), max_plies=6)
+        self.assertEqual((game["result"], game["reason"], game["plies"]), ("1/2-1/2", "move limit", 6))
+
+    def test_statistics(self):
+        """Test the Elo estimate and the SPRT decisions."""
+        self.assertEqual(elo_estimate(10, 0, 10)[0], 0.0)
+        elo, margin = elo_estimate(60, 20, 20)
+        self.assertAlmostEqual(elo, 147.19, places=2)
+        self.assertTrue(0 < margin < elo)
+        self.assertEqual(elo_estimate(5, 0, 0), (math.inf, math.inf))
+        self.assertEqual(sprt(0, 0, 0)[0], None)
+        self.assertEqual(sprt(600, 200, 200)[0], "H1")
+        self.assertEqual(sprt(200, 200, 600)[0], "H0")
+        decision, llr, (lower, upper) = sprt(11, 10, 9)
+        self.assertIsNone(decision)
+        self.assertTrue(lower < llr < upper)
+
+    def test_run_match(self):
+        """Test that a match plays both colours of an opening and logs every game."""
+        log = io.StringIO()
+        engine = EngineConfig("test", node_limit=2000)
+        summary = run_match(engine, EngineConfig("base", node_limit=2000), 2, [MATE_IN_ONE], workers=1, log=log)
+        games = [json.loads(line) for line in log.getvalue().splitlines()]
+        self.assertEqual(sorted(game["white"] for game in games), ["base", "test"])
+        self.assertEqual((summary["games"], summary["wins"], summary["losses"]), (2, 1, 1))
+        self.assertEqual(summary["elo"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test Zobrist hashing and the transposition table.
+"""
+import random
+import unittest
+from chessboard import Chessboard, move_from_uci
+from bitboard import BitboardChessboard
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+BUCKET_MB = 1 / 1024  # 32 buckets
+
+
+class TestZobrist(unittest.TestCase):
+    """Test the incremental Zobrist keys.
+    """
+    def test_incremental_key_matches_full_computation(self):
+        """Test that make_move and unmake_move keep the key equal to a fresh computation."""
+        for backend in (Chessboard, BitboardChessboard):
+            rng = random.Random(3)
+            board = backend.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+            keys = []
+            for _ in range(80):
+                moves = board.generate_legal_moves()
+                if not moves:
+                    break
+                keys.append(board.zobrist_key)
+                board.make_move(rng.choice(moves))
+                self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+            while keys:
+                board.unmake_move()
+                self.assertEqual(board.zobrist_key, keys.pop())
+
+    def test_transpositions_share_a_key(self):
+        """Test that two move orders reaching the same position give the same key."""
+        first, second = BitboardChessboard(), Chessboard()
+        for move in ["g1f3", "g8f6", "b1c3", "b8c6"]:
+            first.make_move(move_from_uci(move))
+        for move in ["b1c3", "b8c6", "g1f3", "g8f6"]:
+            second.make_move(move_from_uci(move))
+        self.assertEqual(first.zobrist_key, second.zobrist_key)
+        self.assertNotEqual(first.zobrist_key, Chessboard().zobrist_key)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """Test the TranspositionTable class.
+    """
+    def test_store_and_probe(self):
+        """Test that stored entries come back unchanged and misses are counted."""
+        table = TranspositionTable(size_mb=1)
+        table.store(0x1234, depth=5, score=-250, bound=UPPER_BOUND, move=0xABC)
+        self.assertEqual(table.probe(0x1234), (0xABC, -250, 5, UPPER_BOUND))
+        self.assertIsNone(table.probe(0x5678))
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_replacement_policy(self):
+        """Test depth-preferred and always-replace slots of one bucket."""
+        table = TranspositionTable(size_mb=BUCKET_MB)
+        buckets = table.mask + 1
+        deep, shallow, newer = 7, 7 + buckets, 7 + 2 * buckets  # All map to the same bucket
+        table.store(deep, depth=8, score=1, bound=EXACT)
+        table.store(shallow, depth=2, score=2, bound=LOWER_BOUND)
+        self.assertIsNotNone(table.probe(deep))
+        self.assertIsNotNone(table.probe(shallow))
+        # A shallow newcomer replaces the always-replace slot, the deep entry stays
+        table.store(newer, depth=1, score=3, bound=EXACT)
+        self.assertIsNotNone(table.probe(deep))
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.collisions, 1)
+        # A deeper search of another position takes the depth-preferred slot
+        table.store(shallow, depth=9, score=4, bound=EXACT)
+        self.assertEqual(table.probe(shallow)[1], 4)
+        self.assertIsNone(table.probe(deep))
+
+    def test_memory_budget(self):
+        """Test that the table size follows the budget and does not grow."""
+        table = TranspositionTable(size_mb=2)
+        self.assertLessEqual(table.size_bytes, 2 * 1024 * 1024)
+        for key in range(1, 200000, 7):
+            table.store(key * 0x9E3779B97F4A7C15 & (2 ** 64 - 1), depth=1, score=0, bound=EXACT)
+        self.assertLessEqual(table.size_bytes, 2 * 1024 * 1024)
+        table.clear()
+        self.assertEqual(table.stats()["stores"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Test the UCI front end.
+"""
+import asyncio
+import time
+import unittest
+from search import MATE_SCORE
+from uci import UciEngine, format_score, time_for_move
+
+
+class TestUciEngine(unittest.TestCase):
+    """Drive UciEngine with command lines and collect its replies.
+    """
+    def run_commands(self, *lines, pause=0.0):
+        """Send the lines, waiting pause seconds before the last one, and return the replies."""
+        replies = []
+        engine = UciEngine(write=replies.append)
+
+        async def session():
+            for line in lines[:-1]:
+                await engine.handle(line)
+            await asyncio.sleep(pause)
+            await engine.handle(lines[-1])
+        asyncio.run(session())
+        return replies
+
+    def test_handshake(self):
+        """Test the uci and isready replies."""
+        replies = self.run_commands("uci", "isready")
+        self.assertIn("option name Hash type spin default 16 min 1 max 1024", replies)
+        self.assertEqual(replies[-2:], ["uciok", "readyok"])
+
+    def test_go_depth(self):
+        """Test that a depth-limited search reports each iteration and a legal best move."""
+        replies = self.run_commands("position startpos moves e2e4 e7e5", "go depth 2", "quit", pause=0.5)
+        self.assertTrue(replies[0].startswith("info depth 1 score cp"))
+        self.assertTrue(replies[1].startswith("info depth 2 "))
+        self.assertTrue(replies[-1].startswith("bestmove "))
+
+    def test_mate(self):
+        """Test the mate score and the move from a FEN position."""
+        replies = self.run_commands("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", "go nodes 5000", "quit")
+        self.assertIn("score mate 1", replies[-2])
+        self.assertEqual(replies[-1], "bestmove a1a8")
+
+    def test_stop(self):
+        """Test that stop ends an infinite search within a fraction of a second and answers isready during it."""
+        replies = []
+        engine = UciEngine(write=replies.append)
+
+        async def session():
+            await engine.handle("position startpos")
+            await engine.handle("go infinite")
+            await asyncio.sleep(0.3)
+            await engine.handle("isready")
+            self.assertEqual(replies[-1], "readyok")
+            start = time.perf_counter()
+            await engine.handle("stop")
+            return time.perf_counter() - start
+        self.assertLess(asyncio.run(session()), 0.2)
+        self.assertTrue(replies[-1].startswith("bestmove "))
+
+    def test_illegal_move(self):
+        """Test that moves after an illegal one are ignored."""
+        engine = UciEngine(write=lambda line: None)
+        asyncio.run(engine.handle("position startpos moves e2e4 e2e4 d7d5"))
+        self.assertEqual(engine.board.to_fen().split()[:2], ["rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR", "b"])
+
+    def test_history(self):
+        """Test that the positions of the position command's moves reach the search."""
+        engine = UciEngine(write=lambda line: None)
+
+        async def session():
+            await engine.handle("position startpos moves g1f3 g8f6 f3g1 f6g8")
+            await engine.handle("go depth 1")
+            await engine.handle("quit")
+        asyncio.run(session())
+        self.assertEqual(len(engine.history), 4)
+        self.assertEqual(engine.history[0], engine.board.repetition_key())
+        self.assertEqual(engine.searcher.path, engine.history + [engine.board.repetition_key()])
+
+    def test_options(self):
+        """Test setting the hash size and the thread count."""
+        engine = UciEngine(write=lambda line: None)
+        asyncio.run(engine.handle("setoption name Hash value 1"))
+        self.assertEqual(engine.hash_mb, 1)
+        asyncio.run(engine.handle("setoption name Threads value 0"))
+        self.assertEqual(engine.threads, 1)
+
+    def test_time_and_score(self):
+        """Test the time allocation and score formatting."""
+        self.assertAlmostEqual(time_for_move({"movetime": 1000}, True), 0.95)
+        self.assertAlmostEqual(time_for_move({"wtime": 60000, "btime": 1000}, True), 2.0)
+        self.assertLessEqual(time_for_move({"wtime": 60000, "btime": 1000}, False), 0.5)
+        self.assertIsNone(time_for_move({"depth": 5}, True))
+        self.assertEqual(format_score(MATE_SCORE - 3), "mate 2")
+        self.assertEqual(format_score(-MATE_SCORE + 2), "mate -1")
+        self.assertEqual(format_score(-35), "cp -35")
+
+
+if __name__ == '__main__':
+    unittest.main()
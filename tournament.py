@@ -0,0 +1,332 @@
+"""Self-play matches between two engine configurations.
+Games are played on a process pool. Every opening is played twice, once with each
+engine as White; the game number decides the opening and the colours. The game
+state is kept on a reference Chessboard driven through move_piece(); each engine
+searches its own copy on the faster BitboardChessboard, keeps its transposition
+table for the whole game, and is given the positions played so far, so that it sees
+repetitions of them.
+
+A game ends by checkmate, stalemate, threefold repetition, the fifty-move rule, or
+as a draw after max_plies half-moves. Every finished game is appended to the log as
+one JSON line, and the match stops early once the sequential probability ratio
+test (SPRT) accepts either hypothesis: the test engine is elo0 stronger (H0) or
+elo1 stronger (H1) than the base engine.
+
+Example:
+    python tournament.py --games 400 --time 0.05 --openings openings.epd --log match.jsonl \\
+        --test quiescence=1 --base quiescence=0
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from chessboard import Chessboard, Color, PieceType, decode_move, move_to_uci
+from bitboard import BitboardChessboard
+from epd import iter_lines, parse_epd
+from search import Searcher
+from transposition import TranspositionTable
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# Games longer than this are adjudicated as draws
+MAX_PLIES = 400
+
+
+@dataclass
+class EngineConfig:
+    """
+    One engine of a match.
+    Attributes:
+        name (str): Name in the log.
+        time_limit (float): Seconds per move, None for no limit.
+        node_limit (int): Nodes per move, None for no limit.
+        max_depth (int): Depth per move, None for no limit.
+        hash_mb (float): Transposition table size.
+        options (dict): Keyword arguments for Searcher, e.g. {'quiescence': False}.
+    """
+    name: str
+    time_limit: float = None
+    node_limit: int = None
+    max_depth: int = None
+    hash_mb: float = 16
+    options: dict = field(default_factory=dict)
+
+    def searcher(self):
+        """Return a new Searcher with this configuration."""
+        return Searcher(TranspositionTable(self.hash_mb), **self.options)
+
+
+def game_result(board, counts):
+    """
+    Return how the game stands after the last move.
+
+    Args:
+        board (Chessboard): The game position.
+        counts (dict): How often each position (Chessboard.repetition_key) has occurred, including this one.
+
+    Returns:
+        tuple: (result, reason) such as ('1-0', 'checkmate'), ('1/2-1/2', 'repetition'),
+        or (None, None) while the game goes on.
+    """
+    if not board.generate_legal_moves():
+        if not board.in_check():
+            return "1/2-1/2", "stalemate"
+        return ("0-1" if board.side_to_move == Color.WHITE else "1-0"), "checkmate"
+    if counts.get(board.repetition_key(), 0) >= 3:
+        return "1/2-1/2", "repetition"
+    if board.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty moves"
+    return None, None
+
+
+def play_game(white, black, fen=START_FEN, max_plies=MAX_PLIES):
+    """
+    Play one game between two engines.
+
+    Args:
+        white (EngineConfig): The engine playing White.
+        black (EngineConfig): The engine playing Black.
+        fen (str): The opening position.
+        max_plies (int): Half-moves after which the game is a draw.
+
+    Returns:
+        dict: {'white', 'black', 'fen', 'result', 'reason', 'moves' (UCI), 'plies', 'seconds'}.
+    """
+    start = time.perf_counter()
+    board = Chessboard.from_fen(fen)
+    engines = {Color.WHITE: (white, white.searcher(), BitboardChessboard.from_fen(fen)),
+               Color.BLACK: (black, black.searcher(), BitboardChessboard.from_fen(fen))}
+    history = [board.repetition_key()]
+    counts = {history[0]: 1}
+    moves = []
+    result, reason = game_result(board, counts)
+    while result is None:
+        if len(moves) >= max_plies:
+            result, reason = "1/2-1/2", "move limit"
+            break
+        config, searcher, search_board = engines[board.side_to_move]
+        move = searcher.search(search_board, max_depth=config.max_depth or 128, time_limit=config.time_limit,
+                               node_limit=config.node_limit, history=history[:-1]).best_move
+        start_row, start_col, end_row, end_col, promotion = decode_move(move)
+        # move_piece promotes to a queen, an underpromotion is validated and played directly
+        if promotion in (PieceType.EMPTY, PieceType.QUEEN):
+            legal = board.move_piece(start_row, start_col, end_row, end_col)
+        else:
+            legal = move in board.generate_legal_moves()
+            if legal:
+                board.make_move(move)
+        if not legal:
+            raise RuntimeError(f"{config.name} played the illegal move {move_to_uci(move)} in {board.to_fen()}")
+        for _, _, other_board in engines.values():
+            other_board.make_move(move)
+        moves.append(move_to_uci(move))
+        history.append(board.repetition_key())
+        counts[history[-1]] = counts.get(history[-1], 0) + 1
+        result, reason = game_result(board, counts)
+    return {"white": white.name, "black": black.name, "fen": fen, "result": result, "reason": reason,
+            "moves": moves, "plies": len(moves), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _play_pair_game(number, test, base, fen, test_white, max_plies):
+    """Worker entry point: play one game and add its number and the test engine's score."""
+    white, black = (test, base) if test_white else (base, test)
+    game = play_game(white, black, fen, max_plies)
+    score = {"1-0": 1.0, "0-1": 0.0}.get(game["result"], 0.5)
+    return {"game": number, **game, "score": score if test_white else 1.0 - score}
+
+
+def load_openings(path):
+    """
+    Read the opening positions of an EPD or FEN file, see epd.py.
+
+    Returns:
+        list: FEN strings with move counters.
+    """
+    openings = []
+    for line in iter_lines(path):
+        fen, _ = parse_epd(line)
+        openings.append(fen if len(fen.split()) >= 6 else fen + " 0 1")
+    return openings
+
+
+def expected_score(elo):
+    """Return the expected score of an engine elo points stronger than its opponent."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_difference(score):
+    """Return the Elo difference matching an expected score strictly between 0 and 1."""
+    return -400 * math.log10(1 / score - 1)
+
+
+def _score_statistics(wins, draws, losses):
+    """Return the mean score per game and its variance per game."""
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return score, variance
+
+
+def elo_estimate(wins, draws, losses):
+    """
+    Estimate the Elo difference from a match result.
+
+    Args:
+        wins (int): Games won by the engine measured.
+        draws (int): Drawn games.
+        losses (int): Games lost.
+
+    Returns:
+        tuple: (elo, margin) where elo +- margin is the 95% confidence interval; the
+        bounds are infinite while the engine has won or lost every game.
+    """
+    if not wins + draws + losses:
+        return 0.0, math.inf
+    score, variance = _score_statistics(wins, draws, losses)
+    deviation = 1.96 * math.sqrt(variance / (wins + draws + losses))
+    if not 0 < score < 1:
+        return math.copysign(math.inf, score - 0.5), math.inf
+    low, high = score - deviation, score + deviation
+    if low <= 0 or high >= 1:
+        return elo_difference(score), math.inf
+    return elo_difference(score), (elo_difference(high) - elo_difference(low)) / 2
+
+
+def sprt(wins, draws, losses, elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05):
+    """
+    Sequential probability ratio test of H0: the Elo difference is elo0, against
+    H1: it is elo1, with the normal approximation of the game scores.
+
+    Args:
+        wins (int): Games won by the engine measured.
+        draws (int): Drawn games.
+        losses (int): Games lost.
+        elo0 (float): Elo difference of H0.
+        elo1 (float): Elo difference of H1.
+        alpha (float): Probability of accepting H1 when H0 is true.
+        beta (float): Probability of accepting H0 when H1 is true.
+
+    Returns:
+        tuple: (decision, llr, (lower, upper)) where decision is 'H0', 'H1' or None to
+        keep playing, llr the log-likelihood ratio and lower, upper its bounds.
+    """
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    games = wins + draws + losses
+    llr = 0.0
+    if games:
+        score, variance = _score_statistics(wins, draws, losses)
+        if variance > 0:
+            score0, score1 = expected_score(elo0), expected_score(elo1)
+            llr = games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+    decision = "H1" if llr >= upper else "H0" if llr <= lower else None
+    return decision, llr, (lower, upper)
+
+
+def run_match(test, base, games, openings=None, workers=None, log=None, max_plies=MAX_PLIES,
+              elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05, on_game=None):
+    """
+    Play up to games games between two engines on a process pool and stop early once
+    the SPRT decides.
+
+    Args:
+        test (EngineConfig): The engine measured.
+        base (EngineConfig): The engine it is measured against.
+        games (int): Games to play at most; every opening is played with both colours.
+        openings (list): Opening FEN strings, used in turn; the start position if None.
+        workers (int): Worker processes, the number of CPUs by default.
+        log (file): Stream that receives one JSON line per finished game, or None.
+        max_plies (int): Half-moves after which a game is a draw.
+        elo0, elo1, alpha, beta (float): The SPRT parameters, see sprt().
+        on_game (callable): Called with each game's record.
+
+    Returns:
+        dict: {'games', 'wins', 'draws', 'losses', 'elo', 'margin', 'llr', 'sprt', 'seconds'},
+        counted for the test engine.
+    """
+    start = time.perf_counter()
+    openings = openings or [START_FEN]
+    tasks = [(number, test, base, openings[number // 2 % len(openings)], number % 2 == 0, max_plies)
+             for number in range(games)]
+    wins = draws = losses = 0
+    decision, llr = None, 0.0
+    workers = min(workers or os.cpu_count() or 1, max(games, 1))
+    executor = ProcessPoolExecutor(workers)
+    try:
+        # Keep a few games queued per worker, so that an early stop leaves little unplayed work
+        pending = set()
+        queued = iter(tasks)
+        for task in queued:
+            pending.add(executor.submit(_play_pair_game, *task))
+            if len(pending) >= 2 * workers:
+                break
+        while pending and decision is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                game = future.result()
+                wins += game["score"] == 1.0
+                draws += game["score"] == 0.5
+                losses += game["score"] == 0.0
+                decision, llr, _ = sprt(wins, draws, losses, elo0, elo1, alpha, beta)
+                if log is not None:
+                    log.write(json.dumps(game) + "\n")
+                    log.flush()
+                if on_game is not None:
+                    on_game(game)
+                task = next(queued, None)
+                if task is not None:
+                    pending.add(executor.submit(_play_pair_game, *task))
+    finally:
+        executor.shutdown(cancel_futures=True)
+    elo, margin = elo_estimate(wins, draws, losses)
+    return {"games": wins + draws + losses, "wins": wins, "draws": draws, "losses": losses, "elo": elo,
+            "margin": margin, "llr": llr, "sprt": decision, "seconds": time.perf_counter() - start}
+
+
+def _parse_options(pairs):
+    """Turn ['quiescence=0', 'ordering=1'] into Searcher keyword arguments."""
+    options = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        options[name] = bool(int(value)) if value.isdigit() else value
+    return options
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play match between two engine configurations")
+    parser.add_argument("--games", type=int, default=200, help="games at most")
+    parser.add_argument("--openings", help="EPD or FEN file of opening positions")
+    parser.add_argument("--time", type=float, help="seconds per move")
+    parser.add_argument("--nodes", type=int, help="nodes per move")
+    parser.add_argument("--depth", type=int, help="depth per move")
+    parser.add_argument("--hash", type=float, default=16, help="transposition table megabytes per engine")
+    parser.add_argument("--workers", type=int, help="worker processes, the number of CPUs by default")
+    parser.add_argument("--log", help="append one JSON line per game to this file")
+    parser.add_argument("--test", nargs="*", default=[], metavar="OPTION=VALUE", help="Searcher options to test")
+    parser.add_argument("--base", nargs="*", default=[], metavar="OPTION=VALUE", help="Searcher options to compare with")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=5.0)
+    arguments = parser.parse_args()
+    if arguments.time is None and arguments.nodes is None and arguments.depth is None:
+        arguments.time = 0.1
+    limits = {"time_limit": arguments.time, "node_limit": arguments.nodes, "max_depth": arguments.depth,
+              "hash_mb": arguments.hash}
+    test_engine = EngineConfig("test", options=_parse_options(arguments.test), **limits)
+    base_engine = EngineConfig("base", options=_parse_options(arguments.base), **limits)
+    log_file = open(arguments.log, "a", encoding="utf-8") if arguments.log else None
+
+    def report(game):
+        print(f"game {game['game']:4d}: {game['white']} - {game['black']} {game['result']} ({game['reason']})",
+              file=sys.stderr)
+    try:
+        summary = run_match(test_engine, base_engine, arguments.games,
+                            load_openings(arguments.openings) if arguments.openings else None,
+                            arguments.workers, log_file, elo0=arguments.elo0, elo1=arguments.elo1, on_game=report)
+    finally:
+        if log_file is not None:
+            log_file.close()
+    print(f"+{summary['wins']} ={summary['draws']} -{summary['losses']}  "
+          f"Elo {summary['elo']:.1f} +- {summary['margin']:.1f}  LLR {summary['llr']:.2f}  "
+          f"SPRT {summary['sprt'] or 'undecided'}  {test_engine.options} vs {base_engine.options}")
@@ -0,0 +1,112 @@
+"""Transposition table with a fixed memory budget.
+Entries are keyed by the position's Zobrist key (Chessboard.zobrist_key) and packed
+into two flat arrays of 64-bit integers, so the table never grows after it is created.
+
+Each bucket has two slots. The first is depth-preferred: it keeps the entry that was
+searched deepest. The second is always-replace: it takes every entry that the first
+slot refused, so recent results are never lost.
+"""
+from array import array
+
+# Bound types stored with a score
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+
+_SCORE_OFFSET = 1 << 31
+# A bucket is two keys and two data words of 8 bytes each
+BUCKET_BYTES = 32
+
+
+class TranspositionTable:
+    """
+    A bounded hash table of search results.
+    Attributes:
+        hits (int): Probes that found their key.
+        misses (int): Probes that did not find their key.
+        collisions (int): Misses whose bucket held entries of other positions.
+        stores (int): Calls to store().
+    Example:
+        table = TranspositionTable(size_mb=16)
+        table.store(board.zobrist_key, depth=4, score=35, bound=EXACT, move=best_move)
+        entry = table.probe(board.zobrist_key)  # (move, score, depth, bound) or None
+    """
+
+    def __init__(self, size_mb=16):
+        """
+        Args:
+            size_mb (float): Memory budget in megabytes; rounded down to a power of two buckets.
+        """
+        buckets = max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES)
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = buckets - 1
+        self.keys = array("Q", [0]) * (2 * buckets)
+        self.data = array("Q", [0]) * (2 * buckets)
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    @property
+    def size_bytes(self):
+        """The memory used by the entries."""
+        return len(self.keys) * 16
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self.keys = array("Q", [0]) * len(self.keys)
+        self.data = array("Q", [0]) * len(self.data)
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key (int): The position's Zobrist key.
+
+        Returns:
+            tuple: (move, score, depth, bound) or None if the position is not stored.
+        """
+        slot = (key & self.mask) << 1
+        keys = self.keys
+        if keys[slot] == key and self.data[slot]:
+            data = self.data[slot]
+        elif keys[slot + 1] == key and self.data[slot + 1]:
+            data = self.data[slot + 1]
+        else:
+            self.misses += 1
+            if self.data[slot] or self.data[slot + 1]:
+                self.collisions += 1
+            return None
+        self.hits += 1
+        return (data & 0xFFFF, (data >> 16 & 0xFFFFFFFF) - _SCORE_OFFSET, data >> 48 & 0xFF, data >> 56)
+
+    def store(self, key, depth, score, bound, move=0):
+        """
+        Store a search result. The depth-preferred slot takes the entry if it is empty,
+        holds the same position or was searched less deeply; otherwise the entry goes
+        to the always-replace slot.
+
+        Args:
+            key (int): The position's Zobrist key.
+            depth (int): The remaining search depth of the result (0-255).
+            score (int): The score from the side to move's point of view.
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            move (int): The best move found, 0 for none.
+        """
+        self.stores += 1
+        slot = (key & self.mask) << 1
+        data = move & 0xFFFF | (score + _SCORE_OFFSET) << 16 | min(max(depth, 0), 255) << 48 | bound << 56
+        old = self.data[slot]
+        if not old or self.keys[slot] == key or depth >= old >> 48 & 0xFF:
+            self.keys[slot], self.data[slot] = key, data
+        else:
+            self.keys[slot + 1], self.data[slot + 1] = key, data
+
+    def hashfull(self):
+        """Return the share of used slots in permille, sampled from the first 1000 slots."""
+        sample = self.data[:1000]
+        return sum(1 for data in sample if data) * 1000 // len(sample)
+
+    def stats(self):
+        """Return the counters as a dict."""
+        probes = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "collisions": self.collisions,
+                "stores": self.stores, "hit_rate": self.hits / probes if probes else 0.0,
+                "size_bytes": self.size_bytes}
@@ -0,0 +1,250 @@
+"""UCI (Universal Chess Interface) front end for the search.
+An asyncio loop reads commands from stdin and writes replies to stdout. The search
+runs in a worker thread, so the loop keeps reading while it thinks: `isready` is
+answered at once and `stop` ends the search within a few milliseconds, after which
+the best move of the last finished iteration is sent.
+
+Supported commands: uci, isready, ucinewgame, setoption (Hash, Threads),
+position (startpos or fen, with moves), go (wtime, btime, winc, binc, movestogo,
+movetime, depth, nodes, infinite), stop and quit. With Threads above 1 the search
+runs on a ParallelSearcher process pool.
+
+Example:
+    python uci.py    # then point the GUI or match runner at this command
+"""
+import asyncio
+import os
+import sys
+import threading
+from functools import partial
+from chessboard import Color, move_from_uci, move_to_uci
+from bitboard import BitboardChessboard
+from parallel import ParallelSearcher
+from search import MATE_BOUND, MATE_SCORE, MAX_PLY, Searcher
+from transposition import TranspositionTable
+
+ENGINE_NAME = "ChessPython"
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+# Kept back from the clock for the time it takes to send the move
+MOVE_OVERHEAD = 0.05
+
+
+def format_score(score):
+    """
+    Return a search score as a UCI score field, 'cp <centipawns>' or 'mate <moves>'.
+    """
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate -{(MATE_SCORE + score) // 2}"
+    return f"cp {score}"
+
+
+def time_for_move(options, white_to_move):
+    """
+    Choose the search time from the arguments of a go command.
+
+    Args:
+        options (dict): The numeric go arguments, e.g. {'wtime': 60000, 'winc': 1000}.
+        white_to_move (bool): Whose clock to use.
+
+    Returns:
+        float: Seconds to search, None for no time limit.
+    """
+    if "movetime" in options:
+        return max(options["movetime"] / 1000 - MOVE_OVERHEAD, 0.01)
+    remaining = options.get("wtime" if white_to_move else "btime")
+    if remaining is None:
+        return None
+    increment = options.get("winc" if white_to_move else "binc", 0)
+    seconds = remaining / 1000 / options.get("movestogo", 30) + increment / 1000 * 0.8
+    # Never plan to use more than half of what is left
+    return max(min(seconds, remaining / 1000 / 2 - MOVE_OVERHEAD), 0.01)
+
+
+class UciEngine:
+    """
+    The UCI command handler. Each command line is passed to handle(); replies go to write.
+    Attributes:
+        board (Chessboard): The position set by the last position command.
+        history (list): The repetition_key() of each position before board in the position command's moves,
+            passed to the search so that it sees repetitions of them.
+        searcher (Searcher): The single-thread searcher, keeping its transposition table between moves.
+        threads (int): Search threads; above 1 a ParallelSearcher with this many processes is used.
+    """
+
+    def __init__(self, write=None, backend=BitboardChessboard):
+        """
+        Args:
+            write (callable): Called with each reply line, printing to stdout if None.
+            backend (type): The Chessboard class to use.
+        """
+        self.write = write or (lambda line: print(line, flush=True))
+        self.backend = backend
+        self.board = backend()
+        self.history = []
+        self.hash_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.searcher = Searcher(TranspositionTable(self.hash_mb))
+        self.parallel = None
+        self.search_task = None
+        self.infinite = False
+        self.stop_requested = None
+        self.loop = None
+
+    async def handle(self, line):
+        """
+        Carry out one command.
+
+        Returns:
+            bool: False after quit, True otherwise.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == "uci":
+            self.write(f"id name {ENGINE_NAME}")
+            self.write("id author HelmutQualtinger")
+            self.write(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.write(f"option name Threads type spin default 1 min 1 max {os.cpu_count() or 1}")
+            self.write("uciok")
+        elif command == "isready":
+            self.write("readyok")
+        elif command == "ucinewgame":
+            await self.stop()
+            self.searcher.table.clear()
+        elif command == "setoption":
+            await self.stop()
+            self.set_option(arguments)
+        elif command == "position":
+            await self.stop()
+            self.set_position(arguments)
+        elif command == "go":
+            await self.stop()
+            self.go(arguments)
+        elif command == "stop":
+            await self.stop()
+        elif command == "quit":
+            await self.stop()
+            if self.parallel is not None:
+                self.parallel.close()
+            return False
+        return True
+
+    def set_option(self, arguments):
+        """Handle 'setoption name <name> value <value>'; unknown options are ignored."""
+        text = " ".join(arguments)
+        name, _, value = text.partition(" value ")
+        name = name.removeprefix("name ").strip().lower()
+        try:
+            number = int(value)
+        except ValueError:
+            return
+        if name == "hash":
+            self.hash_mb = min(max(number, 1), MAX_HASH_MB)
+            self.searcher.table = TranspositionTable(self.hash_mb)
+        elif name == "threads":
+            self.threads = min(max(number, 1), os.cpu_count() or 1)
+        else:
+            return
+        # The pool is started again with the new settings when it is next needed
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def set_position(self, arguments):
+        """Handle 'position startpos|fen <fen> [moves ...]'. Moves after an illegal one are ignored."""
+        moves = arguments.index("moves") if "moves" in arguments else len(arguments)
+        try:
+            if arguments and arguments[0] == "fen":
+                board = self.backend.from_fen(" ".join(arguments[1:moves]))
+            else:
+                board = self.backend()
+        except ValueError as error:
+            self.write(f"info string {error}")
+            return
+        history = []
+        for text in arguments[moves + 1:]:
+            try:
+                move = move_from_uci(text)
+            except ValueError:
+                move = None
+            if move not in board.generate_legal_moves():
+                self.write(f"info string illegal move {text}")
+                break
+            history.append(board.repetition_key())
+            board.make_move(move)
+        self.board = board
+        self.history = history
+
+    def go(self, arguments):
+        """Handle 'go'; start the search in a worker thread and return at once."""
+        options = {}
+        for name, value in zip(arguments, arguments[1:]):
+            if value.lstrip("-").isdigit():
+                options[name] = int(value)
+        self.infinite = "infinite" in arguments
+        time_limit = None if self.infinite else time_for_move(options, self.board.side_to_move == Color.WHITE)
+        limits = dict(max_depth=min(options.get("depth", MAX_PLY), MAX_PLY), time_limit=time_limit,
+                      node_limit=options.get("nodes"), history=self.history)
+        self.loop = asyncio.get_running_loop()
+        self.stop_requested = asyncio.Event()
+        self.searcher.stop_event.clear()
+        if self.threads > 1:
+            if self.parallel is None:
+                self.parallel = ParallelSearcher(self.threads, self.hash_mb)
+            self.parallel.stop_event.clear()
+            if limits["node_limit"] is not None:
+                limits["node_limit"] = max(limits["node_limit"] // self.threads, 1)
+            search = partial(self.parallel.search, self.board, **limits)
+        else:
+            search = partial(self.searcher.search, self.board, on_iteration=self._report, **limits)
+        self.search_task = asyncio.create_task(self._run(search))
+
+    def _report(self, result):
+        """Send an info line for a finished iteration; called in the search thread."""
+        line = (f"info depth {result.depth} score {format_score(result.score)} nodes {result.nodes} "
+                f"nps {result.nps} time {int(result.seconds * 1000)} pv {' '.join(map(move_to_uci, result.pv))}")
+        self.loop.call_soon_threadsafe(self.write, line)
+
+    async def _run(self, search):
+        result = await asyncio.to_thread(search)
+        if self.threads > 1:
+            self._report(result)
+        # Under 'go infinite' the move is sent only after stop, even if the search ended
+        if self.infinite:
+            await self.stop_requested.wait()
+        self.write(f"bestmove {move_to_uci(result.best_move) if result.best_move else '0000'}")
+
+    async def stop(self):
+        """End the running search, if any, and wait until its best move has been sent."""
+        if self.search_task is None:
+            return
+        self.searcher.stop()
+        if self.parallel is not None:
+            self.parallel.stop()
+        self.stop_requested.set()
+        await self.search_task
+        self.search_task = None
+
+
+def _read_lines(loop, queue):
+    """Feed stdin to the queue; runs in a daemon thread so that quitting never waits for input."""
+    for line in sys.stdin:
+        loop.call_soon_threadsafe(queue.put_nowait, line)
+    loop.call_soon_threadsafe(queue.put_nowait, "quit")
+
+
+async def main():
+    """Run the engine on stdin and stdout until quit or the end of input."""
+    engine = UciEngine()
+    queue = asyncio.Queue()
+    threading.Thread(target=_read_lines, args=(asyncio.get_running_loop(), queue), daemon=True).start()
+    while await engine.handle(await queue.get()):
+        pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
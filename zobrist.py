@@ -0,0 +1,18 @@
+"""Zobrist hashing keys.
+A position's key is the XOR of one random 64-bit number per (piece, square) pair,
+one for the castling rights, one for the en passant file and one when black is
+to move. Making a move only XORs the keys of the squares and state that changed,
+see Chessboard.make_move. The numbers come from a fixed seed so keys are the
+same in every process.
+"""
+import random
+
+_rng = random.Random(0x5EED_C4E55)
+
+# PIECE_KEYS[piece_index][square], piece_index as in chessboard.piece_index
+PIECE_KEYS = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+# One key per combination of the four castling rights bits
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(16)]
+# One key per file of the en passant square
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+BLACK_TO_MOVE_KEY = _rng.getrandbits(64)